@@ -64,6 +64,22 @@ def login_for_access_token(
     access_token = create_access_token(token_data)
     return {"access_token": access_token, "token_type": "bearer"}
 
+def get_user_from_token(db: Session, token: str) -> Optional[User]:
+    """
+    Decode a JWT access token and load its user; None if the token is
+    invalid or the user no longer exists.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+        role: str = payload.get("role")
+        if user_id is None or role is None:
+            return None
+        token_data = TokenData(user_id=int(user_id), role=role)
+    except JWTError:
+        return None
+    return db.query(User).get(token_data.user_id)
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
@@ -73,17 +89,7 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        role: str = payload.get("role")
-        if user_id is None or role is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=int(user_id), role=role)
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(User).get(token_data.user_id)
+    user = get_user_from_token(db, token)
     if user is None:
         raise credentials_exception
     return user
@@ -1,5 +1,7 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Read your DATABASE_URL from env vars (default for local dev)
@@ -22,6 +24,32 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async drivers used for the same database by the async engine
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# Async engine for the hot endpoints (async def routes); same database
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=False
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for declarative models
 Base = declarative_base()
 
@@ -38,3 +66,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    FastAPI dependency for async routes: yields an AsyncSession and closes it.
+    Sync service code can be reused through `await db.run_sync(fn, ...)`.
+    Usage in routes:
+      @router.get(...)
+      async def read_items(db: AsyncSession = Depends(get_async_db)):
+          ...
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
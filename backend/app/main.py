@@ -3,14 +3,23 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db_session import engine, Base
+from app.db_session import engine, SessionLocal
 from app.scheduler import start_scheduler
+from app.services.ingest_queue import INGEST_MODE, ingest_queue
+from app.services.door_state import backfill_door_states
+from app.services.item_search import ensure_search_indexes
+from app.services.notifier import notifier
+from app.services.ping_buffer import ping_buffer
+from app.services.reading_partitions import create_tables
+from app.services.reading_rollups import rollup_buffer
+from app.services.sensor_service import backfill_sensor_latest
 
 from app.auth_security import auth_router
 from app.routes.items import router as items_router
 from app.routes.sensors import router as sensors_router
 from app.routes.sensors_status import router as sensors_status_router
 from app.routes.alerts import router as alerts_router
+from app.routes.exports import router as exports_router
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -26,24 +35,51 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     # Create all tables (for MVP; migrate to Alembic later if needed)
-    Base.metadata.create_all(bind=engine)
+    create_tables(engine)
+    ensure_search_indexes(engine)
 
     # Authentication routes (login, token)
     app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
-    # Domain routes
-    app.include_router(items_router, prefix="/items", tags=["items"])
-    app.include_router(sensors_router, prefix="/sensors", tags=["sensors"])
-    app.include_router(sensors_status_router, prefix="/sensors", tags=["sensors-status"])
-    app.include_router(alerts_router, prefix="/alerts", tags=["alerts"])
+    # Domain routes (each route declares its full path, e.g. "/sensors/readings/")
+    app.include_router(items_router, tags=["items"])
+    app.include_router(sensors_router, tags=["sensors"])
+    app.include_router(sensors_status_router, tags=["sensors-status"])
+    app.include_router(alerts_router, tags=["alerts"])
+    app.include_router(exports_router, tags=["exports"])
 
     # Startup event to begin background scheduler
     @app.on_event("startup")
     def on_startup():
+        # Fill sensor_latest / door states once after upgrading (the
+        # rollups are built by a scheduler job, off the startup path)
+        db = SessionLocal()
+        try:
+            backfill_sensor_latest(db)
+            backfill_door_states(db)
+        finally:
+            db.close()
         start_scheduler()
+        if INGEST_MODE == "queued":
+            ingest_queue.start()
+
+    @app.on_event("shutdown")
+    def on_shutdown():
+        # Write out queued readings before the last pings
+        ingest_queue.stop()
+        # Don't lose buffered last_ping values and rollups on restart
+        db = SessionLocal()
+        try:
+            ping_buffer.flush(db)
+            rollup_buffer.flush(db)
+        finally:
+            db.close()
+        # Deliver queued notifications (dead-letter what doesn't make it)
+        notifier.stop()
 
     return app
 
@@ -1,7 +1,7 @@
 # medassistant/backend/app/models.py
 
 from sqlalchemy import (
-    Column, Integer, String, Date, DateTime, Boolean, Float, ForeignKey, Text
+    Column, Integer, String, Date, DateTime, Boolean, Float, ForeignKey, Text, Index
 )
 from sqlalchemy.orm import relationship
 from app.db_session import Base
@@ -42,6 +42,14 @@ class Item(Base):
     location = relationship("Location", back_populates="items")
     events = relationship("Event", back_populates="item")
 
+    __table_args__ = (
+        # keyset pagination of GET /items/ by sort column, id as tiebreaker
+        Index("ix_items_name_id", name, id),
+        Index("ix_items_batch_id", batch, id),
+        Index("ix_items_expiry_date_id", expiry_date, id),
+        Index("ix_items_status_id", status, id),
+    )
+
 
 class Event(Base):
     __tablename__ = "events"
@@ -50,12 +58,18 @@ class Event(Base):
     event_type = Column(String, nullable=False)  # "entry", "exit", "moved"
     timestamp = Column(DateTime, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    metadata = Column(Text, nullable=True)
+    # "metadata" is reserved on declarative classes; keep the column name
+    metadata_ = Column("metadata", Text, nullable=True)
 
     item = relationship("Item", back_populates="events")
     # Optionally, relate back to User if you wish:
     # user = relationship("User")
 
+    __table_args__ = (
+        # an item's history (selectin loads, latest n events per item)
+        Index("ix_events_item_id_timestamp", item_id, timestamp),
+    )
+
 
 class Sensor(Base):
     __tablename__ = "sensors"
@@ -80,6 +94,49 @@ class SensorReading(Base):
 
     sensor = relationship("Sensor", back_populates="readings")
 
+    __table_args__ = (
+        # latest-reading lookups and per-sensor time scans
+        Index("ix_sensor_readings_sensor_id_timestamp", sensor_id, timestamp.desc()),
+    )
+
+
+class SensorLatest(Base):
+    """
+    Latest reading per sensor (by reading timestamp), maintained by ingest
+    in the same transaction as the readings themselves.
+    """
+    __tablename__ = "sensor_latest"
+    sensor_id = Column(Integer, ForeignKey("sensors.id"), primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    value = Column(Float, nullable=False)
+
+
+class DoorOpenState(Base):
+    """
+    Door sensors that are currently open, and since when (the reading that
+    opened them). Maintained by ingest on open/close transitions; a row
+    exists only while the door is open.
+    """
+    __tablename__ = "door_open_states"
+    sensor_id = Column(Integer, ForeignKey("sensors.id"), primary_key=True)
+    open_since = Column(DateTime, nullable=False)
+
+
+class SensorReadingRollup(Base):
+    """
+    Per-sensor aggregates of sensor_readings over fixed time buckets
+    ("1m", "1h", "1d"), merged by ingest as readings arrive. Kept when raw
+    readings are removed by retention.
+    """
+    __tablename__ = "sensor_reading_rollups"
+    sensor_id = Column(Integer, ForeignKey("sensors.id"), primary_key=True)
+    resolution = Column(String(3), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)        # bucket start (UTC)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    reading_count = Column(Integer, nullable=False)
+
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -96,3 +153,28 @@ class Alert(Base):
     # optional relationships:
     # item = relationship("Item")
     # sensor = relationship("Sensor")
+
+    __table_args__ = (
+        # GET /alerts/ pages, newest first, by status / sensor / overall
+        Index("ix_alerts_resolved_timestamp_id", resolved, timestamp, id),
+        Index("ix_alerts_sensor_id_timestamp_id", sensor_id, timestamp, id),
+        Index("ix_alerts_timestamp_id", timestamp, id),
+    )
+
+
+class AlertDedupe(Base):
+    # Shared alert dedupe state (see services/dedupe_store.py)
+    __tablename__ = "alert_dedupe"
+    key = Column(String, primary_key=True)
+    sent_at = Column(DateTime, nullable=False, index=True)
+
+
+class NotificationDeadLetter(Base):
+    # Notifications given up on by the dispatcher (services/notifier.py)
+    __tablename__ = "notification_dead_letters"
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    error = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    failed_at = Column(DateTime, nullable=False)
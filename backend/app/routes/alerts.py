@@ -3,13 +3,23 @@
 from typing import List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.db_session import get_db
 from app.models import Alert
-from app.schemas import AlertResponse
+from app.schemas import AlertBulkResolve, AlertResponse
 from app.auth_security import get_current_user, require_role
+from app.services.alert_query import (
+    ALERTS_DEFAULT_LIMIT,
+    ALERTS_MAX_LIMIT,
+    AlertFilters,
+    get_alert_summary,
+    get_alerts_page,
+    resolve_alerts,
+)
+from app.services.notifier import notifier
+from app.services.sensor_service import as_naive_utc
 
 router = APIRouter(
     prefix="",
@@ -27,26 +37,128 @@ router = APIRouter(
     dependencies=[Depends(require_role(["admin", "auditor", "operator"]))]
 )
 def list_alerts(
+    response: Response,
     status: Optional[str] = Query(
         None,
         regex="^(active|all)$",
         description="Filter by 'active' (unresolved) or 'all'"
     ),
+    severity: Optional[str] = Query(None, description="e.g. 'info', 'warning', 'critical'"),
+    category: Optional[str] = Query(None, description="e.g. 'below_threshold'"),
+    sensor_id: Optional[int] = Query(None),
+    location_id: Optional[int] = Query(None, description="Alerts of this location's sensors and items"),
+    start: Optional[datetime] = Query(None, alias="from", description="Raised at or after"),
+    end: Optional[datetime] = Query(None, alias="to", description="Raised before"),
+    limit: int = Query(ALERTS_DEFAULT_LIMIT, ge=1, le=ALERTS_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db),
 ):
     """
-    Retrieve alerts.  
+    Retrieve alerts, newest first.  
     - If `status=active`, return only unresolved alerts.  
     - If `status=all`, return both resolved and unresolved alerts.  
     - If omitted, defaults to unresolved.
+
+    Results are paged: when there are more alerts, the response carries
+    an X-Next-Cursor header to pass as `cursor` (same filters).
     """
-    query = db.query(Alert)
-    if status == "active" or status is None:
-        query = query.filter(Alert.resolved == False)  # noqa: E712
-    alerts = query.order_by(Alert.timestamp.desc()).all()
+    filters = _filters(status, severity, category, sensor_id, location_id, start, end)
+    try:
+        alerts, next_cursor = get_alerts_page(db, filters, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return alerts
 
 
+# --------------------------------------
+# GET /alerts/summary – badge counters
+# --------------------------------------
+@router.get(
+    "/alerts/summary",
+    summary="Count alerts by severity and category",
+    dependencies=[Depends(require_role(["admin", "auditor", "operator"]))]
+)
+def alerts_summary(
+    status: Optional[str] = Query(None, regex="^(active|all)$"),
+    severity: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    sensor_id: Optional[int] = Query(None),
+    location_id: Optional[int] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """
+    Return `{"total": n, "by_severity": {...}, "by_category": {...}}` for
+    the alerts matching the same filters as GET /alerts/ (unresolved by
+    default), without loading them.
+    """
+    filters = _filters(status, severity, category, sensor_id, location_id, start, end)
+    return get_alert_summary(db, filters)
+
+
+# --------------------------------------
+# GET /alerts/notifications/stats
+# --------------------------------------
+@router.get(
+    "/alerts/notifications/stats",
+    summary="Notification delivery statistics",
+    dependencies=[Depends(require_role(["admin", "auditor"]))]
+)
+def notification_stats():
+    """
+    Return per-channel queue depth and sent / retried / dead-lettered
+    counters of the notification dispatcher.
+    """
+    return notifier.stats()
+
+
+def _filters(status, severity, category, sensor_id, location_id, start, end) -> AlertFilters:
+    return AlertFilters(
+        active_only=status != "all",
+        severity=severity,
+        category=category,
+        sensor_id=sensor_id,
+        location_id=location_id,
+        start=as_naive_utc(start) if start else None,
+        end=as_naive_utc(end) if end else None,
+    )
+
+
+# --------------------------------------
+# POST /alerts/resolve – bulk resolve
+# --------------------------------------
+@router.post(
+    "/alerts/resolve",
+    response_model=List[AlertResponse],
+    summary="Resolve many alerts at once",
+    dependencies=[Depends(require_role(["admin", "auditor"]))]
+)
+def resolve_alerts_bulk(
+    criteria: AlertBulkResolve,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Resolve every unresolved alert matching all the given criteria (ids,
+    category, sensor_id, raised `before`) in a single statement, and
+    return the alerts resolved by this call. At least one criterion is
+    required. Only 'admin' or 'auditor' roles may call this.
+    """
+    try:
+        return resolve_alerts(
+            db,
+            ids=criteria.ids,
+            category=criteria.category,
+            sensor_id=criteria.sensor_id,
+            before=as_naive_utc(criteria.before) if criteria.before else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # --------------------------------------
 # POST /alerts/{alert_id}/resolve
 # --------------------------------------
@@ -0,0 +1,104 @@
+# medassistant/backend/app/routes/exports.py
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth_security import require_role
+from app.db_session import get_async_db
+from app.services.exports import (
+    EVENT_COLUMNS,
+    READING_COLUMNS,
+    iter_events,
+    iter_readings,
+    to_csv,
+    to_parquet,
+)
+from app.services.sensor_service import as_naive_utc
+
+router = APIRouter(
+    prefix="",
+    tags=["exports"],
+    responses={404: {"description": "Not found"}},
+)
+
+_MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _export_response(name: str, fmt: str, columns, chunks) -> StreamingResponse:
+    if fmt == "parquet":
+        body = to_parquet(columns, chunks)
+    else:
+        body = to_csv(columns, chunks)
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+# --------------------------------------
+# GET /exports/readings – sensor histories
+# --------------------------------------
+@router.get(
+    "/exports/readings",
+    summary="Export sensor readings (CSV/Parquet)",
+    dependencies=[Depends(require_role(["admin", "auditor"]))],
+)
+async def export_readings(
+    format: str = Query("csv", regex="^(csv|parquet)$"),
+    location_id: Optional[int] = Query(None),
+    sensor_id: Optional[int] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to", description="exclusive"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream the full reading history of the selected sensors (all, one
+    location's, or one sensor) as CSV or Parquet, ordered by sensor and
+    time. Rows are read from server-side cursors and written out chunk by
+    chunk, so memory use doesn't grow with the export size.
+    """
+    chunks = iter_readings(
+        db,
+        location_id=location_id,
+        sensor_id=sensor_id,
+        start=as_naive_utc(start) if start else None,
+        end=as_naive_utc(end) if end else None,
+    )
+    return _export_response("readings", format, READING_COLUMNS, chunks)
+
+
+# --------------------------------------
+# GET /exports/events – item event trails
+# --------------------------------------
+@router.get(
+    "/exports/events",
+    summary="Export item events (CSV/Parquet)",
+    dependencies=[Depends(require_role(["admin", "auditor"]))],
+)
+async def export_events(
+    format: str = Query("csv", regex="^(csv|parquet)$"),
+    batch: Optional[str] = Query(None, description="Item batch"),
+    location_id: Optional[int] = Query(None, description="Item location"),
+    item_id: Optional[int] = Query(None),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to", description="exclusive"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream the event trail of the selected items (e.g. a whole batch) as
+    CSV or Parquet, in event order, from a server-side cursor.
+    """
+    chunks = iter_events(
+        db,
+        batch=batch,
+        location_id=location_id,
+        item_id=item_id,
+        start=as_naive_utc(start) if start else None,
+        end=as_naive_utc(end) if end else None,
+    )
+    return _export_response("events", format, EVENT_COLUMNS, chunks)
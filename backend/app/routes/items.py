@@ -4,13 +4,19 @@ from typing import List, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 
 from app.db_session import get_db
 from app.models import Item, Event
-from app.schemas import ItemResponse
-from app.services.item_service import get_items
+from app.schemas import ItemResponse, QueuedScan, ScanSyncResult
+from app.services.item_service import get_items_page, parse_includes
+from app.services.nfc_scan_service import SCAN_STATUSES, SCAN_SYNC_MAX_SCANS, record_scans
+from app.services.nfc_tag_cache import TagEntry, nfc_tag_cache
 from app.auth_security import get_current_user, require_role
 from app.schemas import UserResponse
 
@@ -26,28 +32,62 @@ router = APIRouter(
 @router.get("/items/", response_model=List[ItemResponse])
 def list_items(
     q: Optional[str] = Query(None, description="Search term for name, batch, or tag"),
-    sort: str = Query("name", description="Field to sort by"),
+    sort: Optional[str] = Query(None, description="Field to sort by, or 'relevance' (default with q; else name)"),
     order: str = Query("asc", regex="^(asc|desc)$", description="Sort order"),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    include: Optional[str] = Query(
+        None, description="Comma-separated: location, events, events:<n> (latest n); default location"
+    ),
     db: Session = Depends(get_db),
 ):
     """
     Retrieve items with optional search, sort, and pagination.
+
+    Pages can be fetched by `offset`, or by `cursor`: when there are more
+    items, the response carries an opaque X-Next-Cursor header to pass as
+    `cursor` for the next page (same q/sort/order). Cursor pages stay fast
+    at any depth and don't skip or repeat items while the list changes.
+
+    Only the relationships named in `include` are loaded and returned
+    (`location` by default, no events), so a page takes a fixed number of
+    queries whatever its size.
     """
-    items = get_items(db, q=q, sort=sort, order=order, limit=limit, offset=offset)
-    return items
+    if sort is None:
+        sort = "relevance" if q else "name"
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset")
+    try:
+        includes = parse_includes(include)
+        items, next_cursor = get_items_page(
+            db, q=q, sort=sort, order=order, limit=limit, offset=offset, cursor=cursor,
+            includes=includes,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Leave out what wasn't included (rather than null / []). Returned as a
+    # JSONResponse so the items are serialized once, not re-validated
+    # against response_model (which only documents the shape here)
+    exclude = {
+        name for name, wanted in (("location", includes.location), ("events", includes.events))
+        if not wanted
+    }
+    return JSONResponse(
+        [jsonable_encoder(ItemResponse.from_orm(item), exclude=exclude) for item in items],
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
 
 
 # ---------------------------
-# POST /scan-nfc/ – Scan tag
+# POST /items/scan-nfc/ – Scan tag
 # ---------------------------
 class NFCScan(BaseModel):
     tag_id: str
     event_type: str  # "entry" or "exit"
 
 @router.post(
-    "/scan-nfc/",
+    "/items/scan-nfc/",
     summary="Scan an NFC tag to log entry/exit",
     dependencies=[Depends(require_role(["admin", "operator"]))],
 )
@@ -60,27 +100,71 @@ def scan_nfc(
     Log an entry or exit event for an item by its NFC tag.
     Only users with role 'admin' or 'operator' may call this.
     """
-    # 1. Lookup item
-    item = db.query(Item).filter(Item.nfc_tag == scan.tag_id).first()
-    if not item:
+    # 1. Resolve tag (cached; only a miss touches the items table)
+    entry = nfc_tag_cache.get(db, scan.tag_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Item not found")
     # 2. Create event record
     event = Event(
-        item_id=item.id,
+        item_id=entry.item_id,
         event_type=scan.event_type,
         timestamp=datetime.utcnow(),
         user_id=current_user.id,
-        metadata=f"NFC {scan.event_type}"
+        metadata_=f"NFC {scan.event_type}"
     )
     db.add(event)
     # 3. Update item status
-    if scan.event_type == "exit":
-        item.status = "in_transit"
-    elif scan.event_type == "entry":
-        item.status = "in_stock"
-    db.commit()
+    status = SCAN_STATUSES.get(scan.event_type, entry.status)
+    found = True
+    try:
+        if scan.event_type in SCAN_STATUSES:
+            result = db.execute(update(Item).where(Item.id == entry.item_id).values(status=status))
+            found = result.rowcount > 0
+        if found:
+            db.commit()
+    except IntegrityError:
+        found = False
+    if not found:
+        # The cached item has been deleted meanwhile
+        db.rollback()
+        nfc_tag_cache.invalidate(scan.tag_id)
+        raise HTTPException(status_code=404, detail="Item not found")
+    nfc_tag_cache.put(scan.tag_id, TagEntry(entry.item_id, status))
     return {
         "message": "Event recorded",
-        "item_id": item.id,
-        "item_status": item.status,
+        "item_id": entry.item_id,
+        "item_status": status,
     }
+
+
+class NFCScanSync(BaseModel):
+    scans: conlist(QueuedScan, max_items=SCAN_SYNC_MAX_SCANS)
+
+@router.post(
+    "/items/scan-nfc/sync/",
+    response_model=List[ScanSyncResult],
+    summary="Sync a handheld's queued NFC scans",
+    dependencies=[Depends(require_role(["admin", "operator"]))],
+)
+def sync_scans(
+    sync: NFCScanSync,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Record scans queued offline by a handheld, in the order they were
+    made, in a single transaction. Each scan keeps its client timestamp;
+    the result list says, per scan, whether its tag was found and the
+    item status after it. Unknown tags don't fail the other scans.
+    Only users with role 'admin' or 'operator' may call this.
+    """
+    return record_scans(db, sync.scans, user_id=current_user.id)
+
+
+@router.get("/items/nfc-cache/stats", summary="NFC tag cache statistics")
+def nfc_cache_stats():
+    """
+    Return size, hit/miss and eviction counters of the in-process NFC
+    tag cache used by the scan path.
+    """
+    return nfc_tag_cache.stats()
@@ -1,12 +1,33 @@
 # medassistant/backend/app/routes/sensors.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
 
-from app.db_session import get_db
-from app.schemas import SensorReadingCreate, SensorReadingResponse
-from app.services.sensor_service import ingest_and_check
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.auth_security import get_user_from_token, require_role
+from app.db_session import get_async_db
+from app.schemas import (
+    ReadingHistory,
+    ReadingStreamSummary,
+    SensorReadingCreate,
+    SensorReadingResponse,
+)
+from app.services.ingest_queue import INGEST_MODE, INGEST_RETRY_AFTER, ingest_queue
+from app.services.reading_query import (
+    BULK_DEFAULT_LIMIT,
+    BULK_MAX_LIMIT,
+    fetch_page,
+    pack_columns,
+    to_columns,
+)
+from app.services.reading_rollups import get_history
+from app.services.reading_stream import LineTooLong, ingest_stream
+from app.services.sensor_cache import sensor_cache
+from app.services.sensor_service import as_naive_utc, check_batch_off_loop, persist_batch, persist_reading
+from app.services.ws_ingest import active_connections, serve_gateway
 
 router = APIRouter(
     prefix="",
@@ -14,26 +35,240 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/sensors/readings/", response_model=SensorReadingResponse)
-def ingest_reading(
+# Ingest endpoints are async: the sync service code runs on the async
+# connection via run_sync, so waiting on the DB doesn't hold a threadpool worker.
+# Alert dispatch uses its own blocking session, so the threshold checks run
+# in the threadpool rather than on the event loop.
+@router.post(
+    "/sensors/readings/",
+    response_model=SensorReadingResponse,
+    responses={
+        202: {"description": "Reading queued (INGEST_MODE=queued)"},
+        503: {"description": "Ingest queue full; retry after Retry-After seconds"},
+    },
+)
+async def ingest_reading(
     reading_in: SensorReadingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Ingest a new sensor reading, persist it, update the sensor's last_ping,
     and trigger threshold-based alerts if the reading is out of range.
 
+    With INGEST_MODE=queued the reading is only validated and queued, and
+    202 is returned; a background flusher writes it in a group commit.
+
     - **sensor_id**: ID of the sensor sending the reading
     - **timestamp**: UTC timestamp of the reading
     - **value**: Measured value (e.g., temperature, humidity)
     """
+    if INGEST_MODE == "queued":
+        if not await db.run_sync(sensor_cache.get, reading_in.sensor_id):
+            raise HTTPException(status_code=404, detail="Sensor not found")
+        if not ingest_queue.submit(reading_in):
+            raise HTTPException(
+                status_code=503,
+                detail="Ingest queue full",
+                headers={"Retry-After": str(INGEST_RETRY_AFTER)},
+            )
+        return JSONResponse(
+            status_code=202,
+            content={"status": "queued", "queue_depth": ingest_queue.depth()},
+        )
+
     try:
-        reading = ingest_and_check(
-            db=db,
+        reading, sensor = await db.run_sync(
+            persist_reading,
             sensor_id=reading_in.sensor_id,
             timestamp=reading_in.timestamp,
             value=reading_in.value,
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    await check_batch_off_loop([reading], {reading.sensor_id: sensor})
     return reading
+
+
+@router.post("/sensors/readings/batch", response_model=List[SensorReadingResponse])
+async def ingest_readings_batch(
+    readings_in: List[SensorReadingCreate],
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ingest a batch of buffered sensor readings (e.g. from a gateway) in a
+    single transaction, update each sensor's last_ping, and trigger
+    threshold-based alerts for every out-of-range reading.
+
+    The whole batch is rejected with 404 if any reading references an
+    unknown sensor.
+    """
+    try:
+        rows, sensors = await db.run_sync(persist_batch, readings=readings_in)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    await check_batch_off_loop(rows, sensors)
+    return rows
+
+
+@router.post(
+    "/sensors/readings/stream",
+    response_model=ReadingStreamSummary,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        },
+    },
+)
+async def ingest_reading_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ingest a (chunked) upload of readings, e.g. a gateway's backlog after a
+    connectivity gap. The body is parsed incrementally and written in fixed
+    size chunks, so memory use does not depend on the upload size.
+
+    - **application/x-ndjson** (default): one SensorReadingCreate JSON object per line
+    - **text/csv**: header line `sensor_id,timestamp,value`, then one reading per line
+
+    Returns how many readings were accepted and rejected, and how many
+    threshold alerts they raised.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = "csv" if content_type.startswith("text/csv") else "ndjson"
+    try:
+        return await ingest_stream(db, request.stream(), fmt=fmt)
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.websocket("/sensors/readings/ws")
+async def ingest_reading_ws(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="JWT access token (or Authorization: Bearer header)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Persistent ingestion channel for gateways. Authenticate once with a JWT,
+    then stream readings as JSON messages (one reading or a list per
+    message); the server acknowledges them in batches.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            token = credentials
+    user = await db.run_sync(get_user_from_token, token) if token else None
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await serve_gateway(websocket, db, user.id)
+
+
+@router.get(
+    "/sensors/readings/bulk",
+    responses={200: {"content": {"application/octet-stream": {}}}},
+)
+async def get_readings_bulk(
+    sensor_ids: List[int] = Query(..., description="Sensors to read (repeat the parameter)"),
+    start: Optional[datetime] = Query(None, alias="from", description="Range start"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end, exclusive"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(BULK_DEFAULT_LIMIT, ge=1, le=BULK_MAX_LIMIT),
+    format: str = Query("json", regex="^(json|binary)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Page through raw readings of many sensors for analytics, ordered by
+    (sensor_id, timestamp). Pass the returned cursor to get the next page;
+    unlike OFFSET, each page costs the same however deep it is.
+
+    - **json**: `{"sensor_id": [...], "timestamp": [...], "value": [...], "count": n, "next_cursor": ...}`
+    - **binary**: packed little-endian arrays int32 sensor_id[n], int64
+      timestamp[n] (µs since epoch, UTC), float64 value[n]; the row count
+      and next cursor are in the X-Row-Count / X-Next-Cursor headers
+    """
+    start = as_naive_utc(start) if start else None
+    end = as_naive_utc(end) if end else None
+    try:
+        rows, next_cursor = await db.run_sync(fetch_page, sensor_ids, start, end, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "binary":
+        headers = {"X-Row-Count": str(len(rows))}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return Response(content=pack_columns(rows), media_type="application/octet-stream", headers=headers)
+    # Plain dicts/lists: no per-row model validation
+    return JSONResponse({**to_columns(rows), "count": len(rows), "next_cursor": next_cursor})
+
+
+@router.get("/sensors/{sensor_id}/readings", response_model=ReadingHistory)
+async def get_sensor_readings(
+    sensor_id: int,
+    start: Optional[datetime] = Query(None, alias="from", description="Range start (default: 24h before `to`)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end, exclusive (default: now)"),
+    resolution: str = Query("auto", regex="^(auto|raw|1m|1h|1d)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Return a sensor's readings in [from, to) for charting.
+
+    Long ranges are served from the 1m/1h/1d rollups (min/max/avg/count
+    per bucket) rather than raw readings; with resolution=auto the
+    cheapest one giving at most HISTORY_MAX_POINTS points is used, and
+    explicit resolutions giving more are refused.
+    """
+    end = as_naive_utc(end) if end else datetime.utcnow()
+    start = as_naive_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="`from` must be before `to`")
+    if not await db.run_sync(sensor_cache.get, sensor_id):
+        raise HTTPException(status_code=404, detail="Sensor not found")
+
+    try:
+        used, points = await db.run_sync(get_history, sensor_id, start, end, resolution)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {
+        "sensor_id": sensor_id,
+        "resolution": used,
+        "start": start,
+        "end": end,
+        "points": points,
+    }
+
+
+@router.get(
+    "/sensors/readings/ws/stats",
+    summary="Gateway WebSocket connection statistics",
+    dependencies=[Depends(require_role(["admin", "auditor"]))],
+)
+async def ingest_ws_stats():
+    """
+    Return per-connection throughput and acknowledgement/data lag of the
+    currently open gateway WebSocket connections.
+    """
+    return [conn.stats() for conn in active_connections.values()]
+
+
+@router.get("/sensors/readings/queue", summary="Queued ingestion statistics")
+async def ingest_queue_stats():
+    """
+    Return the ingest queue depth, flush latency and throughput counters.
+    """
+    return ingest_queue.stats()
+
+
+@router.get("/sensors/cache/stats", summary="Sensor metadata cache statistics")
+async def sensor_cache_stats():
+    """
+    Return size, hit/miss and eviction counters of the in-process sensor
+    metadata cache used by the ingest path.
+    """
+    return sensor_cache.stats()
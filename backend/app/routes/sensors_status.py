@@ -1,14 +1,17 @@
 # medassistant/backend/app/routes/sensors_status.py
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db_session import get_db
-from app.models import Sensor, SensorReading
+from app.db_session import get_async_db
+from app.models import Sensor, SensorLatest
 from app.schemas import SensorStatusItem
+from app.services.ping_buffer import ping_buffer
+from app.services.status_snapshot import etag_matches, status_snapshot
 
 router = APIRouter(
     prefix="",
@@ -20,32 +23,61 @@ router = APIRouter(
 OFFLINE_THRESHOLD = 10 * 60  # 10 minutes
 
 @router.get("/sensors/status/", response_model=List[SensorStatusItem])
-def get_sensors_status(db: Session = Depends(get_db)):
+async def get_sensors_status(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Return the latest status for each sensor, including:
     - current value (if any)
     - thresholds
     - last ping timestamp
     - overall status: "ok", "warning", "danger", or "offline"
+
+    The response is served from a shared snapshot and carries an ETag;
+    a poll with a matching If-None-Match gets 304 Not Modified.
+    """
+    cached = status_snapshot.current()
+    if cached is None:
+        version = status_snapshot.version
+        statuses, valid_for = await db.run_sync(_build_statuses)
+        cached = status_snapshot.store(statuses, version, valid_for)
+    body, etag = cached
+
+    # no-cache: browsers may keep the response but must revalidate it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _build_statuses(db: Session) -> Tuple[List[SensorStatusItem], Optional[float]]:
     """
-    sensors = db.query(Sensor).all()
+    Statuses of all sensors, and the seconds until the next sensor goes
+    offline if nothing else changes (None if every sensor is offline).
+    """
+    # Whole fleet with each sensor's latest value in one query
+    rows = (
+        db.query(Sensor, SensorLatest.value)
+          .outerjoin(SensorLatest, SensorLatest.sensor_id == Sensor.id)
+          .order_by(Sensor.id)
+          .all()
+    )
     now = datetime.utcnow()
     statuses: List[SensorStatusItem] = []
+    valid_for: Optional[float] = None
 
-    for sensor in sensors:
-        # Fetch latest reading if available
-        reading: Optional[SensorReading] = (
-            db.query(SensorReading)
-              .filter(SensorReading.sensor_id == sensor.id)
-              .order_by(SensorReading.timestamp.desc())
-              .first()
-        )
-        value = reading.value if reading else None
+    for sensor, value in rows:
+        # Include pings not yet flushed by the write-behind buffer
+        last_ping = ping_buffer.last_ping(sensor.id, sensor.last_ping)
+
+        # Seconds left before the sensor counts as offline
+        remaining = OFFLINE_THRESHOLD - (now - last_ping).total_seconds() if last_ping else -1.0
 
         # Determine status
         status: str
         # Check offline first
-        if not sensor.last_ping or (now - sensor.last_ping).total_seconds() > OFFLINE_THRESHOLD:
+        if remaining < 0:
             status = "offline"
         # Check thresholds
         elif sensor.threshold_min is not None and value is not None and value < sensor.threshold_min:
@@ -60,12 +92,15 @@ def get_sensors_status(db: Session = Depends(get_db)):
         else:
             status = "ok"
 
+        if status != "offline":
+            valid_for = remaining if valid_for is None else min(valid_for, remaining)
+
         statuses.append(
             SensorStatusItem(
                 sensor_id=sensor.id,
                 name=sensor.name,
                 type=sensor.type,
-                last_ping=sensor.last_ping,
+                last_ping=last_ping,
                 value=value,
                 threshold_min=sensor.threshold_min,
                 threshold_max=sensor.threshold_max,
@@ -73,4 +108,4 @@ def get_sensors_status(db: Session = Depends(get_db)):
             )
         )
 
-    return statuses
+    return statuses, valid_for
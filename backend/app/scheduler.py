@@ -5,21 +5,39 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
 from app.db_session import SessionLocal
-from app.models import Sensor, SensorReading
+from app.models import Sensor
 from app.services.alert_service import (
+    AlertBatch,
     detect_sensor_offline,
     detect_power_failure,
-    check_door_left_ajar,
-    check_item_expiry,
+    check_open_doors,
+    scan_item_expiry,
 )
 from app.services.alert_service import dispatch_alert
-from app.models import Item
+from app.services.dedupe_store import dedupe_store
+from app.services.door_state import get_open_doors
+from app.services.ping_buffer import ping_buffer, PING_FLUSH_INTERVAL
+from app.services.reading_rollups import (
+    backfill_rollups,
+    repair_rollups,
+    rollup_buffer,
+    ROLLUP_FLUSH_INTERVAL,
+    ROLLUP_REPAIR_INTERVAL,
+)
+from app.services.reading_partitions import (
+    apply_retention,
+    ensure_partitions,
+    is_partitioned,
+)
+from app.db_session import engine
 
 # Configure your schedules (in minutes)
 OFFLINE_CHECK_INTERVAL = 10
 POWER_CHECK_INTERVAL = 5
 DOOR_AJAR_CHECK_INTERVAL = 5
 EXPIRY_CHECK_INTERVAL = 60  # every hour
+READINGS_MAINTENANCE_INTERVAL = 24 * 60  # daily
+DEDUPE_EVICT_INTERVAL = 5
 
 # If you have a way to get gateway heartbeat times, replace this stub:
 def _get_gateway_status() -> dict[str, datetime]:
@@ -33,42 +51,91 @@ def _get_gateway_status() -> dict[str, datetime]:
         # Add more as needed...
     }
 
+def _report_alerts(job: str, written: int):
+    if written:
+        print(f"🚨 {job} wrote {written} alerts")
+
 def _job_detect_sensor_offline():
     db: Session = SessionLocal()
     try:
         sensors = db.query(Sensor).all()
-        detect_sensor_offline(sensors, offline_minutes=OFFLINE_CHECK_INTERVAL)
+        with AlertBatch(db) as batch:
+            detect_sensor_offline(sensors, offline_minutes=OFFLINE_CHECK_INTERVAL, sink=batch)
+    finally:
+        db.close()
+    _report_alerts("sensor_offline_check", batch.written)
+
+def _job_flush_sensor_pings():
+    db: Session = SessionLocal()
+    try:
+        ping_buffer.flush(db)
+    finally:
+        db.close()
+
+def _job_flush_reading_rollups():
+    db: Session = SessionLocal()
+    try:
+        rollup_buffer.flush(db)
+    finally:
+        db.close()
+
+def _job_backfill_reading_rollups():
+    db: Session = SessionLocal()
+    try:
+        rolled_up = backfill_rollups(db)
+    finally:
+        db.close()
+    if rolled_up:
+        print(f"📈 Built reading rollups from {rolled_up} readings")
+
+def _job_repair_reading_rollups():
+    db: Session = SessionLocal()
+    try:
+        repair_rollups(db)
     finally:
         db.close()
 
 def _job_detect_power_failure():
     gateway_status = _get_gateway_status()
-    detect_power_failure(gateway_status, power_timeout_minutes=POWER_CHECK_INTERVAL)
+    with AlertBatch() as batch:
+        detect_power_failure(gateway_status, power_timeout_minutes=POWER_CHECK_INTERVAL, sink=batch)
+    _report_alerts("power_failure_check", batch.written)
 
 def _job_check_door_left_ajar():
     db: Session = SessionLocal()
     try:
-        # Fetch all door-type sensor readings in the last X minutes
+        # Only doors open right now (maintained by ingest), not reading history
         cutoff = datetime.utcnow() - timedelta(minutes=DOOR_AJAR_CHECK_INTERVAL)
-        readings = (
-            db.query(SensorReading)
-            .join(Sensor, Sensor.id == SensorReading.sensor_id)
-            .filter(Sensor.type == "door")
-            .filter(SensorReading.timestamp <= cutoff)
-            .all()
-        )
-        check_door_left_ajar(readings, open_value=1.0, max_open_minutes=DOOR_AJAR_CHECK_INTERVAL)
+        open_doors = get_open_doors(db, opened_before=cutoff)
+        with AlertBatch(db) as batch:
+            check_open_doors(open_doors, max_open_minutes=DOOR_AJAR_CHECK_INTERVAL, sink=batch)
     finally:
         db.close()
+    _report_alerts("door_ajar_check", batch.written)
 
 def _job_check_item_expiry():
     db: Session = SessionLocal()
     try:
-        items = db.query(Item).all()
         # days_before= X can be parameterized; here 0 = expired or expiring today
-        check_item_expiry(items, days_before=0)
+        written = scan_item_expiry(db, days_before=0)
     finally:
         db.close()
+    _report_alerts("expiry_check", written)
+
+def _job_evict_dedupe_keys():
+    removed = dedupe_store.evict_expired()
+    if removed:
+        print(f"🧹 Alert dedupe store evicted {removed} expired keys")
+
+def _job_maintain_sensor_readings():
+    with engine.begin() as conn:
+        partitioned = is_partitioned(conn)
+        if partitioned:
+            ensure_partitions(conn)
+        removed = apply_retention(conn)
+    if removed:
+        print(f"🧹 Sensor readings retention removed {removed} "
+              f"{'partitions' if partitioned else 'rows'}")
 
 def start_scheduler():
     """
@@ -84,6 +151,36 @@ def start_scheduler():
         id="sensor_offline_check",
         replace_existing=True,
     )
+    # Write-behind flush of Sensor.last_ping
+    scheduler.add_job(
+        _job_flush_sensor_pings,
+        "interval",
+        seconds=PING_FLUSH_INTERVAL,
+        id="sensor_ping_flush",
+        replace_existing=True,
+    )
+    # Write-behind flush of the reading rollups
+    scheduler.add_job(
+        _job_flush_reading_rollups,
+        "interval",
+        seconds=ROLLUP_FLUSH_INTERVAL,
+        id="reading_rollup_flush",
+        replace_existing=True,
+    )
+    # Build the rollups once after upgrading (runs now, in the background)
+    scheduler.add_job(
+        _job_backfill_reading_rollups,
+        id="reading_rollup_backfill",
+        replace_existing=True,
+    )
+    # Rebuild recent rollups, repairing buckets whose flush was lost
+    scheduler.add_job(
+        _job_repair_reading_rollups,
+        "interval",
+        seconds=ROLLUP_REPAIR_INTERVAL,
+        id="reading_rollup_repair",
+        replace_existing=True,
+    )
     # Power failure check
     scheduler.add_job(
         _job_detect_power_failure,
@@ -109,6 +206,24 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # Expired alert dedupe keys
+    scheduler.add_job(
+        _job_evict_dedupe_keys,
+        "interval",
+        minutes=DEDUPE_EVICT_INTERVAL,
+        id="alert_dedupe_eviction",
+        replace_existing=True,
+    )
+
+    # sensor_readings partitions & retention
+    scheduler.add_job(
+        _job_maintain_sensor_readings,
+        "interval",
+        minutes=READINGS_MAINTENANCE_INTERVAL,
+        id="sensor_readings_maintenance",
+        replace_existing=True,
+    )
+
     scheduler.start()
     print("🔔 Scheduler started with jobs: ",
           [job.id for job in scheduler.get_jobs()])
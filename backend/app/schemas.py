@@ -2,6 +2,7 @@ from datetime import datetime, date
 from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr
+from pydantic.utils import GetterDict
 
 
 # ------------------------
@@ -54,6 +55,14 @@ class EventCreate(BaseModel):
     metadata: Optional[str] = None
 
 
+class _EventGetter(GetterDict):
+    # Event stores "metadata" as `metadata_` (reserved name on ORM classes)
+    def get(self, key, default=None):
+        if key == "metadata":
+            key = "metadata_"
+        return super().get(key, default)
+
+
 class EventResponse(BaseModel):
     id: int
     item_id: int
@@ -64,6 +73,7 @@ class EventResponse(BaseModel):
 
     class Config:
         orm_mode = True
+        getter_dict = _EventGetter
 
 
 class ItemCreate(BaseModel):
@@ -81,13 +91,27 @@ class ItemResponse(BaseModel):
     batch: str
     expiry_date: date
     status: str
-    location: LocationResponse
-    events: Optional[List[EventResponse]] = []
+    # only the relationships asked for with include= (GET /items/)
+    location: Optional[LocationResponse] = None
+    events: Optional[List[EventResponse]] = None
 
     class Config:
         orm_mode = True
 
 
+class QueuedScan(BaseModel):
+    tag_id: str
+    event_type: str  # "entry" or "exit"
+    timestamp: datetime  # when the handheld read the tag
+
+
+class ScanSyncResult(BaseModel):
+    tag_id: str
+    status: str  # "recorded" or "not_found"
+    item_id: Optional[int]
+    item_status: Optional[str]  # item status after this scan
+
+
 # ------------------------
 # Sensor & Reading schemas
 # ------------------------
@@ -107,6 +131,29 @@ class SensorReadingResponse(BaseModel):
         orm_mode = True
 
 
+class ReadingStreamSummary(BaseModel):
+    accepted: int = 0
+    rejected: int = 0
+    alerts: int = 0
+    errors: List[str] = []  # first few rejection reasons, "line N: ..."
+
+
+class ReadingHistoryPoint(BaseModel):
+    timestamp: datetime  # reading time, or bucket start for rollups
+    min: float
+    max: float
+    avg: float
+    count: int
+
+
+class ReadingHistory(BaseModel):
+    sensor_id: int
+    resolution: str  # "raw", "1m", "1h", "1d"
+    start: datetime
+    end: datetime
+    points: List[ReadingHistoryPoint]
+
+
 class SensorStatusItem(BaseModel):
     sensor_id: int
     name: str
@@ -137,3 +184,11 @@ class AlertResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class AlertBulkResolve(BaseModel):
+    # Criteria are combined; at least one is required
+    ids: Optional[List[int]] = None
+    category: Optional[str] = None
+    sensor_id: Optional[int] = None
+    before: Optional[datetime] = None  # raised before this time
@@ -0,0 +1,143 @@
+# medassistant/backend/app/services/alert_query.py
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models import Alert, Item, Sensor
+from app.services import keyset
+
+# Alerts per page of GET /alerts/
+ALERTS_DEFAULT_LIMIT = 100
+ALERTS_MAX_LIMIT = 1000
+
+
+class AlertFilters(NamedTuple):
+    """
+    Filters shared by the alert listing and its summary.
+    """
+    active_only: bool = True
+    severity: Optional[str] = None
+    category: Optional[str] = None
+    sensor_id: Optional[int] = None
+    location_id: Optional[int] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+def encode_alert_cursor(alert: Alert) -> str:
+    return keyset.encode_cursor(keyset.to_micros(alert.timestamp), alert.id)
+
+
+def decode_alert_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    (timestamp, id) of the last alert of the previous page; raises
+    ValueError if the cursor is malformed.
+    """
+    try:
+        micros, alert_id = (int(part) for part in keyset.decode_cursor(cursor, 2))
+        # A forged timestamp can be out of datetime's range
+        return keyset.from_micros(micros), alert_id
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def _apply_filters(stmt, filters: AlertFilters):
+    if filters.active_only:
+        stmt = stmt.where(Alert.resolved == False)  # noqa: E712
+    if filters.severity is not None:
+        stmt = stmt.where(Alert.severity == filters.severity)
+    if filters.category is not None:
+        stmt = stmt.where(Alert.category == filters.category)
+    if filters.sensor_id is not None:
+        stmt = stmt.where(Alert.sensor_id == filters.sensor_id)
+    if filters.location_id is not None:
+        # An alert is at a location through its sensor or its item
+        stmt = stmt.where(or_(
+            Alert.sensor_id.in_(select(Sensor.id).where(Sensor.location_id == filters.location_id)),
+            Alert.related_item_id.in_(select(Item.id).where(Item.location_id == filters.location_id)),
+        ))
+    if filters.start is not None:
+        stmt = stmt.where(Alert.timestamp >= filters.start)
+    if filters.end is not None:
+        stmt = stmt.where(Alert.timestamp < filters.end)
+    return stmt
+
+
+def get_alerts_page(
+    db: Session,
+    filters: AlertFilters = AlertFilters(),
+    limit: int = ALERTS_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Alert], Optional[str]]:
+    """
+    One page of alerts matching `filters`, newest first, continuing after
+    `cursor`. Returns the alerts and the cursor of the next page (None on
+    the last page).
+
+    Pages are keyset-paginated on (timestamp, id), served by the
+    (resolved, timestamp, id) / (sensor_id, timestamp, id) / (timestamp, id)
+    indexes on alerts.
+    """
+    stmt = _apply_filters(select(Alert), filters)
+    if cursor:
+        stmt = stmt.where(tuple_(Alert.timestamp, Alert.id) < decode_alert_cursor(cursor))
+    # One extra row tells whether there is a next page
+    stmt = stmt.order_by(Alert.timestamp.desc(), Alert.id.desc()).limit(limit + 1)
+    alerts = db.scalars(stmt).all()
+
+    if len(alerts) > limit:
+        alerts = alerts[:limit]
+        return alerts, encode_alert_cursor(alerts[-1])
+    return alerts, None
+
+
+def get_alert_summary(db: Session, filters: AlertFilters = AlertFilters()) -> dict:
+    """
+    Counts of the alerts matching `filters`, in total and by severity and
+    category, from a single grouped query (no rows are loaded).
+    """
+    stmt = _apply_filters(
+        select(Alert.severity, Alert.category, func.count()).group_by(Alert.severity, Alert.category),
+        filters,
+    )
+    summary = {"total": 0, "by_severity": {}, "by_category": {}}
+    for severity, category, count in db.execute(stmt):
+        summary["total"] += count
+        summary["by_severity"][severity] = summary["by_severity"].get(severity, 0) + count
+        summary["by_category"][category] = summary["by_category"].get(category, 0) + count
+    return summary
+
+
+def resolve_alerts(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    category: Optional[str] = None,
+    sensor_id: Optional[int] = None,
+    before: Optional[datetime] = None,
+) -> List[Alert]:
+    """
+    Resolve every unresolved alert matching all the given criteria with a
+    single UPDATE ... RETURNING, and return the resolved alerts. Raises
+    ValueError if no criterion is given.
+    """
+    if ids is None and category is None and sensor_id is None and before is None:
+        raise ValueError("Give ids or at least one filter")
+    stmt = update(Alert).where(Alert.resolved == False)  # noqa: E712
+    if ids is not None:
+        stmt = stmt.where(Alert.id.in_(ids))
+    if category is not None:
+        stmt = stmt.where(Alert.category == category)
+    if sensor_id is not None:
+        stmt = stmt.where(Alert.sensor_id == sensor_id)
+    if before is not None:
+        stmt = stmt.where(Alert.timestamp < before)
+    stmt = stmt.values(resolved=True, resolved_at=datetime.utcnow()).returning(Alert)
+    alerts = db.scalars(stmt, execution_options={"synchronize_session": False}).all()
+    # Detach the returned rows so commit doesn't expire them; otherwise
+    # serialization would reload them one by one
+    for alert in alerts:
+        db.expunge(alert)
+    db.commit()
+    return alerts
@@ -1,12 +1,13 @@
 # medassistant/backend/app/services/alert_service.py
-import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.orm import Session
-from app.models import Alert, Sensor, SensorReading, Item, Event
+from app.models import Alert, DoorOpenState, Sensor, SensorReading, Item, Event
 from app.db_session import SessionLocal
+from app.services.dedupe_store import dedupe_store
+from app.services.notifier import notifier
+from app.services.ping_buffer import ping_buffer
 
-# In-memory dedupe cache: key → timestamp of last sent
-_last_sent: dict[str, float] = {}
 
 # Configuration of alert types → severity & channels
 ALERT_CONFIG: dict[str, dict] = {
@@ -20,22 +21,40 @@ ALERT_CONFIG: dict[str, dict] = {
 }
 
 DEDUPE_TTL = 3600  # seconds: don’t re-send same alert key within this window
+# Items read per query by the set-based expiry scan
+EXPIRY_SCAN_CHUNK_SIZE = 1000
 
 def should_send(key: str, ttl: int = DEDUPE_TTL) -> bool:
-    now = time.time()
-    last = _last_sent.get(key, 0)
-    if now - last > ttl:
-        _last_sent[key] = now
-        return True
-    return False
+    # Atomic check-and-record in the configured store (memory or shared)
+    return dedupe_store.claim(key, ttl)
+
+def release_send(key: str):
+    # Undo should_send() for an alert that was not written after all
+    dedupe_store.release(key)
+
+def should_send_many(keys: list[str], ttl: int = DEDUPE_TTL) -> set[str]:
+    # should_send() for many keys in one round trip; returns those to send
+    return dedupe_store.claim_many(keys, ttl)
+
+def release_sends(keys: set[str]):
+    dedupe_store.release_many(keys)
 
 def _send_notifications(channels: list[str], message: str):
     """
-    Stub: integrate with real email/SMS/Webhook services here.
+    Queue the notifications; the notifier's per-channel workers deliver
+    them (see services/notifier.py), so callers never wait on delivery.
     """
-    # e.g., send via SendGrid, Twilio, HTTP POST to webhook URL…
     for ch in channels:
-        print(f"[notify:{ch}] {message}")
+        notifier.enqueue(ch, message)
+
+def _alert_config(category: str) -> dict:
+    cfg = ALERT_CONFIG.get(category)
+    if not cfg:
+        raise ValueError(f"Unknown alert category '{category}'")
+    return cfg
+
+def _dedupe_key(category: str, related_item_id: int | None, sensor_id: int | None) -> str:
+    return f"{category}:{related_item_id or ''}:{sensor_id or ''}"
 
 def dispatch_alert(
     category: str,
@@ -46,12 +65,8 @@ def dispatch_alert(
     """
     Create an Alert record (if not deduped) and send notifications.
     """
-    cfg = ALERT_CONFIG.get(category)
-    if not cfg:
-        raise ValueError(f"Unknown alert category '{category}'")
-
-    key = f"{category}:{related_item_id or ''}:{sensor_id or ''}"
-    if not should_send(key):
+    cfg = _alert_config(category)
+    if not should_send(_dedupe_key(category, related_item_id, sensor_id)):
         # skip duplicate
         return None  # or retrieve existing alert if needed
 
@@ -75,63 +90,235 @@ def dispatch_alert(
     db.close()
     return alert
 
+class AlertBatch:
+    """
+    Alert sink that collects alerts and persists them with one bulk
+    INSERT per flush, in one session, instead of a session and commit per
+    alert like dispatch_alert. Dedupe, severity and notifications are the
+    same as dispatch_alert's; notifications go out after the commit.
+
+        with AlertBatch() as batch:
+            detect_sensor_offline(sensors, sink=batch)
+        print(batch.written)
+
+    Uses `db` if given (the caller owns it), else a SessionLocal per flush.
+    The dedupe keys of a flush are claimed together, right before its
+    INSERT; if that fails they are released, so the alerts can be raised
+    again by the next run. Alerts queued before the rule raises are still
+    flushed on the way out of the `with` block.
+    """
+
+    def __init__(self, db: Session | None = None):
+        self._db = db
+        self._pending: dict[str, dict] = {}  # dedupe key -> alert row
+        self.written = 0
+
+    def add(
+        self,
+        category: str,
+        message: str,
+        related_item_id: int | None = None,
+        sensor_id: int | None = None
+    ) -> bool:
+        """
+        Queue an alert; returns False if one with the same dedupe key is
+        already queued. Alerts sent recently are dropped by flush().
+        """
+        cfg = _alert_config(category)
+        key = _dedupe_key(category, related_item_id, sensor_id)
+        if key in self._pending:
+            return False
+        self._pending[key] = {
+            "category": category,
+            "related_item_id": related_item_id,
+            "sensor_id": sensor_id,
+            "timestamp": datetime.utcnow(),
+            "message": message,
+            "severity": cfg["severity"],
+            "resolved": False,
+        }
+        return True
+
+    def flush(self) -> int:
+        """
+        Insert the queued alerts that aren't duplicates of recent ones and
+        send their notifications. Returns the number of alerts written.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        claimed = should_send_many(list(pending))
+        rows = [row for key, row in pending.items() if key in claimed]
+        if not rows:
+            return 0
+        db = self._db or SessionLocal()
+        try:
+            db.execute(insert(Alert), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            release_sends(claimed)
+            raise
+        finally:
+            if self._db is None:
+                db.close()
+        for row in rows:
+            _send_notifications(ALERT_CONFIG[row["category"]]["channels"], row["message"])
+        self.written += len(rows)
+        return len(rows)
+
+    def __enter__(self) -> "AlertBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+            return
+        # Keep what the rule raised before failing; its own error propagates
+        pending = len(self._pending)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[alerts] dropped {pending} alerts queued before a rule error: {e}")
+
+
 # ----- Rule implementations -----
 
+def check_and_send_alert(
+    sensor: Sensor,
+    reading: SensorReading,
+    alert_type: str
+):
+    """
+    Raise a threshold alert ("below_threshold" / "above_threshold")
+    for a reading that fell outside the sensor's configured range.
+    """
+    if alert_type == "below_threshold":
+        limit = f"below minimum {sensor.threshold_min}"
+    else:
+        limit = f"above maximum {sensor.threshold_max}"
+    msg = (
+        f"Sensor '{sensor.name}' (ID {sensor.id}) read {reading.value} "
+        f"at {reading.timestamp}, {limit}"
+    )
+    return dispatch_alert(category=alert_type, message=msg, sensor_id=sensor.id)
+
+def _expiry_message(item_id: int, name: str, expiry_date: date, today: date) -> str:
+    if expiry_date < today:
+        return f"Item #{item_id} ('{name}') expired on {expiry_date}"
+    return f"Item #{item_id} ('{name}') will expire on {expiry_date}"
+
 def check_item_expiry(
     items: list[Item],
-    days_before: int = 0
+    days_before: int = 0,
+    sink: AlertBatch | None = None
 ):
     """
     For each item, if expiry_date <= today + days_before, raise expiry_risk.
+    Alerts go to `sink` if given, else through dispatch_alert one by one.
     """
+    emit = sink.add if sink is not None else dispatch_alert
     today = datetime.utcnow().date()
     threshold = today + timedelta(days=days_before)
     for item in items:
         if item.expiry_date <= threshold:
-            msg = (
-                f"Item #{item.id} ('{item.name}') expired on {item.expiry_date}"
-                if item.expiry_date < today
-                else f"Item #{item.id} ('{item.name}') will expire on {item.expiry_date}"
-            )
-            dispatch_alert("expiry_risk", msg, related_item_id=item.id)
+            msg = _expiry_message(item.id, item.name, item.expiry_date, today)
+            emit(category="expiry_risk", message=msg, related_item_id=item.id)
+
+def scan_item_expiry(
+    db: Session,
+    days_before: int = 0,
+    chunk_size: int = EXPIRY_SCAN_CHUNK_SIZE
+) -> int:
+    """
+    Set-based check_item_expiry over the whole inventory: only items with
+    expiry_date <= today + days_before are read, chunk_size at a time in
+    (expiry_date, id) order (a range scan of ix_items_expiry_date_id), and
+    each chunk's expiry_risk alerts are inserted with one statement.
+    Returns the number of alerts written.
+    """
+    today = datetime.utcnow().date()
+    threshold = today + timedelta(days=days_before)
+    batch = AlertBatch(db)
+    after = None
+    while True:
+        stmt = select(Item.id, Item.name, Item.expiry_date).where(Item.expiry_date <= threshold)
+        if after is not None:
+            stmt = stmt.where(tuple_(Item.expiry_date, Item.id) > after)
+        rows = db.execute(stmt.order_by(Item.expiry_date, Item.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        after = (rows[-1].expiry_date, rows[-1].id)
+        for item_id, name, expiry_date in rows:
+            msg = _expiry_message(item_id, name, expiry_date, today)
+            batch.add(category="expiry_risk", message=msg, related_item_id=item_id)
+        batch.flush()
+        if len(rows) < chunk_size:
+            break
+    return batch.written
 
 def detect_sensor_offline(
     sensors: list[Sensor],
-    offline_minutes: int = 10
+    offline_minutes: int = 10,
+    sink: AlertBatch | None = None
 ):
     """
     If a sensor’s last_ping is older than X minutes, alert.
+    Pings still waiting in the write-behind buffer count as seen.
     """
+    emit = sink.add if sink is not None else dispatch_alert
     cutoff = datetime.utcnow() - timedelta(minutes=offline_minutes)
     for sensor in sensors:
-        if not sensor.last_ping or sensor.last_ping < cutoff:
-            msg = f"Sensor '{sensor.name}' (ID {sensor.id}) offline since {sensor.last_ping}"
-            dispatch_alert("sensor_offline", msg, sensor_id=sensor.id)
+        last_ping = ping_buffer.last_ping(sensor.id, sensor.last_ping)
+        if not last_ping or last_ping < cutoff:
+            msg = f"Sensor '{sensor.name}' (ID {sensor.id}) offline since {last_ping}"
+            emit(category="sensor_offline", message=msg, sensor_id=sensor.id)
 
 def detect_power_failure(
     gateway_status: dict[str, datetime],
-    power_timeout_minutes: int = 5
+    power_timeout_minutes: int = 5,
+    sink: AlertBatch | None = None
 ):
     """
     gateway_status: mapping gateway_id → last_heartbeat datetime
     """
+    emit = sink.add if sink is not None else dispatch_alert
     cutoff = datetime.utcnow() - timedelta(minutes=power_timeout_minutes)
     for gw_id, last in gateway_status.items():
         if last < cutoff:
             msg = f"Gateway '{gw_id}' lost power since {last}"
-            dispatch_alert("power_failure", msg)
+            emit(category="power_failure", message=msg)
 
 def check_door_left_ajar(
     readings: list[SensorReading],
     open_value: float = 1.0,
-    max_open_minutes: int = 5
+    max_open_minutes: int = 5,
+    sink: AlertBatch | None = None
 ):
     """
     For door sensors, if a reading indicates 'open' and has
     not changed for more than max_open_minutes, alert.
     """
+    emit = sink.add if sink is not None else dispatch_alert
     cutoff = datetime.utcnow() - timedelta(minutes=max_open_minutes)
     for r in readings:
         if r.value == open_value and r.timestamp < cutoff:
             msg = f"Door sensor {r.sensor_id} has been open since {r.timestamp}"
-            dispatch_alert("door_left_ajar", msg, sensor_id=r.sensor_id)
+            emit(category="door_left_ajar", message=msg, sensor_id=r.sensor_id)
+
+def check_open_doors(
+    open_doors: list[DoorOpenState],
+    max_open_minutes: int = 5,
+    sink: AlertBatch | None = None
+):
+    """
+    Incremental counterpart of check_door_left_ajar: given the currently
+    open doors (door_open_states), alert for those open for more than
+    max_open_minutes.
+    """
+    emit = sink.add if sink is not None else dispatch_alert
+    cutoff = datetime.utcnow() - timedelta(minutes=max_open_minutes)
+    for door in open_doors:
+        if door.open_since < cutoff:
+            msg = f"Door sensor {door.sensor_id} has been open since {door.open_since}"
+            emit(category="door_left_ajar", message=msg, sensor_id=door.sensor_id)
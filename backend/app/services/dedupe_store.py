@@ -0,0 +1,197 @@
+# medassistant/backend/app/services/dedupe_store.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional, Set
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from app.db_session import engine
+from app.models import AlertDedupe
+
+# "memory": per-process store; "database": shared by every worker/node
+# using the same database (or the same ALERT_DEDUPE_URL file)
+ALERT_DEDUPE_BACKEND = os.getenv("ALERT_DEDUPE_BACKEND", "memory")
+# Database of the shared store (default: DATABASE_URL); e.g. a node-local
+# "sqlite:////var/lib/medassistant/dedupe.db" for the workers of one node
+ALERT_DEDUPE_URL = os.getenv("ALERT_DEDUPE_URL")
+# Maximum number of keys the memory store holds (least recently sent go first)
+ALERT_DEDUPE_MAX_SIZE = int(os.getenv("ALERT_DEDUPE_MAX_SIZE", "100000"))
+# Keys not sent for this long are evicted (seconds); the longest dedupe TTL in use
+ALERT_DEDUPE_RETENTION = float(os.getenv("ALERT_DEDUPE_RETENTION", "3600"))
+
+
+class MemoryDedupeStore:
+    """
+    Bounded, thread-safe dedupe store for a single process: key → time
+    last sent, in send order, so both the LRU bound and the expiry sweep
+    only ever look at the oldest keys.
+    """
+
+    def __init__(
+        self,
+        max_size: int = ALERT_DEDUPE_MAX_SIZE,
+        retention: float = ALERT_DEDUPE_RETENTION,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = max_size
+        self.retention = retention
+        self._clock = clock
+        self._sent: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def claim(self, key: str, ttl: float) -> bool:
+        """
+        True (and record the send) if `key` wasn't sent in the last `ttl`
+        seconds; False if it was, i.e. this is a duplicate.
+        """
+        return key in self.claim_many([key], ttl)
+
+    def claim_many(self, keys: Iterable[str], ttl: float) -> Set[str]:
+        """
+        claim() for several keys at once; returns the ones claimed.
+        """
+        now = self._clock()
+        claimed = set()
+        with self._lock:
+            for key in keys:
+                last = self._sent.get(key)
+                if last is not None and now - last <= ttl:
+                    continue
+                self._sent[key] = now
+                self._sent.move_to_end(key)
+                claimed.add(key)
+            while len(self._sent) > self.max_size:
+                self._sent.popitem(last=False)
+                self.evictions += 1
+        return claimed
+
+    def release(self, key: str):
+        """
+        Forget a claim whose alert could not be written, so it isn't
+        suppressed as a duplicate.
+        """
+        self.release_many([key])
+
+    def release_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._sent.pop(key, None)
+
+    def evict_expired(self) -> int:
+        """
+        Drop keys last sent more than `retention` seconds ago.
+        """
+        cutoff = self._clock() - self.retention
+        removed = 0
+        with self._lock:
+            while self._sent:
+                key, sent_at = next(iter(self._sent.items()))
+                if sent_at >= cutoff:
+                    break
+                del self._sent[key]
+                removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._sent.clear()
+
+
+class DatabaseDedupeStore:
+    """
+    Dedupe store in the alert_dedupe table, shared by every process using
+    the same database. A claim is one atomic upsert on the key's primary
+    key, so concurrent workers can't both send the same alert.
+    """
+
+    def __init__(self, engine: Engine, retention: float = ALERT_DEDUPE_RETENTION):
+        self.engine = engine
+        self.retention = retention
+        self._table_ready = False
+
+    def _ensure_table(self):
+        # The main database gets it from create_tables(); a separate
+        # ALERT_DEDUPE_URL store is created on first use
+        if not self._table_ready:
+            AlertDedupe.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def claim(self, key: str, ttl: float) -> bool:
+        """
+        True (and record the send) if `key` wasn't sent in the last `ttl`
+        seconds; False if it was, i.e. this is a duplicate.
+        """
+        return key in self.claim_many([key], ttl)
+
+    def claim_many(self, keys: Iterable[str], ttl: float) -> Set[str]:
+        """
+        claim() for several keys with one multi-row upsert; returns the
+        ones claimed.
+        """
+        # Each key once (a row can't be upserted twice by one statement),
+        # sorted so concurrent claims lock rows in the same order
+        keys = sorted(set(keys))
+        if not keys:
+            return set()
+        self._ensure_table()
+        now = datetime.utcnow()
+        dialect_insert = pg_insert if self.engine.dialect.name == "postgresql" else sqlite_insert
+        stmt = dialect_insert(AlertDedupe).values([{"key": key, "sent_at": now} for key in keys])
+        # Only rows that are inserted, or updated because they are stale, come back
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AlertDedupe.key],
+            set_={"sent_at": stmt.excluded.sent_at},
+            where=AlertDedupe.sent_at < now - timedelta(seconds=ttl),
+        ).returning(AlertDedupe.key)
+        with self.engine.begin() as conn:
+            return set(conn.execute(stmt).scalars())
+
+    def release(self, key: str):
+        """
+        Forget a claim whose alert could not be written, so it isn't
+        suppressed as a duplicate.
+        """
+        self.release_many([key])
+
+    def release_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(delete(AlertDedupe).where(AlertDedupe.key.in_(keys)))
+
+    def evict_expired(self) -> int:
+        """
+        Delete keys last sent more than `retention` seconds ago.
+        """
+        self._ensure_table()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        with self.engine.begin() as conn:
+            return conn.execute(delete(AlertDedupe).where(AlertDedupe.sent_at < cutoff)).rowcount
+
+    def clear(self):
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(delete(AlertDedupe))
+
+
+def make_dedupe_store(backend: str = ALERT_DEDUPE_BACKEND, url: Optional[str] = ALERT_DEDUPE_URL):
+    """
+    The dedupe store selected by ALERT_DEDUPE_BACKEND / ALERT_DEDUPE_URL.
+    """
+    if backend == "memory":
+        return MemoryDedupeStore()
+    if backend == "database":
+        return DatabaseDedupeStore(create_engine(url, pool_pre_ping=True) if url else engine)
+    raise ValueError(f"Unknown ALERT_DEDUPE_BACKEND '{backend}'")
+
+
+dedupe_store = make_dedupe_store()
@@ -0,0 +1,108 @@
+# medassistant/backend/app/services/door_state.py
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import DoorOpenState, Sensor, SensorLatest, SensorReading
+from app.services.sensor_cache import SensorMeta
+
+# Reading value of a door sensor that means "open" (anything else is closed)
+DOOR_OPEN_VALUE = 1.0
+
+
+def update_door_states(db: Session, readings: list, sensors: Dict[int, SensorMeta]):
+    """
+    Apply the open/close transitions in `readings` (stored SensorReading
+    rows, naive UTC) of door sensors to door_open_states, in the
+    caller's transaction. Non-door readings cost nothing.
+
+    A close removes the state unless the door was opened after it (late
+    readings); an open after the batch's last close records open_since
+    unless the door is already known to be open. A late open that is not
+    newer than the door's latest reading, if that is a close, is ignored.
+    Expects sensor_latest to already include `readings`.
+    """
+    last_close: Dict[int, datetime] = {}
+    opens: Dict[int, List[datetime]] = {}
+    for r in readings:
+        if sensors[r.sensor_id].type != "door":
+            continue
+        if r.value == DOOR_OPEN_VALUE:
+            opens.setdefault(r.sensor_id, []).append(r.timestamp)
+        elif r.sensor_id not in last_close or r.timestamp > last_close[r.sensor_id]:
+            last_close[r.sensor_id] = r.timestamp
+    if not opens and not last_close:
+        return
+
+    if last_close:
+        db.execute(delete(DoorOpenState).where(or_(*(
+            and_(DoorOpenState.sensor_id == sensor_id, DoorOpenState.open_since <= closed_at)
+            for sensor_id, closed_at in last_close.items()
+        ))))
+
+    open_since = {}
+    for sensor_id, times in opens.items():
+        after_close = [ts for ts in times if sensor_id not in last_close or ts > last_close[sensor_id]]
+        if after_close:
+            open_since[sensor_id] = min(after_close)
+    if open_since:
+        # Closed since: sensor_latest holds a newer (or equally old) close
+        for sensor_id, value, ts in db.execute(
+            select(SensorLatest.sensor_id, SensorLatest.value, SensorLatest.timestamp)
+            .where(SensorLatest.sensor_id.in_(open_since))
+        ):
+            if value != DOOR_OPEN_VALUE and ts >= open_since[sensor_id]:
+                del open_since[sensor_id]
+    if open_since:
+        dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        db.execute(
+            dialect_insert(DoorOpenState)
+            .values([{"sensor_id": s, "open_since": ts} for s, ts in open_since.items()])
+            .on_conflict_do_nothing(index_elements=[DoorOpenState.sensor_id])
+        )
+
+
+def get_open_doors(db: Session, opened_before: datetime) -> List[DoorOpenState]:
+    """
+    Door sensors open since before `opened_before`; reads only the rows of
+    currently open doors.
+    """
+    return (
+        db.query(DoorOpenState)
+        .filter(DoorOpenState.open_since < opened_before)
+        .order_by(DoorOpenState.sensor_id)
+        .all()
+    )
+
+
+def backfill_door_states(db: Session) -> int:
+    """
+    Derive door_open_states for doors whose latest reading is "open" but
+    that have no state yet (first start after upgrading): open since the
+    first open reading after their last close (or their latest reading,
+    if retention removed those). Returns the number of doors filled in.
+    """
+    open_doors = db.execute(
+        select(SensorLatest.sensor_id, SensorLatest.timestamp)
+        .join(Sensor, Sensor.id == SensorLatest.sensor_id)
+        .outerjoin(DoorOpenState, DoorOpenState.sensor_id == SensorLatest.sensor_id)
+        .where(Sensor.type == "door", SensorLatest.value == DOOR_OPEN_VALUE)
+        .where(DoorOpenState.sensor_id.is_(None))
+    ).all()
+    for sensor_id, latest in open_doors:
+        last_close = db.scalar(
+            select(func.max(SensorReading.timestamp))
+            .where(SensorReading.sensor_id == sensor_id, SensorReading.value != DOOR_OPEN_VALUE)
+        )
+        stmt = select(func.min(SensorReading.timestamp)).where(
+            SensorReading.sensor_id == sensor_id, SensorReading.value == DOOR_OPEN_VALUE
+        )
+        if last_close is not None:
+            stmt = stmt.where(SensorReading.timestamp > last_close)
+        db.add(DoorOpenState(sensor_id=sensor_id, open_since=db.scalar(stmt) or latest))
+    db.commit()
+    return len(open_doors)
@@ -0,0 +1,179 @@
+# medassistant/backend/app/services/exports.py
+import csv
+import io
+import os
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Event, Item, Sensor, SensorReading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows fetched from the server-side cursor (and written) at a time
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+# Export columns and their Parquet (Arrow) types
+READING_COLUMNS = [
+    ("sensor_id", "int32"),
+    ("sensor_name", "string"),
+    ("location_id", "int32"),
+    ("timestamp", "timestamp[us]"),
+    ("value", "double"),
+]
+EVENT_COLUMNS = [
+    ("event_id", "int64"),
+    ("item_id", "int64"),
+    ("nfc_tag", "string"),
+    ("item_name", "string"),
+    ("batch", "string"),
+    ("location_id", "int64"),
+    ("event_type", "string"),
+    ("timestamp", "timestamp[us]"),
+    ("user_id", "int64"),
+    ("metadata", "string"),
+]
+
+Columns = List[Tuple[str, str]]
+
+
+async def iter_readings(
+    db: AsyncSession,
+    location_id: Optional[int] = None,
+    sensor_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> AsyncIterator[List[tuple]]:
+    """
+    Readings matching the filters in chunks of EXPORT_CHUNK_SIZE rows
+    (READING_COLUMNS), by sensor and then time.
+
+    Each sensor is streamed from its own server-side cursor over the
+    (sensor_id, timestamp) index, so rows flow out without a sort of the
+    whole result.
+    """
+    sensors = select(Sensor.id, Sensor.name, Sensor.location_id).order_by(Sensor.id)
+    if location_id is not None:
+        sensors = sensors.where(Sensor.location_id == location_id)
+    if sensor_id is not None:
+        sensors = sensors.where(Sensor.id == sensor_id)
+
+    for sid, name, loc in (await db.execute(sensors)).all():
+        stmt = (
+            select(SensorReading.timestamp, SensorReading.value)
+            .where(SensorReading.sensor_id == sid)
+            .order_by(SensorReading.timestamp)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        if start is not None:
+            stmt = stmt.where(SensorReading.timestamp >= start)
+        if end is not None:
+            stmt = stmt.where(SensorReading.timestamp < end)
+        result = await db.stream(stmt)
+        async for chunk in result.partitions():
+            yield [(sid, name, loc, ts, value) for ts, value in chunk]
+
+
+async def iter_events(
+    db: AsyncSession,
+    batch: Optional[str] = None,
+    location_id: Optional[int] = None,
+    item_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> AsyncIterator[List[tuple]]:
+    """
+    Events (with their item) matching the filters in chunks of
+    EXPORT_CHUNK_SIZE rows (EVENT_COLUMNS), in event id order, from a
+    server-side cursor.
+    """
+    stmt = (
+        select(
+            Event.id, Event.item_id, Item.nfc_tag, Item.name, Item.batch, Item.location_id,
+            Event.event_type, Event.timestamp, Event.user_id, Event.metadata_,
+        )
+        .join(Item, Item.id == Event.item_id)
+        .order_by(Event.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if batch is not None:
+        stmt = stmt.where(Item.batch == batch)
+    if location_id is not None:
+        stmt = stmt.where(Item.location_id == location_id)
+    if item_id is not None:
+        stmt = stmt.where(Event.item_id == item_id)
+    if start is not None:
+        stmt = stmt.where(Event.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(Event.timestamp < end)
+
+    result = await db.stream(stmt)
+    async for chunk in result.partitions():
+        yield [tuple(row) for row in chunk]
+
+
+async def to_csv(columns: Columns, chunks: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    """
+    Encode row chunks as CSV, one piece per chunk (the header goes out first).
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([name for name, _ in columns])
+    yield buf.getvalue().encode()
+    async for rows in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buf.getvalue().encode()
+
+
+class _Sink:
+    """
+    Write-only file collecting what the Parquet writer produces until it
+    is drained into the response.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+async def to_parquet(columns: Columns, chunks: AsyncIterator[List[tuple]]) -> AsyncIterator[bytes]:
+    """
+    Encode row chunks as a Parquet file, one row group per chunk, sending
+    each row group as soon as it is written.
+    """
+    schema = pa.schema([(name, pa.type_for_alias(type_)) for name, type_ in columns])
+    sink = _Sink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        async for rows in chunks:
+            table = pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)],
+                schema=schema,
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
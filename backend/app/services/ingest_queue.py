@@ -0,0 +1,198 @@
+# medassistant/backend/app/services/ingest_queue.py
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db_session import SessionLocal
+from app.schemas import SensorReadingCreate
+from app.services.sensor_cache import sensor_cache
+from app.services.sensor_service import check_batch, persist_batch
+
+# "sync": POST /sensors/readings/ writes inline (default)
+# "queued": the reading is queued, 202 is returned and a flusher commits it
+INGEST_MODE = os.getenv("INGEST_MODE", "sync")
+# Readings held in memory before the API starts answering 503
+INGEST_QUEUE_MAX_SIZE = int(os.getenv("INGEST_QUEUE_MAX_SIZE", "10000"))
+# Maximum readings written per group commit
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+# How long the flusher waits for the first reading of a batch (seconds)
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.2"))
+# Retry-After sent to clients when the queue is full (seconds)
+INGEST_RETRY_AFTER = int(os.getenv("INGEST_RETRY_AFTER", "1"))
+# Commit attempts per batch before it is logged and discarded
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+# Longest wait between attempts (seconds); starts at the flush interval and doubles
+INGEST_RETRY_MAX_DELAY = float(os.getenv("INGEST_RETRY_MAX_DELAY", "30"))
+
+
+class IngestQueue:
+    """
+    Bounded in-process queue of readings drained by a background thread
+    in group commits (persist_batch), followed by the threshold checks.
+
+    A batch whose commit fails is kept and retried with exponential
+    backoff; meanwhile the queue fills up and submit() starts refusing
+    readings. After max_attempts the batch is logged and discarded, so a
+    batch that can never be written doesn't wedge ingestion.
+    """
+
+    def __init__(
+        self,
+        max_size: int = INGEST_QUEUE_MAX_SIZE,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+        retry_max_delay: float = INGEST_RETRY_MAX_DELAY,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_max_delay = retry_max_delay
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[SensorReadingCreate]" = queue.Queue(maxsize=max_size)
+        self._retry: List[SensorReadingCreate] = []
+        self._attempts = 0  # failed attempts of the batch in _retry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # metrics
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.discarded = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self._total_flush_seconds = 0.0
+
+    def submit(self, reading: SensorReadingCreate) -> bool:
+        """
+        Enqueue a reading without blocking. Returns False if the queue is full.
+        """
+        try:
+            self._queue.put_nowait(reading)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def depth(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def _next_batch(self) -> List[SensorReadingCreate]:
+        batch, self._retry = self._retry, []
+        if not batch:
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush_once(self) -> int:
+        """
+        Write one batch (waiting up to flush_interval for the first reading).
+        Returns the number of readings committed.
+        """
+        batch = self._next_batch()
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        db = self._session_factory()
+        try:
+            # Sensors may have been removed since the reading was accepted
+            known = sensor_cache.get_many(db, {r.sensor_id for r in batch})
+            readings = [r for r in batch if r.sensor_id in known]
+            rows, sensors = persist_batch(db, readings)
+        except Exception as e:
+            self.failures += 1
+            self._attempts += 1
+            if self._attempts >= self.max_attempts:
+                self._attempts = 0
+                self.discarded += len(batch)
+                print(f"[ingest-queue] discarding {len(batch)} readings after "
+                      f"{self.max_attempts} failed attempts: {e}")
+            else:
+                self._retry = batch
+                print(f"[ingest-queue] flush of {len(batch)} readings failed, will retry: {e}")
+            return 0
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        self._attempts = 0
+        self.dropped += len(batch) - len(readings)
+        self.batches += 1
+        self.flushed += len(rows)
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        self._total_flush_seconds += elapsed
+
+        try:
+            check_batch(rows, sensors)
+        except Exception as e:
+            # Readings are committed; don't retry them because of alerting
+            print(f"[ingest-queue] threshold checks failed: {e}")
+        return len(rows)
+
+    def retry_delay(self) -> float:
+        """
+        Wait before the next attempt of the pending retry batch.
+        """
+        return min(self.retry_max_delay, self.flush_interval * 2 ** max(self._attempts - 1, 0))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.flush_once()
+            if self._retry:
+                # Back off while the DB keeps failing
+                self._stop.wait(self.retry_delay())
+        # Drain what is left before exiting
+        while self.depth() and self.flush_once():
+            pass
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": INGEST_MODE,
+            "queue_depth": self.depth(),
+            "max_size": self.max_size,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "discarded": self.discarded,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+            "avg_flush_ms": round(self._total_flush_seconds * 1000 / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_seconds * 1000, 3),
+        }
+
+
+ingest_queue = IngestQueue()
@@ -0,0 +1,198 @@
+# medassistant/backend/app/services/item_search.py
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, event, func, inspect, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import Item
+
+# Searched item fields, by ranking weight (a tag hit beats a name hit, ...)
+SEARCH_FIELDS = ("nfc_tag", "name", "batch")
+# Beyond this many matches, the fallback filters with ILIKE instead of id IN (...)
+SEARCH_MAX_ID_FILTER = 5000
+
+_TRGM_INDEXES = {
+    "ix_items_nfc_tag_trgm": "nfc_tag",
+    "ix_items_name_trgm": "name",
+    "ix_items_batch_trgm": "batch",
+}
+
+
+def ensure_search_indexes(engine: Engine):
+    """
+    On Postgres, create the pg_trgm GIN indexes that let the ILIKE
+    '%term%' search use an index instead of scanning items. Without the
+    extension (e.g. no privilege to create it) search still works, unindexed.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for name, column in _TRGM_INDEXES.items():
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON items USING gin ({column} gin_trgm_ops)"
+                ))
+    except Exception as e:
+        print(f"⚠️  pg_trgm search indexes not created, item search is unindexed: {e}")
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def _score(term: str, fields: Tuple[str, ...]) -> Optional[Tuple[int, int]]:
+    """
+    (rank, length of the best matching field) of an item for `term`, or
+    None if no field contains it. Exact > prefix > substring, then by field.
+    """
+    best = None
+    for weight, value in enumerate(fields):
+        if value == term:
+            kind = 3
+        elif value.startswith(term):
+            kind = 2
+        elif term in value:
+            kind = 1
+        else:
+            continue
+        score = (kind * len(fields) - weight, -len(value))
+        if best is None or score > best:
+            best = score
+    return best
+
+
+class ItemSearchIndex:
+    """
+    In-process trigram index over the items' search fields, for databases
+    without pg_trgm (SQLite, tests).
+
+    Built from the database on first use and kept current by ORM events
+    on Item. Entries of rolled back changes can linger; search results
+    are always re-read from the database, so they can't surface items
+    that don't exist.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bind = None
+        self._fields: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+    def _add(self, item_id: int, fields: Tuple[str, ...]):
+        self._remove(item_id)
+        self._fields[item_id] = fields
+        for gram in set().union(*(_trigrams(value) for value in fields)):
+            self._postings.setdefault(gram, set()).add(item_id)
+
+    def _remove(self, item_id: int):
+        fields = self._fields.pop(item_id, None)
+        if fields is None:
+            return
+        for gram in set().union(*(_trigrams(value) for value in fields)):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _ensure_built(self, db: Session):
+        bind = db.get_bind()
+        if self._bind is bind:
+            return
+        rows = db.query(Item.id, *(getattr(Item, f) for f in SEARCH_FIELDS)).all()
+        self._fields, self._postings = {}, {}
+        for item_id, *values in rows:
+            self._add(item_id, tuple(v.lower() for v in values))
+        self._bind = bind
+
+    def search(self, db: Session, q: str) -> List[int]:
+        """
+        Ids of items with `q` (case-insensitive) in a search field, best first.
+        """
+        term = q.lower()
+        with self._lock:
+            self._ensure_built(db)
+            grams = _trigrams(term)
+            if grams:
+                # Items holding every trigram of the term; verified below
+                postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+                candidates = set.intersection(*postings) if postings[0] else set()
+            else:
+                candidates = self._fields.keys()
+            scored = []
+            for item_id in candidates:
+                score = _score(term, self._fields[item_id])
+                if score is not None:
+                    scored.append((score, item_id))
+        scored.sort(key=lambda s: (-s[0][0], -s[0][1], s[1]))
+        return [item_id for _, item_id in scored]
+
+    def _apply(self, connection, target: Item, delete: bool = False):
+        with self._lock:
+            if self._bind is None or connection.engine is not self._bind:
+                return
+            if delete:
+                self._remove(target.id)
+            else:
+                self._add(target.id, tuple(getattr(target, f).lower() for f in SEARCH_FIELDS))
+
+    def reset(self):
+        with self._lock:
+            self._bind = None
+            self._fields, self._postings = {}, {}
+
+
+item_search_index = ItemSearchIndex()
+
+
+@event.listens_for(Item, "after_insert")
+def _index_item(mapper, connection, target: Item):
+    item_search_index._apply(connection, target)
+
+
+@event.listens_for(Item, "after_update")
+def _reindex_item(mapper, connection, target: Item):
+    # e.g. status changes on every scan don't touch the search fields
+    state = inspect(target)
+    if any(state.attrs[f].history.has_changes() for f in SEARCH_FIELDS):
+        item_search_index._apply(connection, target)
+
+
+@event.listens_for(Item, "after_delete")
+def _unindex_item(mapper, connection, target: Item):
+    item_search_index._apply(connection, target, delete=True)
+
+
+def search_filter(query, q: str):
+    """
+    Restrict an Item query to items matching `q` in any search field.
+    On Postgres the ILIKE is served by the pg_trgm GIN indexes.
+    """
+    like_term = f"%{q}%"
+    return query.filter(
+        or_(
+            Item.name.ilike(like_term),
+            Item.batch.ilike(like_term),
+            Item.nfc_tag.ilike(like_term),
+        )
+    )
+
+
+def pg_rank(q: str):
+    """
+    Relevance of an item for `q` on Postgres, ranked like the in-process
+    index: exact > prefix > substring match, then by field.
+    """
+    n = len(SEARCH_FIELDS)
+    return func.greatest(*(
+        case(
+            (func.lower(getattr(Item, f)) == q.lower(), 3 * n - weight),
+            (getattr(Item, f).ilike(f"{q}%"), 2 * n - weight),
+            (getattr(Item, f).ilike(f"%{q}%"), n - weight),
+            else_=0,
+        )
+        for weight, f in enumerate(SEARCH_FIELDS)
+    ))
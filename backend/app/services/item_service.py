@@ -1,53 +1,249 @@
 # medassistant/backend/app/services/item_service.py
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, asc, desc
+import re
+from datetime import date
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import asc, desc, func, select, tuple_
 
-from app.models import Item
+from app.models import Event, Item
+from app.services import keyset
+from app.services.item_search import (
+    SEARCH_MAX_ID_FILTER,
+    item_search_index,
+    pg_rank,
+    search_filter,
+)
 
+# Columns GET /items/ can sort by (anything else falls back to name)
+SORT_COLUMNS = {
+    "id": Item.id,
+    "nfc_tag": Item.nfc_tag,
+    "name": Item.name,
+    "batch": Item.batch,
+    "expiry_date": Item.expiry_date,
+    "status": Item.status,
+    "location_id": Item.location_id,
+}
 
-def get_items(
+# include=events:<n>, the n latest events of each item
+_EVENTS_LAST_N = re.compile(r"events:([1-9][0-9]*)$")
+
+
+class ItemIncludes(NamedTuple):
+    """
+    Relationships to load with a page of items.
+    """
+    location: bool = True
+    events: bool = False
+    events_last_n: Optional[int] = None  # only the n latest events
+
+
+def parse_includes(include: Optional[str]) -> ItemIncludes:
+    """
+    Parse an include= value such as "location,events:5". Raises
+    ValueError on unknown names or a bad event count.
+    """
+    if include is None:
+        return ItemIncludes()
+    location, events, last_n = False, False, None
+    for name in filter(None, (part.strip() for part in include.split(","))):
+        if name == "location":
+            location = True
+        elif name == "events":
+            events = True
+        else:
+            match = _EVENTS_LAST_N.match(name)
+            if match is None:
+                raise ValueError(f"Invalid include: {name}")
+            last_n = int(match.group(1))
+    if events:
+        last_n = None  # all events win over the latest n
+    return ItemIncludes(location=location, events=events or last_n is not None, events_last_n=last_n)
+
+
+def _load_options(includes: ItemIncludes) -> list:
+    """
+    Loader options for the requested relationships; the others are never
+    loaded, so serialization can't trigger a lazy load per item.
+    """
+    options = [joinedload(Item.location) if includes.location else noload(Item.location)]
+    if includes.events and includes.events_last_n is None:
+        options.append(selectinload(Item.events))
+    else:
+        options.append(noload(Item.events))
+    return options
+
+
+def _load_latest_events(db: Session, items: List[Item], n: int):
+    """
+    Set each item's events to its n latest ones (oldest first), with a
+    single query over the whole page.
+    """
+    if not items:
+        return
+    rank = func.row_number().over(
+        partition_by=Event.item_id,
+        order_by=(Event.timestamp.desc(), Event.id.desc()),
+    ).label("rank")
+    latest = (
+        select(Event.id, rank)
+        .where(Event.item_id.in_([item.id for item in items]))
+        .subquery()
+    )
+    events = db.scalars(
+        select(Event)
+        .join(latest, latest.c.id == Event.id)
+        .where(latest.c.rank <= n)
+        .order_by(Event.item_id, Event.timestamp, Event.id)
+    ).all()
+    by_item = {item.id: [] for item in items}
+    for event in events:
+        by_item[event.item_id].append(event)
+    for item in items:
+        set_committed_value(item, "events", by_item[item.id])
+
+
+def encode_item_cursor(sort: str, order: str, item: Item) -> str:
+    """
+    Opaque cursor pointing just after `item` in the (sort, order) listing.
+    """
+    value = getattr(item, sort)
+    if isinstance(value, date):
+        value = value.isoformat()
+    return keyset.encode_cursor(sort, order, value, item.id)
+
+
+def decode_item_cursor(cursor: str, sort: str, order: str) -> Tuple[object, int]:
+    """
+    (sort value, id) of the last item of the previous page. Raises
+    ValueError if the cursor is malformed or from a different sort/order.
+    """
+    cursor_sort, cursor_order, value, item_id = keyset.decode_cursor(cursor, 4)
+    if cursor_sort != sort or cursor_order != order:
+        raise ValueError("Cursor does not match sort/order")
+    try:
+        item_id = int(item_id)
+        python_type = SORT_COLUMNS[sort].type.python_type
+        if python_type is date:
+            value = date.fromisoformat(value)
+        elif not isinstance(value, python_type):
+            raise TypeError(value)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return value, item_id
+
+
+def get_items_page(
     db: Session,
     q: Optional[str] = None,
     sort: str = "name",
     order: str = "asc",
     limit: int = 100,
-    offset: int = 0
-) -> List[Item]:
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    includes: ItemIncludes = ItemIncludes(),
+) -> Tuple[List[Item], Optional[str]]:
     """
-    Retrieve items with optional search, sorting, and pagination.
+    Retrieve a page of items with optional search and sorting, and the
+    cursor of the next page (None on the last page).
 
     - q: search term against name, batch, or nfc_tag
-    - sort: column name to sort by (must be an Item attribute)
+    - sort: column name to sort by (one of SORT_COLUMNS); id breaks ties.
+      "relevance" ranks search matches (offset paging only)
     - order: 'asc' or 'desc'
     - limit: maximum number of records to return
-    - offset: number of records to skip
+    - offset: number of records to skip (legacy paging)
+    - cursor: next_cursor of the previous page (keyset paging; the cost
+      of a page doesn't depend on its depth, and rows inserted or moved
+      meanwhile don't shift later pages)
+    - includes: relationships to load with the page (see parse_includes);
+      the page costs a fixed number of queries whatever its size
     """
-    query = db.query(Item)
+    items, next_cursor = _query_page(db, q, sort, order, limit, offset, cursor, includes)
+    if includes.events_last_n is not None:
+        _load_latest_events(db, items, includes.events_last_n)
+    return items, next_cursor
 
-    # Search filter
+
+def _query_page(
+    db: Session,
+    q: Optional[str],
+    sort: str,
+    order: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    includes: ItemIncludes,
+) -> Tuple[List[Item], Optional[str]]:
+    query = db.query(Item).options(*_load_options(includes))
+    postgres = db.get_bind().dialect.name == "postgresql"
+
+    # Search filter: pg_trgm indexes on Postgres, in-process index elsewhere
+    ranked_ids: Optional[List[int]] = None
     if q:
-        like_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Item.name.ilike(like_term),
-                Item.batch.ilike(like_term),
-                Item.nfc_tag.ilike(like_term),
-            )
-        )
+        if postgres:
+            query = search_filter(query, q)
+        else:
+            ranked_ids = item_search_index.search(db, q)
+            if sort == "relevance":
+                pass  # only the page's ids are loaded, below
+            elif len(ranked_ids) > SEARCH_MAX_ID_FILTER:
+                query = search_filter(query, q)
+            else:
+                query = query.filter(Item.id.in_(ranked_ids))
+
+    # Best matches first
+    if sort == "relevance" and q:
+        if cursor:
+            raise ValueError("Cursor paging is not available for sort=relevance")
+        if ranked_ids is not None:
+            page_ids = ranked_ids[offset:offset + limit]
+            found = {item.id: item for item in query.filter(Item.id.in_(page_ids))}
+            return [found[i] for i in page_ids if i in found], None
+        query = query.order_by(desc(pg_rank(q)), asc(Item.id))
+        return query.offset(offset).limit(limit).all(), None
 
     # Sorting
-    sort_col = getattr(Item, sort, None)
-    if not sort_col:
-        sort_col = Item.name  # default fallback
-    if order.lower() == "desc":
-        query = query.order_by(desc(sort_col))
-    else:
-        query = query.order_by(asc(sort_col))
+    if sort not in SORT_COLUMNS:
+        sort = "name"  # default fallback
+    order = "desc" if order.lower() == "desc" else "asc"
+    sort_col = SORT_COLUMNS[sort]
+    direction = desc if order == "desc" else asc
+    query = query.order_by(direction(sort_col), direction(Item.id))
 
     # Pagination
-    query = query.offset(offset).limit(limit)
+    if cursor:
+        value, item_id = decode_item_cursor(cursor, sort, order)
+        key = tuple_(sort_col, Item.id)
+        query = query.filter(key < (value, item_id) if order == "desc" else key > (value, item_id))
+    else:
+        query = query.offset(offset)
+    # One extra row tells whether there is a next page
+    items = query.limit(limit + 1).all()
+
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_item_cursor(sort, order, items[-1])
+    return items, None
 
-    return query.all()
 
+def get_items(
+    db: Session,
+    q: Optional[str] = None,
+    sort: str = "name",
+    order: str = "asc",
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    includes: ItemIncludes = ItemIncludes(),
+) -> List[Item]:
+    """
+    Retrieve items with optional search, sorting, and pagination
+    (see get_items_page).
+    """
+    items, _ = get_items_page(
+        db, q=q, sort=sort, order=order, limit=limit, offset=offset, cursor=cursor, includes=includes
+    )
+    return items
@@ -0,0 +1,42 @@
+# medassistant/backend/app/services/keyset.py
+import base64
+import json
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(ts: datetime) -> int:
+    """
+    Naive UTC timestamp → microseconds since the Unix epoch (exact, unlike
+    a float timestamp).
+    """
+    return (ts - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    return _EPOCH + micros * _MICROSECOND
+
+
+def encode_cursor(*parts) -> str:
+    """
+    Opaque keyset cursor (URL-safe, unpadded base64) holding the
+    JSON-serializable `parts`, e.g. the sort key of a page's last row.
+    """
+    raw = json.dumps(parts, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    The `size` parts of a cursor from encode_cursor; raises ValueError
+    if it is malformed.
+    """
+    try:
+        parts = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(parts, list) or len(parts) != size:
+        raise ValueError("Invalid cursor")
+    return parts
@@ -0,0 +1,78 @@
+# medassistant/backend/app/services/nfc_scan_service.py
+import os
+from typing import Dict, List
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models import Event, Item
+from app.schemas import QueuedScan
+from app.services.nfc_tag_cache import TagEntry, nfc_tag_cache
+from app.services.sensor_service import as_naive_utc
+
+# Item status after each event type (other event types leave it as is)
+SCAN_STATUSES = {
+    "exit": "in_transit",
+    "entry": "in_stock",
+}
+
+# Maximum number of scans accepted by one sync request
+SCAN_SYNC_MAX_SCANS = int(os.getenv("SCAN_SYNC_MAX_SCANS", "5000"))
+
+
+def record_scans(db: Session, scans: List[QueuedScan], user_id: int) -> List[dict]:
+    """
+    Record a handheld's queued scans in a single transaction and return
+    one result per scan, in order.
+
+    All tags are resolved with one query, the events are inserted in bulk
+    with their client timestamps, and each item's status is set once, to
+    the status after its last scan in the list. Scans of unknown tags are
+    reported as "not_found" and don't affect the others.
+    """
+    if not scans:
+        return []
+
+    # 1. Resolve every tag at once
+    tags = {s.tag_id for s in scans}
+    items: Dict[str, tuple] = {
+        row.nfc_tag: (row.id, row.status)
+        for row in db.query(Item.nfc_tag, Item.id, Item.status).filter(Item.nfc_tag.in_(tags))
+    }
+
+    # 2. Replay the scans in order: event rows, per-scan results, final status
+    events, results = [], []
+    final_status: Dict[int, str] = {}
+    final_tag: Dict[int, str] = {}
+    for scan in scans:
+        found = items.get(scan.tag_id)
+        if found is None:
+            results.append({"tag_id": scan.tag_id, "status": "not_found", "item_id": None, "item_status": None})
+            continue
+        item_id, status = found
+        status = SCAN_STATUSES.get(scan.event_type, final_status.get(item_id, status))
+        final_status[item_id] = status
+        final_tag[item_id] = scan.tag_id
+        events.append({
+            "item_id": item_id,
+            "event_type": scan.event_type,
+            "timestamp": as_naive_utc(scan.timestamp),
+            "user_id": user_id,
+            "metadata_": f"NFC {scan.event_type} (synced)",
+        })
+        results.append({"tag_id": scan.tag_id, "status": "recorded", "item_id": item_id, "item_status": status})
+
+    # 3. Bulk insert the events and apply the final statuses (one UPDATE per status)
+    if events:
+        db.execute(insert(Event), events)
+        by_status: Dict[str, List[int]] = {}
+        for item_id, status in final_status.items():
+            if status != items[final_tag[item_id]][1]:
+                by_status.setdefault(status, []).append(item_id)
+        for status, item_ids in by_status.items():
+            db.execute(update(Item).where(Item.id.in_(item_ids)).values(status=status))
+    db.commit()
+
+    for item_id, status in final_status.items():
+        nfc_tag_cache.put(final_tag[item_id], TagEntry(item_id, status))
+    return results
@@ -0,0 +1,71 @@
+# medassistant/backend/app/services/nfc_tag_cache.py
+import os
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Item
+from app.services.ttl_cache import TTLCache
+
+# Entries older than this are reloaded from the DB (seconds); bounds how
+# long changes made by other processes can go unnoticed
+NFC_TAG_CACHE_TTL = float(os.getenv("NFC_TAG_CACHE_TTL", "300"))
+# Maximum number of tags kept in memory (least recently used go first)
+NFC_TAG_CACHE_MAX_SIZE = int(os.getenv("NFC_TAG_CACHE_MAX_SIZE", "100000"))
+
+
+class TagEntry(NamedTuple):
+    """
+    What a scan needs to know about the item behind a tag.
+    """
+    item_id: int
+    status: str
+
+
+class NfcTagCache(TTLCache[str, TagEntry]):
+    """
+    TTL + LRU cache of TagEntry keyed by NFC tag, written through on item
+    inserts, tag/status updates and scans. Unknown tags are never cached.
+    """
+
+    def __init__(self, ttl: float = NFC_TAG_CACHE_TTL, max_size: int = NFC_TAG_CACHE_MAX_SIZE):
+        super().__init__(ttl, max_size)
+
+    def get(self, db: Session, tag: str) -> Optional[TagEntry]:
+        """
+        Return the tag's item id and status, loading it on a miss.
+        Returns None if no item has this tag.
+        """
+        value = self.lookup(tag)
+        if value is not None:
+            return value
+        row = db.query(Item.id, Item.status).filter(Item.nfc_tag == tag).first()
+        if row is None:
+            return None
+        value = TagEntry(item_id=row.id, status=row.status)
+        self.put(tag, value)
+        return value
+
+
+nfc_tag_cache = NfcTagCache()
+
+
+# ----- Write-through on item writes -----
+
+@event.listens_for(Item, "after_insert")
+def _cache_new_item(mapper, connection, target: Item):
+    nfc_tag_cache.put(target.nfc_tag, TagEntry(target.id, target.status))
+
+
+@event.listens_for(Item, "after_update")
+def _cache_updated_item(mapper, connection, target: Item):
+    tag_history = inspect(target).attrs.nfc_tag.history
+    for old_tag in tag_history.deleted or ():
+        nfc_tag_cache.invalidate(old_tag)
+    nfc_tag_cache.put(target.nfc_tag, TagEntry(target.id, target.status))
+
+
+@event.listens_for(Item, "after_delete")
+def _uncache_item(mapper, connection, target: Item):
+    nfc_tag_cache.invalidate(target.nfc_tag)
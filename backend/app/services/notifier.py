@@ -0,0 +1,388 @@
+# medassistant/backend/app/services/notifier.py
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import requests
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db_session import SessionLocal
+from app.models import NotificationDeadLetter
+
+# Delivery threads per channel
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "2"))
+# Notifications waiting per channel before new ones are dead-lettered
+NOTIFY_QUEUE_MAX_SIZE = int(os.getenv("NOTIFY_QUEUE_MAX_SIZE", "1000"))
+# Max deliveries per second per channel, "channel=rate,..." (unlisted: unlimited)
+NOTIFY_RATE_LIMITS = os.getenv("NOTIFY_RATE_LIMITS", "email=10,sms=1,webhook=20")
+# Delivery attempts before a notification is dead-lettered
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+# Delay before the first retry (seconds); doubles on every further attempt
+NOTIFY_RETRY_BASE_DELAY = float(os.getenv("NOTIFY_RETRY_BASE_DELAY", "1"))
+NOTIFY_RETRY_MAX_DELAY = float(os.getenv("NOTIFY_RETRY_MAX_DELAY", "300"))
+# Webhook channel target; without it webhook notifications are only logged
+NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL")
+NOTIFY_WEBHOOK_TIMEOUT = float(os.getenv("NOTIFY_WEBHOOK_TIMEOUT", "5"))
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """
+    "email=10,sms=1" → {"email": 10.0, "sms": 1.0}
+    """
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        channel, _, rate = part.partition("=")
+        limits[channel.strip()] = float(rate)
+    return limits
+
+
+# ----- Channel senders (raise to signal a failed delivery) -----
+
+def send_email(message: str):
+    # Stub: integrate SendGrid/SES here
+    print(f"[notify:email] {message}")
+
+def send_sms(message: str):
+    # Stub: integrate Twilio here
+    print(f"[notify:sms] {message}")
+
+def send_webhook(message: str):
+    if not NOTIFY_WEBHOOK_URL:
+        print(f"[notify:webhook] {message}")
+        return
+    response = requests.post(NOTIFY_WEBHOOK_URL, json={"message": message}, timeout=NOTIFY_WEBHOOK_TIMEOUT)
+    response.raise_for_status()
+
+DEFAULT_SENDERS: Dict[str, Callable[[str], None]] = {
+    "email": send_email,
+    "sms": send_sms,
+    "webhook": send_webhook,
+}
+
+
+class Notification(NamedTuple):
+    channel: str
+    message: str
+    attempt: int = 1
+
+
+class RateLimiter:
+    """
+    Token bucket shared by a channel's workers: `rate` deliveries per
+    second on average, bursts of up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: threading.Event) -> bool:
+        """
+        Wait for a token; returns False if `stop` is set meanwhile.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop.wait(wait):
+                return False
+
+
+class _Channel:
+    def __init__(self, name: str, sender: Callable[[str], None], max_size: int, rate: Optional[float]):
+        self.name = name
+        self.sender = sender
+        self.queue: "queue.Queue[Notification]" = queue.Queue(maxsize=max_size)
+        self.limiter = RateLimiter(rate) if rate else None
+        self.threads: List[threading.Thread] = []
+        # metrics
+        self.queued = 0
+        self.sent = 0
+        self.failed_attempts = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+
+class NotificationDispatcher:
+    """
+    Delivers alert notifications off the request path.
+
+    enqueue() never blocks: each channel has its own bounded queue, pool
+    of worker threads and rate limit, so a slow or failing channel (e.g.
+    a hanging webhook) only delays its own deliveries. A failed delivery
+    is retried with exponential backoff (scheduled, not slept in a
+    worker); after max_attempts, or if the channel's queue is full, the
+    notification is dead-lettered. Dead letters are buffered and written
+    to notification_dead_letters in bulk by a background thread, so the
+    caller of enqueue() never waits on the database either.
+    """
+
+    def __init__(
+        self,
+        senders: Optional[Dict[str, Callable[[str], None]]] = None,
+        workers: int = NOTIFY_WORKERS,
+        queue_max_size: int = NOTIFY_QUEUE_MAX_SIZE,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_attempts: int = NOTIFY_MAX_ATTEMPTS,
+        retry_base_delay: float = NOTIFY_RETRY_BASE_DELAY,
+        retry_max_delay: float = NOTIFY_RETRY_MAX_DELAY,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        senders = DEFAULT_SENDERS if senders is None else senders
+        rate_limits = parse_rate_limits(NOTIFY_RATE_LIMITS) if rate_limits is None else rate_limits
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._session_factory = session_factory
+        self._channels = {
+            name: _Channel(name, sender, queue_max_size, rate_limits.get(name))
+            for name, sender in senders.items()
+        }
+        self._retries: list = []  # heap of (due, seq, Notification)
+        self._dead_letters: List[dict] = []  # rows waiting for the writer
+        self._writing = 0  # dead letters being written right now
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._inflight = 0
+        self._stop = threading.Event()
+        self._started = False
+        self._retry_thread: Optional[threading.Thread] = None
+        self._dead_letter_thread: Optional[threading.Thread] = None
+
+    # ----- producer side -----
+
+    def enqueue(self, channel: str, message: str) -> bool:
+        """
+        Queue a notification without blocking. Returns False if it was
+        dead-lettered instead (unknown channel or full queue).
+        """
+        self.start()
+        ch = self._channels.get(channel)
+        if ch is None:
+            self._dead_letter(Notification(channel, message, 0), "unknown channel")
+            return False
+        with self._cond:
+            self._inflight += 1
+            ch.queued += 1
+        return self._put(ch, Notification(channel, message))
+
+    def _put(self, ch: _Channel, notification: Notification) -> bool:
+        try:
+            ch.queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            self._give_up(ch, notification, "queue full")
+            return False
+
+    # ----- workers -----
+
+    def _deliver(self, ch: _Channel):
+        while not self._stop.is_set():
+            try:
+                notification = ch.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if ch.limiter and not ch.limiter.acquire(self._stop):
+                self._give_up(ch, notification, "dispatcher stopped")
+                continue
+            try:
+                ch.sender(notification.message)
+            except Exception as e:
+                self._retry_or_give_up(ch, notification, e)
+                continue
+            self._done(ch, sent=True)
+
+    def _retry_or_give_up(self, ch: _Channel, notification: Notification, error: Exception):
+        with self._cond:
+            ch.failed_attempts += 1
+        if notification.attempt >= self.max_attempts:
+            self._give_up(ch, notification, f"{type(error).__name__}: {error}")
+            return
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (notification.attempt - 1))
+        retry = notification._replace(attempt=notification.attempt + 1)
+        with self._cond:
+            heapq.heappush(self._retries, (time.monotonic() + delay, next(self._seq), retry))
+            ch.retried += 1
+            self._cond.notify_all()
+
+    def _schedule_retries(self):
+        while True:
+            with self._cond:
+                while not self._stop.is_set() and (
+                    not self._retries or self._retries[0][0] > time.monotonic()
+                ):
+                    timeout = self._retries[0][0] - time.monotonic() if self._retries else None
+                    self._cond.wait(timeout)
+                if self._stop.is_set():
+                    pending, self._retries = self._retries, []
+                    break
+                _, _, notification = heapq.heappop(self._retries)
+            self._put(self._channels[notification.channel], notification)
+        for _, _, notification in pending:
+            self._give_up(self._channels[notification.channel], notification, "dispatcher stopped")
+
+    # ----- outcomes -----
+
+    def _done(self, ch: _Channel, sent: bool):
+        with self._cond:
+            if sent:
+                ch.sent += 1
+            else:
+                ch.dead_lettered += 1
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    def _give_up(self, ch: _Channel, notification: Notification, error: str):
+        self._dead_letter(notification, error)
+        self._done(ch, sent=False)
+
+    def _dead_letter(self, notification: Notification, error: str):
+        print(f"[notify:{notification.channel}] dead-lettered after "
+              f"{notification.attempt} attempts ({error}): {notification.message}")
+        with self._cond:
+            self._dead_letters.append({
+                "channel": notification.channel,
+                "message": notification.message,
+                "error": error,
+                "attempts": notification.attempt,
+                "failed_at": datetime.utcnow(),
+            })
+            self._cond.notify_all()
+
+    def _write_dead_letters(self):
+        while True:
+            with self._cond:
+                while not self._dead_letters and not self._stop.is_set():
+                    self._cond.wait()
+                if not self._dead_letters:
+                    break
+                rows, self._dead_letters = self._dead_letters, []
+                self._writing = len(rows)
+            self._store_dead_letters(rows)
+            with self._cond:
+                self._writing = 0
+                self._cond.notify_all()
+
+    def _store_dead_letters(self, rows: List[dict]):
+        db = self._session_factory()
+        try:
+            db.execute(insert(NotificationDeadLetter), rows)
+            db.commit()
+        except Exception as e:
+            print(f"[notify] could not record {len(rows)} dead letters: {e}")
+        finally:
+            db.close()
+
+    # ----- lifecycle -----
+
+    def start(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._stop.clear()
+            for ch in self._channels.values():
+                ch.threads = [
+                    threading.Thread(target=self._deliver, args=(ch,), name=f"notify-{ch.name}-{i}", daemon=True)
+                    for i in range(self.workers)
+                ]
+                for t in ch.threads:
+                    t.start()
+            self._retry_thread = threading.Thread(target=self._schedule_retries, name="notify-retry", daemon=True)
+            self._retry_thread.start()
+            self._dead_letter_thread = threading.Thread(
+                target=self._write_dead_letters, name="notify-dead-letters", daemon=True
+            )
+            self._dead_letter_thread.start()
+            self._started = True
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued notification is delivered or dead-lettered
+        (and the dead letter written). Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._inflight or self._dead_letters or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Give queued notifications up to `timeout` seconds, then stop the
+        workers; whatever is still queued or waiting for a retry is
+        dead-lettered.
+        """
+        if not self._started:
+            return
+        self.join(timeout)
+        with self._cond:
+            self._stop.set()
+            self._cond.notify_all()
+        for ch in self._channels.values():
+            for t in ch.threads:
+                t.join(timeout)
+            ch.threads = []
+            while True:
+                try:
+                    notification = ch.queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._give_up(ch, notification, "dispatcher stopped")
+        if self._retry_thread:
+            self._retry_thread.join(timeout)
+            self._retry_thread = None
+        if self._dead_letter_thread:
+            self._dead_letter_thread.join(timeout)
+            self._dead_letter_thread = None
+        # Dead letters of the notifications given up above
+        with self._cond:
+            rows, self._dead_letters = self._dead_letters, []
+        if rows:
+            self._store_dead_letters(rows)
+        self._started = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending_retries = len(self._retries)
+            pending_dead_letters = len(self._dead_letters) + self._writing
+        return {
+            "pending_retries": pending_retries,
+            "pending_dead_letters": pending_dead_letters,
+            "channels": {
+                ch.name: {
+                    "queue_depth": ch.queue.qsize(),
+                    "workers": self.workers,
+                    "rate_limit": ch.limiter.rate if ch.limiter else None,
+                    "queued": ch.queued,
+                    "sent": ch.sent,
+                    "failed_attempts": ch.failed_attempts,
+                    "retried": ch.retried,
+                    "dead_lettered": ch.dead_lettered,
+                }
+                for ch in self._channels.values()
+            },
+        }
+
+
+notifier = NotificationDispatcher()
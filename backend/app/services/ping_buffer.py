@@ -0,0 +1,90 @@
+# medassistant/backend/app/services/ping_buffer.py
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import Sensor
+
+# How often buffered pings are written to sensors.last_ping (seconds)
+PING_FLUSH_INTERVAL = float(os.getenv("PING_FLUSH_INTERVAL", "5"))
+
+
+class PingBuffer:
+    """
+    Write-behind buffer for Sensor.last_ping.
+
+    Ingest records the latest ping per sensor in memory; flush() writes all
+    pending pings with a single UPDATE. Readers combine the stored value
+    with the buffered one via last_ping(), so they always see a ping that
+    is at most one flush interval old in the DB and current in-process.
+    """
+
+    def __init__(self):
+        self._pending: dict[int, datetime] = {}
+        self._latest: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sensor_id: int, ping: datetime):
+        with self._lock:
+            if ping > self._pending.get(sensor_id, datetime.min):
+                self._pending[sensor_id] = ping
+            if ping > self._latest.get(sensor_id, datetime.min):
+                self._latest[sensor_id] = ping
+
+    def last_ping(self, sensor_id: int, stored: Optional[datetime]) -> Optional[datetime]:
+        """
+        Freshest known ping: the buffered one if newer than `stored`.
+        """
+        with self._lock:
+            buffered = self._latest.get(sensor_id)
+        if buffered is None or (stored is not None and stored >= buffered):
+            return stored
+        return buffered
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, db: Session) -> int:
+        """
+        Write every pending ping in one statement, only moving last_ping
+        forward (another worker may have flushed a newer one). Returns the
+        number of sensors updated. On failure the pings are put back for
+        the next run.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        ping = case(pending, value=Sensor.id)
+        try:
+            result = db.execute(
+                update(Sensor)
+                .where(
+                    Sensor.id.in_(pending),
+                    or_(Sensor.last_ping.is_(None), Sensor.last_ping < ping),
+                )
+                .values(last_ping=ping)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for sensor_id, ping in pending.items():
+                    if ping > self._pending.get(sensor_id, datetime.min):
+                        self._pending[sensor_id] = ping
+            raise
+        return result.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._latest.clear()
+
+
+ping_buffer = PingBuffer()
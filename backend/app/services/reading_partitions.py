@@ -0,0 +1,213 @@
+# medassistant/backend/app/services/reading_partitions.py
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from app.db_session import Base
+from app.models import SensorReading
+
+# "monthly": on Postgres, create sensor_readings as a table partitioned by
+# month of `timestamp`. Empty (default): a plain table.
+SENSOR_READINGS_PARTITIONING = os.getenv("SENSOR_READINGS_PARTITIONING", "")
+# Keep this many whole months of readings (0 = keep everything)
+SENSOR_READINGS_RETENTION_MONTHS = int(os.getenv("SENSOR_READINGS_RETENTION_MONTHS", "0"))
+# Monthly partitions created ahead of the current month
+PARTITIONS_AHEAD = 3
+
+_TABLE = SensorReading.__tablename__
+_DEFAULT_PARTITION = f"{_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+_PARTITIONED_TABLE_DDL = f"""
+CREATE TABLE {_TABLE} (
+    id SERIAL NOT NULL,
+    sensor_id INTEGER NOT NULL REFERENCES sensors (id),
+    "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    value FLOAT NOT NULL,
+    PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp")
+"""
+
+
+def _add_months(month: date, n: int) -> date:
+    idx = month.year * 12 + month.month - 1 + n
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def partitioning_enabled(bind) -> bool:
+    return SENSOR_READINGS_PARTITIONING == "monthly" and bind.dialect.name == "postgresql"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """
+    Whether the existing sensor_readings table is a partitioned table.
+    """
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+    ), {"table": _TABLE}).first() is not None
+
+
+def ensure_indexes(engine: Engine):
+    """
+    Create the indexes declared on the models that are missing, e.g. ones
+    added to tables that existed before (create_all skips existing tables).
+    A failure is logged and leaves that index out.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+            except Exception as e:
+                print(f"⚠️  index {index.name} not created: {e}")
+
+
+def create_tables(engine: Engine):
+    """
+    Create all tables and any indexes missing from existing ones; with
+    partitioning enabled on Postgres, sensor_readings is created as a
+    monthly range-partitioned table. An existing plain sensor_readings
+    table is left as it is (it has to be migrated by hand).
+    """
+    if not partitioning_enabled(engine):
+        Base.metadata.create_all(bind=engine)
+        ensure_indexes(engine)
+        return
+
+    readings = SensorReading.__table__
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[t for t in Base.metadata.sorted_tables if t is not readings],
+    )
+    with engine.begin() as conn:
+        if not inspect(conn).has_table(_TABLE):
+            conn.execute(text(_PARTITIONED_TABLE_DDL))
+            # Indexes on the parent are created on every partition
+            for index in readings.indexes:
+                conn.execute(CreateIndex(index))
+            conn.execute(text(f"CREATE TABLE {_DEFAULT_PARTITION} PARTITION OF {_TABLE} DEFAULT"))
+        if is_partitioned(conn):
+            ensure_partitions(conn)
+        else:
+            print(f"⚠️  {_TABLE} exists and is not partitioned; partitioning skipped")
+    ensure_indexes(engine)
+
+
+def list_partitions(conn: Connection) -> List[date]:
+    """
+    Months that have a partition, oldest first.
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": _TABLE}).scalars()
+    months = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _create_partition(conn: Connection, month: date):
+    name = partition_name(month)
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    in_range = '"timestamp" >= :start AND "timestamp" < :end'
+    params = {"start": month, "end": _add_months(month, 1)}
+
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {"name": _DEFAULT_PARTITION}).scalar()
+    if not has_default or conn.execute(
+        text(f"SELECT 1 FROM {_DEFAULT_PARTITION} WHERE {in_range} LIMIT 1"), params
+    ).first() is None:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {_TABLE} {bounds}"))
+        return
+
+    # The default partition already holds readings of this month (future
+    # dated, or the job didn't run for longer than the lookahead); Postgres
+    # refuses the new partition until they are moved out of the default
+    conn.execute(text(f"ALTER TABLE {_TABLE} DETACH PARTITION {_DEFAULT_PARTITION}"))
+    conn.execute(text(f"CREATE TABLE {name} PARTITION OF {_TABLE} {bounds}"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), params).rowcount
+    conn.execute(text(f"ALTER TABLE {_TABLE} ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT"))
+    print(f"🗂️  Moved {moved} readings from {_DEFAULT_PARTITION} into {name}")
+
+
+def ensure_partitions(
+    conn: Connection,
+    today: Optional[date] = None,
+    months_ahead: int = PARTITIONS_AHEAD,
+) -> List[str]:
+    """
+    Create the partitions for the current month and `months_ahead` months
+    after it, moving any readings of those months out of the default
+    partition. Returns the names of the partitions created.
+
+    Each month is created in its own savepoint; one that fails is logged
+    and skipped, so the other months (and the caller's retention) still run.
+    """
+    current = (today or datetime.utcnow().date()).replace(day=1)
+    existing = set(list_partitions(conn))
+    created = []
+    for n in range(months_ahead + 1):
+        month = _add_months(current, n)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        try:
+            with conn.begin_nested():
+                _create_partition(conn, month)
+        except Exception as e:
+            print(f"⚠️  Could not create partition {name}: {e}")
+            continue
+        created.append(name)
+    return created
+
+
+def apply_retention(
+    conn: Connection,
+    retention_months: int = SENSOR_READINGS_RETENTION_MONTHS,
+    today: Optional[date] = None,
+) -> int:
+    """
+    Remove readings older than `retention_months` whole months.
+
+    On a partitioned table whole monthly partitions are dropped (no row
+    deletes, nothing left to vacuum) and the number of partitions dropped
+    is returned; rows in the default partition are kept. On a plain table
+    the rows are deleted and their count is returned.
+    """
+    if retention_months <= 0:
+        return 0
+    cutoff = _add_months((today or datetime.utcnow().date()).replace(day=1), -retention_months)
+
+    if is_partitioned(conn):
+        dropped = 0
+        for month in list_partitions(conn):
+            if _add_months(month, 1) <= cutoff:
+                conn.execute(text(f"DROP TABLE {partition_name(month)}"))
+                dropped += 1
+        return dropped
+
+    result = conn.execute(
+        delete(SensorReading).where(
+            SensorReading.timestamp < datetime.combine(cutoff, datetime.min.time())
+        )
+    )
+    return result.rowcount
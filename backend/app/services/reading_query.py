@@ -0,0 +1,114 @@
+# medassistant/backend/app/services/reading_query.py
+import sys
+from array import array
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import SensorReading
+from app.services import keyset
+
+# Rows per page of GET /sensors/readings/bulk
+BULK_DEFAULT_LIMIT = 10000
+BULK_MAX_LIMIT = 100000
+
+# (id, sensor_id, timestamp, value)
+Row = Tuple[int, int, datetime, float]
+# (sensor_id, timestamp, id) of the last row returned
+Cursor = Tuple[int, datetime, int]
+
+
+def encode_cursor(row: Row) -> str:
+    reading_id, sensor_id, ts, _ = row
+    return keyset.encode_cursor(sensor_id, keyset.to_micros(ts), reading_id)
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Parse a cursor from encode_cursor; raises ValueError if it is malformed.
+    """
+    try:
+        sensor_id, micros, reading_id = (int(part) for part in keyset.decode_cursor(cursor, 3))
+        # A forged timestamp can be out of datetime's range
+        return sensor_id, keyset.from_micros(micros), reading_id
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def fetch_page(
+    db: Session,
+    sensor_ids: Iterable[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = BULK_DEFAULT_LIMIT,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    One page of raw readings of `sensor_ids` in [start, end), ordered by
+    (sensor_id, timestamp, id), continuing after `cursor`. Returns the rows
+    and the cursor of the next page (None on the last page).
+
+    Sensors are read one at a time, so every query is a range scan of the
+    (sensor_id, timestamp) index; id only breaks timestamp ties.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows: List[Row] = []
+    for sensor_id in sorted(set(sensor_ids)):
+        if after and sensor_id < after[0]:
+            continue
+        stmt = (
+            select(SensorReading.id, SensorReading.sensor_id, SensorReading.timestamp, SensorReading.value)
+            .where(SensorReading.sensor_id == sensor_id)
+            .order_by(SensorReading.timestamp, SensorReading.id)
+            # One extra row tells whether there is a next page
+            .limit(limit + 1 - len(rows))
+        )
+        if start is not None:
+            stmt = stmt.where(SensorReading.timestamp >= start)
+        if end is not None:
+            stmt = stmt.where(SensorReading.timestamp < end)
+        if after and sensor_id == after[0]:
+            _, ts, reading_id = after
+            stmt = stmt.where(
+                SensorReading.timestamp >= ts,
+                or_(SensorReading.timestamp > ts, and_(SensorReading.timestamp == ts, SensorReading.id > reading_id)),
+            )
+        rows.extend(tuple(r) for r in db.execute(stmt))
+        if len(rows) > limit:
+            break
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def to_columns(rows: List[Row]) -> dict:
+    """
+    Column-oriented JSON body: one array per field instead of one object
+    per reading.
+    """
+    return {
+        "sensor_id": [r[1] for r in rows],
+        "timestamp": [r[2].isoformat() for r in rows],
+        "value": [r[3] for r in rows],
+    }
+
+
+def pack_columns(rows: List[Row]) -> bytes:
+    """
+    Packed little-endian arrays, back to back: int32 sensor_id[n],
+    int64 timestamp[n] (microseconds since the Unix epoch, UTC) and
+    float64 value[n]. Readable with e.g. numpy.frombuffer.
+    """
+    columns = [
+        array("i", [r[1] for r in rows]),
+        array("q", [keyset.to_micros(r[2]) for r in rows]),
+        array("d", [r[3] for r in rows]),
+    ]
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    return b"".join(column.tobytes() for column in columns)
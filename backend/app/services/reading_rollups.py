@@ -0,0 +1,374 @@
+# medassistant/backend/app/services/reading_rollups.py
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models import SensorReading, SensorReadingRollup
+
+# Rollup resolutions, finest first
+RESOLUTIONS: Dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+# Each resolution is computed from the next finer one (1m from raw readings)
+_SOURCE: Dict[str, Optional[str]] = {"1m": None, "1h": "1m", "1d": "1h"}
+# "auto" picks the finest resolution returning at most this many points;
+# explicit resolutions are refused for ranges giving more
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "1000"))
+# Raw readings are returned for ranges up to this long (seconds)
+HISTORY_RAW_MAX_SPAN = int(os.getenv("HISTORY_RAW_MAX_SPAN", "3600"))
+# Rollup rows written per statement (and buckets recomputed per query)
+BACKFILL_CHUNK_SIZE = 2000
+RECOMPUTE_CHUNK_SIZE = 500
+# How often buckets touched by ingest are recomputed (seconds)
+ROLLUP_FLUSH_INTERVAL = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "5"))
+# How often the most recent rollups are rebuilt from raw readings, and how
+# far back (seconds), repairing buckets whose flush was lost in a crash
+ROLLUP_REPAIR_INTERVAL = int(os.getenv("ROLLUP_REPAIR_INTERVAL", "3600"))
+ROLLUP_REPAIR_WINDOW = int(os.getenv("ROLLUP_REPAIR_WINDOW", "7200"))
+# Postgres advisory lock serializing rollup writers across workers
+ROLLUP_LOCK_KEY = 0x726F6C6C  # "roll"
+
+_EPOCH = datetime(1970, 1, 1)
+
+# (sensor_id, resolution, bucket) -> [min, max, sum, count]
+_Buckets = Dict[Tuple[int, str, datetime], List[float]]
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """
+    Start of the `resolution` bucket containing the naive UTC timestamp `ts`.
+    """
+    step = RESOLUTIONS[resolution]
+    return ts - (ts - _EPOCH) % step
+
+
+def _combine(buckets: _Buckets, key: Tuple[int, str, datetime], other: List[float]):
+    agg = buckets.get(key)
+    if agg is None:
+        buckets[key] = list(other)
+    else:
+        agg[0] = min(agg[0], other[0])
+        agg[1] = max(agg[1], other[1])
+        agg[2] += other[2]
+        agg[3] += other[3]
+
+
+def _lock(db: Session):
+    """
+    Take the rollup lock for the rest of the transaction (Postgres; SQLite
+    has a single writer anyway). Rollup writers recompute buckets from the
+    committed readings, so serializing them means the last write of a
+    bucket always saw every reading committed before it started.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+
+
+def _write(db: Session, buckets: _Buckets) -> int:
+    """
+    Store `buckets`, replacing existing rows: they hold complete aggregates,
+    so writing one twice is harmless.
+    """
+    if not buckets:
+        return 0
+    dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    # Sorted, so concurrent writers lock rollup rows in the same order
+    stmt = dialect_insert(SensorReadingRollup).values([
+        {
+            "sensor_id": sensor_id,
+            "resolution": resolution,
+            "bucket": bucket,
+            "min_value": agg[0],
+            "max_value": agg[1],
+            "sum_value": agg[2],
+            "reading_count": agg[3],
+        }
+        for (sensor_id, resolution, bucket), agg in sorted(buckets.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            SensorReadingRollup.sensor_id,
+            SensorReadingRollup.resolution,
+            SensorReadingRollup.bucket,
+        ],
+        set_={
+            "min_value": stmt.excluded.min_value,
+            "max_value": stmt.excluded.max_value,
+            "sum_value": stmt.excluded.sum_value,
+            "reading_count": stmt.excluded.reading_count,
+        },
+    )
+    db.execute(stmt)
+    return len(buckets)
+
+
+def _source_query(db: Session, resolution: str):
+    """
+    Query of the rows `resolution` buckets are aggregated from, as
+    (sensor_id, timestamp, value) readings or (sensor_id, bucket, min,
+    max, sum, count) rollups, plus its sensor and timestamp columns.
+    """
+    source = _SOURCE[resolution]
+    if source is None:
+        ts = SensorReading.timestamp
+        query = db.query(SensorReading.sensor_id, ts, SensorReading.value)
+        return query, SensorReading.sensor_id, ts
+    ts = SensorReadingRollup.bucket
+    query = db.query(
+        SensorReadingRollup.sensor_id, ts,
+        SensorReadingRollup.min_value, SensorReadingRollup.max_value,
+        SensorReadingRollup.sum_value, SensorReadingRollup.reading_count,
+    ).filter(SensorReadingRollup.resolution == source)
+    return query, SensorReadingRollup.sensor_id, ts
+
+
+def _as_aggregate(values) -> List[float]:
+    if len(values) == 1:
+        return [values[0], values[0], values[0], 1]
+    return list(values)
+
+
+def _recompute(db: Session, keys: Set[Tuple[int, datetime]], resolution: str) -> int:
+    """
+    Recompute the `resolution` buckets `keys` ((sensor_id, bucket start))
+    from the level below. Returns the number of buckets written.
+    """
+    step = RESOLUTIONS[resolution]
+    ordered = sorted(keys)
+    buckets: _Buckets = {}
+    for i in range(0, len(ordered), RECOMPUTE_CHUNK_SIZE):
+        query, sensor_col, ts_col = _source_query(db, resolution)
+        query = query.filter(or_(*(
+            and_(sensor_col == sensor_id, ts_col >= bucket, ts_col < bucket + step)
+            for sensor_id, bucket in ordered[i:i + RECOMPUTE_CHUNK_SIZE]
+        )))
+        for sensor_id, ts, *values in query:
+            _combine(buckets, (sensor_id, resolution, bucket_start(ts, resolution)), _as_aggregate(values))
+    return _write(db, buckets)
+
+
+def _parents(keys: Iterable[Tuple[int, datetime]], resolution: str) -> Set[Tuple[int, datetime]]:
+    return {(sensor_id, bucket_start(ts, resolution)) for sensor_id, ts in keys}
+
+
+class RollupBuffer:
+    """
+    Write-behind buffer for the rollups, like PingBuffer for last_ping.
+
+    Ingest records which 1m buckets committed readings fall in, and
+    flush() recomputes those buckets from sensor_readings (then their 1h
+    and 1d parents from the finer rollups). A fast sensor then updates
+    its hot 1m/1h/1d rows once per flush interval instead of once per
+    reading, and since a bucket is recomputed rather than incremented,
+    flushing it again (or rebuilding it) never double counts. History
+    queries lag ingest by up to ROLLUP_FLUSH_INTERVAL.
+    """
+
+    def __init__(self):
+        self._pending: Set[Tuple[int, datetime]] = set()
+        self._lock = threading.Lock()
+
+    def add(self, readings: list):
+        """
+        Mark the buckets of `readings` (anything with sensor_id/timestamp,
+        timestamps naive UTC) for recomputing. Call after they are committed.
+        """
+        with self._lock:
+            for r in readings:
+                self._pending.add((r.sensor_id, bucket_start(r.timestamp, "1m")))
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, db: Session) -> int:
+        """
+        Recompute every pending bucket and its parents in one transaction.
+        Returns the number of buckets written. On failure they are put
+        back for the next run; buckets lost in a crash are repaired by
+        rebuild_rollups().
+        """
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return 0
+        try:
+            _lock(db)
+            written = _recompute(db, pending, "1m")
+            hours = _parents(pending, "1h")
+            written += _recompute(db, hours, "1h")
+            written += _recompute(db, _parents(hours, "1d"), "1d")
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._pending |= pending
+            raise
+        return written
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+
+rollup_buffer = RollupBuffer()
+
+
+def _rebuild(db: Session, resolution: str, since: Optional[datetime]) -> int:
+    """
+    Recompute every `resolution` bucket starting at or after the one
+    containing `since` (all of them if None) from the level below.
+    Sources are streamed in bucket order and complete buckets written in
+    chunks, so memory use doesn't depend on the table size. Returns the
+    number of source rows read.
+    """
+    query, sensor_col, ts_col = _source_query(db, resolution)
+    if since is not None:
+        query = query.filter(ts_col >= bucket_start(since, resolution))
+    rows = query.order_by(sensor_col, ts_col).yield_per(BACKFILL_CHUNK_SIZE)
+    buckets: _Buckets = {}
+    current = None
+    total = 0
+    for sensor_id, ts, *values in rows:
+        key = (sensor_id, resolution, bucket_start(ts, resolution))
+        # Only write buckets whose rows have all been read
+        if key != current and len(buckets) >= BACKFILL_CHUNK_SIZE:
+            _write(db, buckets)
+            buckets = {}
+        current = key
+        _combine(buckets, key, _as_aggregate(values))
+        total += 1
+    _write(db, buckets)
+    return total
+
+
+def rebuild_rollups(db: Session, since: Optional[datetime] = None) -> int:
+    """
+    Rebuild the rollups of readings from `since` on (naive UTC; everything
+    if None) and commit. Buckets are replaced, so this is safe to run at
+    any time, also next to ingest. Buckets older than raw retention are
+    kept. Returns the number of readings rolled up.
+    """
+    _lock(db)
+    total = _rebuild(db, "1m", since)
+    _rebuild(db, "1h", since)
+    _rebuild(db, "1d", since)
+    db.commit()
+    return total
+
+
+def backfill_rollups(db: Session) -> int:
+    """
+    Build the rollups from sensor_readings if there are none yet (first
+    start after upgrading). Runs under the rollup lock, so when several
+    workers start at once one builds them and the others find them there.
+    Returns the number of readings rolled up.
+    """
+    _lock(db)
+    if db.query(SensorReadingRollup.sensor_id).first() is not None:
+        db.rollback()
+        return 0
+    return rebuild_rollups(db)
+
+
+def repair_rollups(db: Session) -> int:
+    """
+    Rebuild the rollups of the last ROLLUP_REPAIR_WINDOW seconds.
+    """
+    return rebuild_rollups(db, datetime.utcnow() - timedelta(seconds=ROLLUP_REPAIR_WINDOW))
+
+
+def pick_resolution(start: datetime, end: datetime) -> str:
+    """
+    Cheapest resolution that still gives a detailed chart of [start, end):
+    raw readings for short ranges, otherwise the finest rollup returning
+    at most HISTORY_MAX_POINTS buckets.
+    """
+    span = end - start
+    if span <= timedelta(seconds=HISTORY_RAW_MAX_SPAN):
+        return "raw"
+    for resolution, step in RESOLUTIONS.items():
+        if span / step <= HISTORY_MAX_POINTS:
+            return resolution
+    return "1d"
+
+
+def _check_points(start: datetime, end: datetime, resolution: str):
+    """
+    Raise ValueError if [start, end) is longer than "auto" would serve at
+    `resolution` (any range may be served from the coarsest rollup).
+    """
+    span = end - start
+    if resolution == "raw":
+        if span > timedelta(seconds=HISTORY_RAW_MAX_SPAN):
+            raise ValueError(f"Range too long for raw readings (max {HISTORY_RAW_MAX_SPAN}s)")
+    elif resolution != "1d" and span / RESOLUTIONS[resolution] > HISTORY_MAX_POINTS:
+        raise ValueError(f"Range too long for resolution {resolution} (max {HISTORY_MAX_POINTS} points)")
+
+
+def get_history(
+    db: Session,
+    sensor_id: int,
+    start: datetime,
+    end: datetime,
+    resolution: str = "auto",
+) -> Tuple[str, List[dict]]:
+    """
+    Readings of one sensor in [start, end) (naive UTC) at `resolution`
+    ("raw", "1m", "1h", "1d" or "auto"). Returns the resolution used and
+    the points, oldest first, each with timestamp/min/max/avg/count.
+    Raises ValueError if an explicit resolution gives too many points.
+
+    Rollup buckets overlapping the range are included, so the first one
+    may cover readings from just before `start`.
+    """
+    if resolution == "auto":
+        resolution = pick_resolution(start, end)
+    else:
+        _check_points(start, end, resolution)
+
+    if resolution == "raw":
+        rows = (
+            db.query(SensorReading.timestamp, SensorReading.value)
+            .filter(
+                SensorReading.sensor_id == sensor_id,
+                SensorReading.timestamp >= start,
+                SensorReading.timestamp < end,
+            )
+            .order_by(SensorReading.timestamp)
+            .all()
+        )
+        return resolution, [
+            {"timestamp": ts, "min": value, "max": value, "avg": value, "count": 1}
+            for ts, value in rows
+        ]
+
+    rows = (
+        db.query(SensorReadingRollup)
+        .filter(
+            SensorReadingRollup.sensor_id == sensor_id,
+            SensorReadingRollup.resolution == resolution,
+            SensorReadingRollup.bucket >= bucket_start(start, resolution),
+            SensorReadingRollup.bucket < end,
+        )
+        .order_by(SensorReadingRollup.bucket)
+        .all()
+    )
+    return resolution, [
+        {
+            "timestamp": r.bucket,
+            "min": r.min_value,
+            "max": r.max_value,
+            "avg": r.sum_value / r.reading_count,
+            "count": r.reading_count,
+        }
+        for r in rows
+    ]
@@ -0,0 +1,120 @@
+# medassistant/backend/app/services/reading_stream.py
+import csv
+import json
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import ReadingStreamSummary, SensorReadingCreate
+from app.services.sensor_cache import sensor_cache
+from app.services.sensor_service import check_batch_off_loop, persist_batch
+
+# Readings written per transaction while consuming an upload
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+# A single line longer than this aborts the upload
+MAX_LINE_BYTES = 64 * 1024
+# Rejection reasons kept in the summary
+MAX_REPORTED_ERRORS = 100
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a streamed body into lines without buffering more than one line.
+    """
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buf) > MAX_LINE_BYTES:
+            raise LineTooLong(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buf:
+        yield buf
+
+
+async def persist_and_check(
+    db: AsyncSession,
+    readings: List[SensorReadingCreate],
+) -> Tuple[int, List[int], int]:
+    """
+    Write readings for known sensors in one transaction and run the
+    threshold checks. Returns (accepted, indexes of readings rejected for
+    an unknown sensor, alerts raised).
+    """
+    known = await db.run_sync(sensor_cache.get_many, {r.sensor_id for r in readings})
+    unknown = [i for i, r in enumerate(readings) if r.sensor_id not in known]
+    rows, sensors = await db.run_sync(
+        persist_batch, [r for r in readings if r.sensor_id in known]
+    )
+    alerts = await check_batch_off_loop(rows, sensors)
+    return len(rows), unknown, alerts
+
+
+def _parse_line(line: str, fmt: str, header: Optional[List[str]]) -> SensorReadingCreate:
+    if fmt == "csv":
+        row = next(csv.reader([line]))
+        if len(row) != len(header):
+            raise ValueError(f"expected {len(header)} columns, got {len(row)}")
+        return SensorReadingCreate(**dict(zip(header, row)))
+    return SensorReadingCreate(**json.loads(line))
+
+
+async def ingest_stream(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "ndjson",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> ReadingStreamSummary:
+    """
+    Consume an NDJSON or CSV (with header) upload of readings, validating
+    each line with SensorReadingCreate and writing them `chunk_size` at a
+    time via persist_batch, followed by the usual threshold checks.
+
+    Each chunk is committed on its own, so an upload interrupted midway
+    keeps the chunks written so far. Lines that fail validation or
+    reference an unknown sensor are counted as rejected.
+    """
+    summary = ReadingStreamSummary()
+    pending: List[tuple] = []  # (line number, reading)
+    header: Optional[List[str]] = None
+
+    def reject(line_no: int, reason: str):
+        summary.rejected += 1
+        if len(summary.errors) < MAX_REPORTED_ERRORS:
+            summary.errors.append(f"line {line_no}: {reason}")
+
+    async def write_pending():
+        accepted, unknown, alerts = await persist_and_check(db, [r for _, r in pending])
+        for i in unknown:
+            reject(pending[i][0], "Sensor not found")
+        pending.clear()
+        summary.accepted += accepted
+        summary.alerts += alerts
+
+    line_no = 0
+    async for raw in iter_lines(chunks):
+        line_no += 1
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            continue
+        if fmt == "csv" and header is None:
+            header = [h.strip() for h in next(csv.reader([line]))]
+            continue
+        try:
+            pending.append((line_no, _parse_line(line, fmt, header)))
+        except (ValueError, TypeError, ValidationError) as e:
+            reject(line_no, str(e).replace("\n", " "))
+            continue
+        if len(pending) >= chunk_size:
+            await write_pending()
+
+    if pending:
+        await write_pending()
+    return summary
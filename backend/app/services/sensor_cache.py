@@ -0,0 +1,97 @@
+# medassistant/backend/app/services/sensor_cache.py
+import os
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Sensor
+from app.services.ttl_cache import TTLCache
+
+# Entries older than this are reloaded from the DB (seconds)
+SENSOR_CACHE_TTL = float(os.getenv("SENSOR_CACHE_TTL", "300"))
+# Maximum number of sensors kept in memory (least recently used go first)
+SENSOR_CACHE_MAX_SIZE = int(os.getenv("SENSOR_CACHE_MAX_SIZE", "10000"))
+
+# Sensor columns whose change must drop the cached entry
+_CACHED_FIELDS = ("name", "type", "threshold_min", "threshold_max")
+
+
+class SensorMeta(NamedTuple):
+    """
+    Immutable snapshot of the sensor fields the ingest path needs.
+    """
+    id: int
+    name: str
+    type: str
+    threshold_min: Optional[float]
+    threshold_max: Optional[float]
+
+    @classmethod
+    def from_sensor(cls, sensor: Sensor) -> "SensorMeta":
+        return cls(
+            id=sensor.id,
+            name=sensor.name,
+            type=sensor.type,
+            threshold_min=sensor.threshold_min,
+            threshold_max=sensor.threshold_max,
+        )
+
+
+class SensorMetadataCache(TTLCache[int, SensorMeta]):
+    """
+    TTL + LRU cache of SensorMeta keyed by sensor id.
+    Unknown sensor ids are never cached.
+    """
+
+    def __init__(self, ttl: float = SENSOR_CACHE_TTL, max_size: int = SENSOR_CACHE_MAX_SIZE):
+        super().__init__(ttl, max_size)
+
+    def get(self, db: Session, sensor_id: int) -> Optional[SensorMeta]:
+        """
+        Return the sensor's metadata, loading it on a miss.
+        Returns None if the sensor does not exist.
+        """
+        meta = self.lookup(sensor_id)
+        if meta is not None:
+            return meta
+        sensor = db.get(Sensor, sensor_id)
+        if sensor is None:
+            return None
+        meta = SensorMeta.from_sensor(sensor)
+        self.put(sensor_id, meta)
+        return meta
+
+    def get_many(self, db: Session, sensor_ids: Iterable[int]) -> dict[int, SensorMeta]:
+        """
+        Return {sensor_id: SensorMeta} for the known ids, loading all
+        misses with a single query. Unknown ids are left out.
+        """
+        found, missing = self.lookup_many(sensor_ids)
+        if missing:
+            loaded = {
+                s.id: SensorMeta.from_sensor(s)
+                for s in db.query(Sensor).filter(Sensor.id.in_(missing)).all()
+            }
+            self.put_many(loaded)
+            found.update(loaded)
+        return found
+
+
+sensor_cache = SensorMetadataCache()
+
+
+# ----- Invalidation on sensor writes -----
+
+@event.listens_for(Sensor, "after_insert")
+@event.listens_for(Sensor, "after_delete")
+def _invalidate_sensor(mapper, connection, target: Sensor):
+    sensor_cache.invalidate(target.id)
+
+
+@event.listens_for(Sensor, "after_update")
+def _invalidate_sensor_on_change(mapper, connection, target: Sensor):
+    # last_ping changes on every reading and is not cached
+    state = inspect(target)
+    if any(state.attrs[f].history.has_changes() for f in _CACHED_FIELDS):
+        sensor_cache.invalidate(target.id)
@@ -1,42 +1,225 @@
 # medassistant/backend/app/services/sensor_service.py
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from app.models import Sensor, SensorReading
+from starlette.concurrency import run_in_threadpool
+from app.models import SensorLatest, SensorReading
+from app.schemas import SensorReadingCreate
 from app.services.alert_service import check_and_send_alert  # alert stub
+from app.services.door_state import update_door_states
+from app.services.ping_buffer import ping_buffer
+from app.services.reading_rollups import rollup_buffer
+from app.services.sensor_cache import SensorMeta, sensor_cache
+from app.services.status_snapshot import status_snapshot
 
-def ingest_and_check(
+def as_naive_utc(ts: datetime) -> datetime:
+    """
+    Normalize a timestamp to naive UTC (as stored in DateTime columns).
+    """
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _upsert_latest(db: Session, readings: list):
+    """
+    Move sensor_latest forward to the newest of `readings` (anything with
+    sensor_id/timestamp/value) per sensor, in the caller's transaction.
+    Older (late-arriving) readings don't win.
+    """
+    newest: Dict[int, Tuple[datetime, float]] = {}
+    for r in readings:
+        ts = as_naive_utc(r.timestamp)
+        if r.sensor_id not in newest or ts >= newest[r.sensor_id][0]:
+            newest[r.sensor_id] = (ts, r.value)
+    if not newest:
+        return
+
+    dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = dialect_insert(SensorLatest).values([
+        {"sensor_id": sensor_id, "timestamp": ts, "value": value}
+        for sensor_id, (ts, value) in newest.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SensorLatest.sensor_id],
+        set_={"timestamp": stmt.excluded.timestamp, "value": stmt.excluded.value},
+        where=stmt.excluded.timestamp >= SensorLatest.timestamp,
+    )
+    db.execute(stmt)
+
+def backfill_sensor_latest(db: Session) -> int:
+    """
+    Populate an empty sensor_latest from sensor_readings (first start after
+    upgrading). Returns the number of sensors filled in.
+    """
+    if db.query(SensorLatest.sensor_id).first() is not None:
+        return 0
+    newest = (
+        db.query(SensorReading.sensor_id, func.max(SensorReading.timestamp).label("ts"))
+        .group_by(SensorReading.sensor_id)
+        .subquery()
+    )
+    rows = (
+        db.query(SensorReading.sensor_id, SensorReading.timestamp, SensorReading.value)
+        .join(newest, (SensorReading.sensor_id == newest.c.sensor_id)
+              & (SensorReading.timestamp == newest.c.ts))
+        .all()
+    )
+    _upsert_latest(db, rows)
+    db.commit()
+    return len({r.sensor_id for r in rows})
+
+def _breach(sensor: SensorMeta, reading: SensorReading) -> Optional[str]:
+    """
+    Alert type of a reading outside the sensor's range, else None.
+    """
+    if sensor.threshold_min is not None and reading.value < sensor.threshold_min:
+        return "below_threshold"
+    if sensor.threshold_max is not None and reading.value > sensor.threshold_max:
+        return "above_threshold"
+    return None
+
+def _check_thresholds(sensor: SensorMeta, reading: SensorReading) -> bool:
+    """
+    Raise a threshold alert if the reading is outside the sensor's range.
+    Returns True if an alert was raised (not suppressed as a duplicate).
+    """
+    alert_type = _breach(sensor, reading)
+    if alert_type is None:
+        return False
+    return check_and_send_alert(sensor, reading, alert_type) is not None
+
+def persist_reading(
     db: Session,
     sensor_id: int,
     timestamp: datetime,
     value: float
-) -> SensorReading:
+) -> Tuple[SensorReading, SensorMeta]:
     """
-    Persist a sensor reading and trigger threshold alerts if needed.
+    Persist a sensor reading and record the sensor's ping. Returns the
+    stored reading and its sensor's metadata for the threshold checks.
     """
-    # 1. Load sensor
-    sensor = db.query(Sensor).get(sensor_id)
+    # 1. Load sensor metadata (cached; no SELECT on a hit)
+    sensor = sensor_cache.get(db, sensor_id)
     if not sensor:
         raise ValueError("Sensor not found")
 
     # 2. Create and save reading
     reading = SensorReading(
         sensor_id=sensor_id,
-        timestamp=timestamp,
+        timestamp=as_naive_utc(timestamp),
         value=value
     )
     db.add(reading)
-
-    # 3. Update sensor last_ping
-    sensor.last_ping = datetime.utcnow()
+    _upsert_latest(db, [reading])
+    update_door_states(db, [reading], {sensor_id: sensor})
 
     db.commit()
     db.refresh(reading)
 
-    # 4. Threshold checks
-    if sensor.threshold_min is not None and value < sensor.threshold_min:
-        check_and_send_alert(sensor, reading, "below_threshold")
-    elif sensor.threshold_max is not None and value > sensor.threshold_max:
-        check_and_send_alert(sensor, reading, "above_threshold")
+    # 3. Update sensor last_ping and the rollups (write-behind, flushed by the scheduler)
+    ping_buffer.record(sensor_id, datetime.utcnow())
+    rollup_buffer.add([reading])
+    status_snapshot.invalidate()
+
+    return reading, sensor
 
+def ingest_and_check(
+    db: Session,
+    sensor_id: int,
+    timestamp: datetime,
+    value: float
+) -> SensorReading:
+    """
+    Persist a sensor reading and trigger threshold alerts if needed.
+    """
+    reading, sensor = persist_reading(db, sensor_id, timestamp, value)
+    _check_thresholds(sensor, reading)
     return reading
 
+def persist_batch(
+    db: Session,
+    readings: List[SensorReadingCreate]
+) -> Tuple[List[SensorReading], Dict[int, SensorMeta]]:
+    """
+    Write many readings in a single transaction and record the sensors'
+    pings. Returns the inserted rows and the metadata of their sensors.
+
+    The batch is all-or-nothing: if any reading references an unknown
+    sensor, nothing is written and ValueError is raised.
+    """
+    if not readings:
+        return [], {}
+
+    # 1. Load every referenced sensor (cache misses in one query)
+    sensor_ids = {r.sensor_id for r in readings}
+    sensors = sensor_cache.get_many(db, sensor_ids)
+    if len(sensors) != len(sensor_ids):
+        raise ValueError("Sensor not found")
+
+    # 2. Bulk insert all readings (multi-row INSERT ... RETURNING)
+    rows = db.scalars(
+        insert(SensorReading).returning(SensorReading),
+        [
+            {"sensor_id": r.sensor_id, "timestamp": as_naive_utc(r.timestamp), "value": r.value}
+            for r in readings
+        ],
+    ).all()
+
+    _upsert_latest(db, rows)
+    update_door_states(db, rows, sensors)
+
+    # Detach the inserted rows so commit doesn't expire them; otherwise the
+    # threshold checks and serialization would reload them one by one
+    for reading in rows:
+        db.expunge(reading)
+    db.commit()
+
+    # 3. Update last_ping of every sensor in the batch and the rollups (write-behind)
+    now = datetime.utcnow()
+    for sensor_id in sensor_ids:
+        ping_buffer.record(sensor_id, now)
+    rollup_buffer.add(rows)
+    status_snapshot.invalidate()
+
+    return rows, sensors
+
+def check_batch(
+    rows: List[SensorReading],
+    sensors: Dict[int, SensorMeta]
+) -> int:
+    """
+    Run the threshold checks over readings written by persist_batch.
+    Returns the number of alerts raised; duplicates suppressed by the
+    alert dedupe don't count.
+    """
+    return sum(_check_thresholds(sensors[reading.sensor_id], reading) for reading in rows)
+
+async def check_batch_off_loop(
+    rows: List[SensorReading],
+    sensors: Dict[int, SensorMeta]
+) -> int:
+    """
+    check_batch for async handlers. Alert dispatch uses its own blocking
+    session, so breaching readings are checked in the threadpool; the
+    (usual) batch without any stays on the loop.
+    """
+    breaching = [r for r in rows if _breach(sensors[r.sensor_id], r) is not None]
+    if not breaching:
+        return 0
+    return await run_in_threadpool(check_batch, breaching, sensors)
+
+def ingest_batch_and_check(
+    db: Session,
+    readings: List[SensorReadingCreate]
+) -> List[SensorReading]:
+    """
+    Batch counterpart of ingest_and_check: persist many readings in a
+    single transaction and run the threshold checks over the whole batch.
+    Raises ValueError (nothing written) if any sensor is unknown.
+    """
+    rows, sensors = persist_batch(db, readings)
+    check_batch(rows, sensors)
+    return rows
@@ -0,0 +1,97 @@
+# medassistant/backend/app/services/status_snapshot.py
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+
+from app.models import Sensor
+from app.schemas import SensorStatusItem
+
+# After an invalidation, rebuild at most this often (seconds)
+STATUS_SNAPSHOT_MIN_INTERVAL = float(os.getenv("STATUS_SNAPSHOT_MIN_INTERVAL", "1"))
+# Rebuild at least this often even without local invalidations, which
+# bounds staleness from ingest handled by other workers (seconds)
+STATUS_SNAPSHOT_MAX_AGE = float(os.getenv("STATUS_SNAPSHOT_MAX_AGE", "5"))
+
+
+class StatusSnapshot:
+    """
+    Serialized /sensors/status/ response shared by all pollers, with its ETag.
+
+    The snapshot is rebuilt when it was invalidated (ingest, sensor changes;
+    rate-limited by min_interval), when it is older than max_age, or when a
+    sensor is due to cross the offline threshold.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = STATUS_SNAPSHOT_MIN_INTERVAL,
+        max_age: float = STATUS_SNAPSHOT_MAX_AGE,
+    ):
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.version = 0
+        self._built_version = -1
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_at = 0.0
+        self._expires_at = 0.0
+        self.hits = 0
+        self.rebuilds = 0
+
+    def invalidate(self):
+        self.version += 1
+
+    def current(self) -> Optional[Tuple[bytes, str]]:
+        """
+        The cached (body, etag), or None if it has to be rebuilt.
+        """
+        now = time.monotonic()
+        if self._body is None or now >= self._expires_at:
+            return None
+        if self._built_version != self.version and now - self._built_at >= self.min_interval:
+            return None
+        self.hits += 1
+        return self._body, self._etag
+
+    def store(
+        self,
+        statuses: List[SensorStatusItem],
+        version: int,
+        valid_for: Optional[float] = None,
+    ) -> Tuple[bytes, str]:
+        """
+        Cache statuses computed from data as of `version`; `valid_for` is the
+        number of seconds until a sensor's status changes by time alone.
+        """
+        body = json.dumps(jsonable_encoder(statuses), separators=(",", ":")).encode()
+        now = time.monotonic()
+        ttl = self.max_age if valid_for is None else min(self.max_age, valid_for)
+        self._body = body
+        self._etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self._built_version = version
+        self._built_at = now
+        self._expires_at = now + ttl
+        self.rebuilds += 1
+        return self._body, self._etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+status_snapshot = StatusSnapshot()
+
+
+@event.listens_for(Sensor, "after_insert")
+@event.listens_for(Sensor, "after_update")
+@event.listens_for(Sensor, "after_delete")
+def _invalidate_on_sensor_change(mapper, connection, target: Sensor):
+    status_snapshot.invalidate()
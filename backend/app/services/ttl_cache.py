@@ -0,0 +1,101 @@
+# medassistant/backend/app/services/ttl_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe TTL + LRU map: entries expire `ttl` seconds after they
+    are stored, and beyond `max_size` the least recently used go first.
+    Subclasses add the loading from the DB (see SensorMetadataCache,
+    NfcTagCache).
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key: K) -> Optional[V]:
+        # caller holds the lock
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key: K, value: V):
+        # caller holds the lock
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def lookup(self, key: K) -> Optional[V]:
+        """
+        The cached value, or None if missing or expired.
+        """
+        with self._lock:
+            return self._lookup(key)
+
+    def lookup_many(self, keys: Iterable[K]) -> Tuple[Dict[K, V], List[K]]:
+        """
+        ({key: value} of the cached keys, keys that missed).
+        """
+        found: Dict[K, V] = {}
+        missing: List[K] = []
+        with self._lock:
+            for key in set(keys):
+                value = self._lookup(key)
+                if value is None:
+                    missing.append(key)
+                else:
+                    found[key] = value
+        return found, missing
+
+    def put(self, key: K, value: V):
+        with self._lock:
+            self._store(key, value)
+
+    def put_many(self, values: Dict[K, V]):
+        with self._lock:
+            for key, value in values.items():
+                self._store(key, value)
+
+    def invalidate(self, key: K):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
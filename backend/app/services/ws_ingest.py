@@ -0,0 +1,183 @@
+# medassistant/backend/app/services/ws_ingest.py
+import asyncio
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from app.schemas import SensorReadingCreate
+from app.services.reading_stream import persist_and_check
+from app.services.sensor_service import as_naive_utc
+
+# Readings collected before they are written and acknowledged
+WS_ACK_BATCH_SIZE = int(os.getenv("WS_ACK_BATCH_SIZE", "100"))
+# Longest a received reading waits for its acknowledgement (seconds)
+WS_ACK_INTERVAL = float(os.getenv("WS_ACK_INTERVAL", "0.5"))
+# Rejection reasons reported per acknowledgement
+MAX_ACK_ERRORS = 20
+
+
+class GatewayConnection:
+    """
+    Throughput and lag counters of one gateway WebSocket connection.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, user_id: int):
+        self.id = next(self._ids)
+        self.user_id = user_id
+        self.connected_at = datetime.utcnow()
+        self._started = time.monotonic()
+        self.received = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.alerts = 0
+        self.acks = 0
+        self.last_ack_lag_ms = 0.0   # first reading received -> ack sent
+        self.max_ack_lag_ms = 0.0
+        self.data_lag_ms: Optional[float] = None  # ack time - newest reading timestamp
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "connection_id": self.id,
+            "user_id": self.user_id,
+            "connected_at": self.connected_at.isoformat(),
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "alerts": self.alerts,
+            "acks": self.acks,
+            "readings_per_second": round(self.accepted / elapsed, 2),
+            "last_ack_lag_ms": round(self.last_ack_lag_ms, 3),
+            "max_ack_lag_ms": round(self.max_ack_lag_ms, 3),
+            "data_lag_ms": None if self.data_lag_ms is None else round(self.data_lag_ms, 3),
+        }
+
+
+# Open connections, by connection id
+active_connections: dict[int, GatewayConnection] = {}
+
+
+async def _receive_text(websocket: WebSocket) -> Optional[str]:
+    """
+    Next text message; None for a binary frame (receive_text() would fail
+    on it with a KeyError instead).
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+    return message.get("text")
+
+
+def _parse_message(text: str) -> List[dict]:
+    payload = json.loads(text)
+    return payload if isinstance(payload, list) else [payload]
+
+
+async def serve_gateway(
+    websocket: WebSocket,
+    db: AsyncSession,
+    user_id: int,
+):
+    """
+    Receive readings from an accepted gateway WebSocket until it closes.
+
+    Each message is one JSON text frame holding a reading object or a list
+    of them; a binary frame closes the connection with 1008 (policy
+    violation) after the readings received so far are acknowledged. Readings are
+    written and acknowledged in batches of WS_ACK_BATCH_SIZE, or every
+    WS_ACK_INTERVAL seconds, through the same path as the batch endpoint.
+    Each ack reports the batch's accepted/rejected/alert counts and the
+    running total of readings received on the connection.
+    """
+    conn = GatewayConnection(user_id)
+    active_connections[conn.id] = conn
+    loop = asyncio.get_running_loop()
+    pending: List[SensorReadingCreate] = []
+    rejected = 0
+    errors: List[str] = []
+    first_at: Optional[float] = None
+
+    def reject(reason: str):
+        nonlocal rejected
+        conn.received += 1
+        rejected += 1
+        if len(errors) < MAX_ACK_ERRORS:
+            errors.append(reason)
+
+    async def flush(send_ack: bool = True):
+        nonlocal rejected, errors, first_at
+        accepted, unknown, alerts = await persist_and_check(db, pending)
+        for i in unknown:
+            if len(errors) < MAX_ACK_ERRORS:
+                errors.append(f"sensor {pending[i].sensor_id}: Sensor not found")
+        batch_rejected = rejected + len(unknown)
+        conn.accepted += accepted
+        conn.rejected += batch_rejected
+        conn.alerts += alerts
+        now = loop.time()
+        if first_at is not None:
+            conn.last_ack_lag_ms = (now - first_at) * 1000
+            conn.max_ack_lag_ms = max(conn.max_ack_lag_ms, conn.last_ack_lag_ms)
+        if pending:
+            newest = max(as_naive_utc(r.timestamp) for r in pending)
+            conn.data_lag_ms = (datetime.utcnow() - newest).total_seconds() * 1000
+        if send_ack:
+            await websocket.send_json({
+                "received": conn.received,
+                "accepted": accepted,
+                "rejected": batch_rejected,
+                "alerts": alerts,
+                "errors": errors,
+            })
+            conn.acks += 1
+        pending.clear()
+        rejected, errors, first_at = 0, [], None
+
+    try:
+        while True:
+            timeout = None
+            if first_at is not None:
+                timeout = max(0.0, first_at + WS_ACK_INTERVAL - loop.time())
+            try:
+                text = await asyncio.wait_for(_receive_text(websocket), timeout)
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            if text is None:
+                if pending or rejected:
+                    await flush()
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Binary frames are not supported")
+                return
+
+            try:
+                items = _parse_message(text)
+            except ValueError as e:
+                items = []
+                reject(f"invalid message: {e}")
+            for item in items:
+                try:
+                    reading = SensorReadingCreate(**item)
+                except (TypeError, ValueError) as e:
+                    reject(str(e).replace("\n", " "))
+                    continue
+                conn.received += 1
+                pending.append(reading)
+            if first_at is None and (pending or rejected):
+                first_at = loop.time()
+            if len(pending) >= WS_ACK_BATCH_SIZE:
+                await flush()
+    except WebSocketDisconnect:
+        # Keep what was received; the gateway is gone, so no ack
+        if pending:
+            await flush(send_ack=False)
+    finally:
+        active_connections.pop(conn.id, None)
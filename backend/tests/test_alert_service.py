@@ -1,11 +1,18 @@
 import pytest
 from datetime import datetime, timedelta
 
-from app.models import Alert, Sensor, SensorReading, Item
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Alert, Base, Location, Sensor, SensorReading, Item
+from app.services.dedupe_store import MemoryDedupeStore
 from app.services.alert_service import (
+    DEDUPE_TTL,
+    AlertBatch,
     dispatch_alert,
     should_send,
     check_item_expiry,
+    scan_item_expiry,
     detect_sensor_offline,
     check_door_left_ajar
 )
@@ -25,17 +32,17 @@ def make_sensor(id=1, last_ping=None, threshold_min=None, threshold_max=None):
 # ------------------------
 # Test deduplication logic
 # ------------------------
-def test_should_send_debounce():
+def test_should_send_debounce(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.alert_service.dedupe_store",
+                        MemoryDedupeStore(clock=lambda: now[0]))
     key = "unique-key"
     # First call: should send
     assert should_send(key) is True
     # Second call within TTL: should not send
     assert should_send(key) is False
     # After TTL, should send again
-    # Simulate expiry by adjusting internal timestamp
-    import time
-    from app.services.alert_service import _last_sent, DEDUPE_TTL
-    _last_sent[key] = time.time() - DEDUPE_TTL - 1
+    now[0] += DEDUPE_TTL + 1
     assert should_send(key) is True
 
 # ------------------------
@@ -93,6 +100,18 @@ def test_detect_sensor_offline_triggers(monkeypatch):
     detect_sensor_offline([sensor], offline_minutes=10)
     assert calls and calls[0]["category"] == "sensor_offline"
 
+def test_detect_sensor_offline_sees_buffered_ping(monkeypatch):
+    # Stored ping is stale, but a fresh one is waiting to be flushed
+    from app.services.ping_buffer import ping_buffer
+    sensor = make_sensor(id=8, last_ping=datetime.utcnow() - timedelta(minutes=30))
+    ping_buffer.record(8, datetime.utcnow())
+    calls = []
+    monkeypatch.setattr("app.services.alert_service.dispatch_alert",
+                        lambda **kwargs: calls.append(kwargs))
+
+    detect_sensor_offline([sensor], offline_minutes=10)
+    assert calls == []
+
 # ------------------------
 # Test door left ajar logic
 # ------------------------
@@ -110,3 +129,119 @@ def test_check_door_left_ajar_triggers(monkeypatch):
 
     check_door_left_ajar([reading], open_value=1.0, max_open_minutes=5)
     assert calls and calls[0]["category"] == "door_left_ajar"
+
+# ------------------------
+# Test set-based expiry scan
+# ------------------------
+def test_scan_item_expiry_writes_alerts_in_chunks(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    today = datetime.utcnow().date()
+    db.add(Location(id=1, name="Pharmacy"))
+    db.add_all([
+        Item(id=i, nfc_tag=f"X{i}", name=f"Item {i}", batch="B1",
+             expiry_date=today + timedelta(days=i - 5), location_id=1)
+        for i in range(1, 11)
+    ])
+    db.commit()
+    sent = []
+    monkeypatch.setattr("app.services.alert_service._send_notifications",
+                        lambda channels, message: sent.append(message))
+    monkeypatch.setattr("app.services.alert_service.dedupe_store", MemoryDedupeStore())
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    # items 1..5 expired or expire today, 6 and 7 within two days
+    assert scan_item_expiry(db, days_before=2, chunk_size=3) == 7
+    alerts = db.query(Alert).order_by(Alert.related_item_id).all()
+    assert [a.related_item_id for a in alerts] == [1, 2, 3, 4, 5, 6, 7]
+    assert alerts[0].message.endswith("expired on " + str(today - timedelta(days=4)))
+    assert "will expire" in alerts[4].message
+    assert len(sent) == 7
+    # 3 chunks read, 3 bulk inserts
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 3
+
+    # already alerted items are deduplicated
+    assert scan_item_expiry(db, days_before=2) == 0
+    db.close()
+
+# ------------------------
+# Test batched alert sink
+# ------------------------
+def test_alert_batch_writes_one_insert_per_flush(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    sent = []
+    monkeypatch.setattr("app.services.alert_service._send_notifications",
+                        lambda channels, message: sent.append((tuple(channels), message)))
+    monkeypatch.setattr("app.services.alert_service.dedupe_store", MemoryDedupeStore())
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    sensors = [make_sensor(id=i) for i in (20, 21, 22)]
+    with AlertBatch(db) as batch:
+        detect_sensor_offline(sensors, offline_minutes=10, sink=batch)
+        assert batch.add(category="sensor_offline", message="again", sensor_id=20) is False  # deduped
+        batch.add(category="door_left_ajar", message="door 3 open", sensor_id=3)
+        assert db.query(Alert).count() == 0  # nothing written before the flush
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 1
+    assert batch.written == 4
+    assert sorted(a.sensor_id for a in db.query(Alert)) == [3, 20, 21, 22]
+    assert sent[-1] == (("email",), "door 3 open")
+    assert batch.flush() == 0
+    db.close()
+
+def test_alert_batch_releases_dedupe_keys_when_insert_fails(monkeypatch):
+    engine = create_engine("sqlite://")
+    db = sessionmaker(bind=engine)()  # no tables: the INSERT fails
+    monkeypatch.setattr("app.services.alert_service._send_notifications", lambda channels, message: None)
+    monkeypatch.setattr("app.services.alert_service.dedupe_store", MemoryDedupeStore())
+
+    batch = AlertBatch(db)
+    assert batch.add(category="door_left_ajar", message="door 3 open", sensor_id=3)
+    with pytest.raises(Exception):
+        batch.flush()
+    assert batch.written == 0
+
+    # Not suppressed as a duplicate: the next run raises it again
+    Base.metadata.create_all(engine)
+    assert batch.add(category="door_left_ajar", message="door 3 open", sensor_id=3)
+    assert batch.flush() == 1
+    db.close()
+
+def test_alert_batch_flushes_queued_alerts_when_rule_fails(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    monkeypatch.setattr("app.services.alert_service._send_notifications", lambda channels, message: None)
+    monkeypatch.setattr("app.services.alert_service.dedupe_store", MemoryDedupeStore())
+
+    with pytest.raises(RuntimeError):
+        with AlertBatch(db) as batch:
+            batch.add(category="door_left_ajar", message="door 3 open", sensor_id=3)
+            raise RuntimeError("rule failed")
+    assert batch.written == 1
+    assert db.query(Alert).count() == 1
+    db.close()
+
+def test_alert_batch_claims_dedupe_keys_once_per_flush(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    monkeypatch.setattr("app.services.alert_service._send_notifications", lambda channels, message: None)
+    store = MemoryDedupeStore()
+    monkeypatch.setattr("app.services.alert_service.dedupe_store", store)
+    store.claim("sensor_offline::21", ttl=3600)  # sent by an earlier run
+    claims = []
+    claim_many = store.claim_many
+    monkeypatch.setattr(store, "claim_many", lambda keys, ttl: claims.append(keys) or claim_many(keys, ttl))
+    monkeypatch.setattr(store, "claim", lambda key, ttl: pytest.fail("claimed one key at a time"))
+
+    with AlertBatch(db) as batch:
+        detect_sensor_offline([make_sensor(id=i) for i in (20, 21, 22)], offline_minutes=10, sink=batch)
+    assert len(claims) == 1
+    assert batch.written == 2
+    assert sorted(a.sensor_id for a in db.query(Alert)) == [20, 22]
+    db.close()
@@ -0,0 +1,122 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.models import Alert, Base, Item, Location, Sensor, User
+from app.db_session import get_db
+from app.auth_security import get_current_user
+from app.services import keyset
+
+# StaticPool: one in-memory DB shared by the threads serving sync endpoints
+ENGINE = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(bind=ENGINE)
+T0 = datetime(2025, 6, 1, 12, 0)
+
+def override_get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_app():
+    Base.metadata.create_all(ENGINE)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="o@example.com", role="operator")
+
+    db = SessionLocal()
+    db.add_all([Location(id=1, name="Pharmacy"), Location(id=2, name="Ward")])
+    db.add_all([
+        Sensor(id=1, name="Fridge", type="temperature", location_id=1),
+        Sensor(id=2, name="Freezer", type="temperature", location_id=2),
+    ])
+    db.add(Item(id=1, nfc_tag="A1", name="Insulin", batch="B", expiry_date=date(2026, 1, 1), location_id=2))
+    # 10 alerts, one minute apart; the even ones from sensor 1, every third resolved
+    db.add_all([
+        Alert(
+            id=i,
+            category="above_threshold" if i % 2 == 0 else "offline",
+            sensor_id=1 if i % 2 == 0 else 2,
+            timestamp=T0 + timedelta(minutes=i),
+            message=f"alert {i}",
+            severity="critical" if i < 4 else "warning",
+            resolved=i % 3 == 0,
+        )
+        for i in range(1, 11)
+    ])
+    db.add(Alert(id=11, category="expiry", related_item_id=1, timestamp=T0, message="expiring", severity="info"))
+    db.commit()
+    db.close()
+
+    yield
+
+    app.dependency_overrides.pop(get_current_user, None)
+    Base.metadata.drop_all(ENGINE)
+
+
+client = TestClient(app)
+
+def _all_pages(params):
+    ids = []
+    params = dict(params)
+    while True:
+        response = client.get("/alerts/", params=params)
+        assert response.status_code == 200
+        ids.extend(alert["id"] for alert in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+        params["cursor"] = cursor
+
+def test_list_alerts_cursor_pagination():
+    assert _all_pages({"limit": 3}) == [10, 8, 7, 5, 4, 2, 1, 11]
+    assert _all_pages({"status": "all", "limit": 4}) == [10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 11]
+    assert client.get("/alerts/", params={"cursor": "bogus"}).status_code == 400
+    # Forged timestamp out of datetime's range
+    forged = keyset.encode_cursor(10 ** 20, 1)
+    assert client.get("/alerts/", params={"cursor": forged}).status_code == 400
+
+def test_list_alerts_filters():
+    assert _all_pages({"severity": "critical"}) == [2, 1]
+    assert _all_pages({"category": "offline", "status": "all"}) == [9, 7, 5, 3, 1]
+    assert _all_pages({"sensor_id": 1}) == [10, 8, 4, 2]
+    assert _all_pages({"location_id": 2}) == [7, 5, 1, 11]
+    window = {"from": "2025-06-01T12:04:00", "to": "2025-06-01T14:08:00+02:00"}
+    assert _all_pages(window) == [7, 5, 4]
+
+def test_alert_summary():
+    summary = client.get("/alerts/summary").json()
+    assert summary == {
+        "total": 8,
+        "by_severity": {"critical": 2, "warning": 5, "info": 1},
+        "by_category": {"above_threshold": 4, "offline": 3, "expiry": 1},
+    }
+    assert client.get("/alerts/summary", params={"status": "all", "sensor_id": 2}).json()["total"] == 5
+
+def test_bulk_resolve():
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, email="a@example.com", role="auditor")
+    try:
+        assert client.post("/alerts/resolve", json={}).status_code == 400
+        response = client.post("/alerts/resolve", json={"sensor_id": 1, "before": "2025-06-01T12:05:00"})
+        assert response.status_code == 200
+        assert sorted(a["id"] for a in response.json()) == [2, 4]
+        assert all(a["resolved"] and a["resolved_at"] for a in response.json())
+        # already resolved alerts are not returned again
+        response = client.post("/alerts/resolve", json={"ids": [2, 5, 6], "category": "offline"})
+        assert [a["id"] for a in response.json()] == [5]
+        assert client.get("/alerts/summary").json()["total"] == 5
+    finally:
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email="o@example.com", role="operator")
+
+def test_bulk_resolve_requires_role():
+    assert client.post("/alerts/resolve", json={"ids": [1]}).status_code == 403
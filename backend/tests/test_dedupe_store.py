@@ -0,0 +1,75 @@
+import threading
+
+from sqlalchemy import create_engine, event
+
+from app.services.dedupe_store import DatabaseDedupeStore, MemoryDedupeStore
+
+def test_memory_store_ttl_and_bound():
+    now = [0.0]
+    store = MemoryDedupeStore(max_size=2, retention=60, clock=lambda: now[0])
+    assert store.claim("a", ttl=10) is True
+    assert store.claim("a", ttl=10) is False
+    store.release("a")  # its alert wasn't written
+    assert store.claim("a", ttl=10) is True
+    now[0] = 11
+    assert store.claim("a", ttl=10) is True
+    store.claim("b", ttl=10)
+    store.claim("c", ttl=10)  # over max_size: least recently sent "a" goes
+    assert store.evictions == 1
+    assert store.claim("a", ttl=10) is True
+
+def test_memory_store_evicts_expired_oldest_first():
+    now = [0.0]
+    store = MemoryDedupeStore(retention=60, clock=lambda: now[0])
+    store.claim("old", ttl=10)
+    now[0] = 50
+    store.claim("new", ttl=10)
+    now[0] = 70
+    assert store.evict_expired() == 1
+    assert store.claim("new", ttl=30) is False
+    assert store.claim("old", ttl=30) is True
+
+def test_database_store_is_shared_between_workers(tmp_path):
+    # Two stores on the same file, as two worker processes would have
+    url = f"sqlite:///{tmp_path / 'dedupe.db'}"
+    first = DatabaseDedupeStore(create_engine(url), retention=60)
+    second = DatabaseDedupeStore(create_engine(url), retention=60)
+    assert first.claim("k", ttl=3600) is True
+    assert second.claim("k", ttl=3600) is False
+    assert second.claim("k", ttl=-1) is True  # stale: may be sent again
+    first.release("k")
+    assert second.claim("k", ttl=3600) is True
+    assert first.evict_expired() == 0
+    second.retention = -1
+    assert second.evict_expired() == 1
+
+def test_claim_many_in_one_statement(tmp_path):
+    url = f"sqlite:///{tmp_path / 'dedupe.db'}"
+    engine = create_engine(url)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for store in (MemoryDedupeStore(), DatabaseDedupeStore(engine, retention=60)):
+        assert store.claim("a", ttl=3600) is True
+        statements.clear()
+        assert store.claim_many(["a", "b", "c", "b"], ttl=3600) == {"b", "c"}
+        assert store.claim_many(["b", "d"], ttl=3600) == {"d"}
+        store.release_many({"b", "c"})
+        assert store.claim_many(["a", "b", "c"], ttl=3600) == {"b", "c"}
+        assert store.claim_many([], ttl=3600) == set()
+    # Database store: one upsert per claim_many, one delete per release_many
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 3
+    assert sum(s.lstrip().upper().startswith("DELETE") for s in statements) == 1
+
+def test_database_store_claims_once_under_concurrency(tmp_path):
+    url = f"sqlite:///{tmp_path / 'dedupe.db'}"
+    stores = [DatabaseDedupeStore(create_engine(url, connect_args={"timeout": 30})) for _ in range(8)]
+    stores[0].clear()
+    results = []
+    def worker(store):
+        results.append(store.claim("power_failure::", ttl=3600))
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [False] * 7 + [True]
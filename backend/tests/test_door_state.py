@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, DoorOpenState, Sensor, SensorReading
+from app.schemas import SensorReadingCreate
+from app.services.alert_service import check_open_doors
+from app.services.door_state import backfill_door_states, get_open_doors
+from app.services.sensor_cache import sensor_cache
+from app.services.sensor_service import (
+    backfill_sensor_latest,
+    ingest_and_check,
+    ingest_batch_and_check,
+)
+
+# Use an in-memory SQLite DB for testing
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+T0 = datetime(2025, 6, 1, 12, 0)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    sensor_cache.clear()
+    db = SessionLocal()
+    db.add_all([
+        Sensor(id=1, name="Fridge door", type="door", location_id=1),
+        Sensor(id=2, name="Store door", type="door", location_id=1),
+        Sensor(id=3, name="Fridge", type="temperature", location_id=1),
+    ])
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+    sensor_cache.clear()
+
+def states(db):
+    return {s.sensor_id: s.open_since for s in db.query(DoorOpenState)}
+
+def test_ingest_tracks_open_close_transitions(setup_db):
+    db = setup_db
+    ingest_and_check(db, sensor_id=1, timestamp=T0, value=1.0)
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=1), value=1.0)
+    ingest_and_check(db, sensor_id=3, timestamp=T0, value=1.0)  # not a door
+    assert states(db) == {1: T0}  # still open since the first open reading
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=2), value=0.0)
+    assert states(db) == {}
+    # a late close from before the door was reopened doesn't close it
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=5), value=1.0)
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=3), value=0.0)
+    assert states(db) == {1: T0 + timedelta(minutes=5)}
+
+def test_late_open_before_latest_close_is_ignored(setup_db):
+    db = setup_db
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=10), value=0.0)
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=2), value=1.0)
+    ingest_batch_and_check(db, [SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(minutes=3), value=1.0)])
+    assert states(db) == {}
+    # Opening after the close still counts
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=11), value=1.0)
+    assert states(db) == {1: T0 + timedelta(minutes=11)}
+
+def test_batch_ingest_applies_final_state(setup_db):
+    db = setup_db
+    ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=T0, value=1.0),
+        SensorReadingCreate(sensor_id=2, timestamp=T0, value=1.0),
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(minutes=1), value=0.0),
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(minutes=3), value=1.0),
+        SensorReadingCreate(sensor_id=2, timestamp=T0 + timedelta(minutes=2), value=0.0),
+    ])
+    assert states(db) == {1: T0 + timedelta(minutes=3)}
+
+def test_only_long_open_doors_alert(setup_db, monkeypatch):
+    db = setup_db
+    now = datetime.utcnow()
+    ingest_and_check(db, sensor_id=1, timestamp=now - timedelta(minutes=30), value=1.0)
+    ingest_and_check(db, sensor_id=2, timestamp=now - timedelta(minutes=1), value=1.0)
+    calls = []
+    monkeypatch.setattr("app.services.alert_service.dispatch_alert",
+                        lambda **kwargs: calls.append(kwargs))
+
+    open_doors = get_open_doors(db, opened_before=now - timedelta(minutes=5))
+    assert [d.sensor_id for d in open_doors] == [1]
+    check_open_doors(open_doors, max_open_minutes=5)
+    assert [c["sensor_id"] for c in calls] == [1]
+
+def test_backfill_door_states(setup_db):
+    db = setup_db
+    db.add_all([
+        SensorReading(sensor_id=1, timestamp=T0, value=1.0),
+        SensorReading(sensor_id=1, timestamp=T0 + timedelta(minutes=1), value=0.0),
+        SensorReading(sensor_id=1, timestamp=T0 + timedelta(minutes=2), value=1.0),
+        SensorReading(sensor_id=1, timestamp=T0 + timedelta(minutes=3), value=1.0),
+        SensorReading(sensor_id=2, timestamp=T0, value=0.0),
+    ])
+    db.commit()
+    backfill_sensor_latest(db)
+    assert backfill_door_states(db) == 1
+    assert states(db) == {1: T0 + timedelta(minutes=2)}
+    assert backfill_door_states(db) == 0
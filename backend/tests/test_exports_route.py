@@ -0,0 +1,115 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.models import Base, Event, Item, Location, Sensor, SensorReading, User
+from app.auth_security import get_current_user
+from app.db_session import get_async_db
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "exports.db")
+ENGINE = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = sessionmaker(bind=ENGINE)
+ASYNC_ENGINE = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", poolclass=NullPool)
+AsyncSessionLocal = async_sessionmaker(bind=ASYNC_ENGINE, expire_on_commit=False)
+
+T0 = datetime(2025, 6, 30, 14, 30)
+
+async def override_get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_app():
+    Base.metadata.create_all(ENGINE)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="a@example.com", role="auditor")
+
+    db = SessionLocal()
+    db.add_all([Location(id=1, name="Pharmacy"), Location(id=2, name="Ward")])
+    db.add_all([
+        Sensor(id=1, name="Fridge A", type="temperature", location_id=1),
+        Sensor(id=2, name="Fridge B", type="temperature", location_id=1),
+        Sensor(id=3, name="Ward", type="temperature", location_id=2),
+    ])
+    db.add(User(id=1, email="a@example.com", hashed_password="x", role="auditor"))
+    db.flush()
+    for sensor_id in (1, 2, 3):
+        db.add_all([
+            SensorReading(sensor_id=sensor_id, timestamp=T0 + timedelta(minutes=m), value=float(m))
+            for m in range(10)
+        ])
+    db.add_all([
+        Item(id=1, nfc_tag="TAG1", name="Insulin", batch="B1", expiry_date=date(2026, 1, 1), location_id=1),
+        Item(id=2, nfc_tag="TAG2", name="Saline", batch="B2", expiry_date=date(2026, 1, 1), location_id=2),
+    ])
+    db.flush()
+    for item_id in (1, 2, 1):
+        db.add(Event(item_id=item_id, event_type="entry", timestamp=T0, user_id=1, metadata_='{"x": 1}'))
+    db.commit()
+    db.close()
+
+    yield
+
+    app.dependency_overrides.pop(get_current_user, None)
+    Base.metadata.drop_all(ENGINE)
+
+
+client = TestClient(app)
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+def test_export_readings_csv_by_location(monkeypatch):
+    # Several chunks per sensor
+    monkeypatch.setattr("app.services.exports.EXPORT_CHUNK_SIZE", 3)
+    response = client.get("/exports/readings", params={"location_id": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "readings.csv" in response.headers["content-disposition"]
+    rows = _csv(response)
+    assert len(rows) == 20
+    assert [r["sensor_id"] for r in rows] == ["1"] * 10 + ["2"] * 10
+    assert rows[0]["timestamp"] == T0.isoformat()
+    assert rows[0]["sensor_name"] == "Fridge A"
+
+def test_export_readings_time_range():
+    response = client.get("/exports/readings", params={
+        "sensor_id": 3,
+        "from": (T0 + timedelta(minutes=2)).isoformat(),
+        "to": (T0 + timedelta(minutes=5)).isoformat(),
+    })
+    assert [r["value"] for r in _csv(response)] == ["2.0", "3.0", "4.0"]
+
+def test_export_events_csv_by_batch():
+    response = client.get("/exports/events", params={"batch": "B1"})
+    assert response.status_code == 200
+    rows = _csv(response)
+    assert [r["item_id"] for r in rows] == ["1", "1"]
+    assert rows[0]["nfc_tag"] == "TAG1"
+    assert rows[0]["metadata"] == '{"x": 1}'
+
+def test_export_readings_parquet():
+    response = client.get("/exports/readings", params={"format": "parquet", "sensor_id": 1})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 10
+    assert table.column("value").to_pylist() == [float(m) for m in range(10)]
+
+def test_export_requires_auditor_role():
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, email="o@example.com", role="operator")
+    try:
+        response = client.get("/exports/events")
+        assert response.status_code == 403
+    finally:
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email="a@example.com", role="auditor")
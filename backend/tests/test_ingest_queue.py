@@ -0,0 +1,108 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Sensor, SensorReading
+from app.schemas import SensorReadingCreate
+from app.services.ingest_queue import IngestQueue
+
+# Use an in-memory SQLite DB for testing; StaticPool shares the one
+# connection with the flusher thread
+ENGINE = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(bind=ENGINE)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    db = SessionLocal()
+    db.add(Sensor(
+        id=1,
+        name="TempSensor1",
+        type="temperature",
+        threshold_min=10.0,
+        threshold_max=30.0,
+        location_id=1
+    ))
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+
+def make_reading(value, sensor_id=1):
+    return SensorReadingCreate(sensor_id=sensor_id, timestamp=datetime.utcnow(), value=value)
+
+def test_group_commit_and_alerting(monkeypatch, setup_db):
+    called = []
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        lambda sensor, reading, alert_type: called.append((reading.value, alert_type))
+    )
+    q = IngestQueue(max_size=10, batch_size=2, flush_interval=0.01, session_factory=SessionLocal)
+    for value in (20.0, 35.0, 5.0):
+        assert q.submit(make_reading(value))
+
+    assert q.flush_once() == 2
+    assert q.flush_once() == 1
+    assert q.flush_once() == 0
+    assert setup_db.query(SensorReading).count() == 3
+    assert called == [(35.0, "above_threshold"), (5.0, "below_threshold")]
+    stats = q.stats()
+    assert (stats["batches"], stats["flushed"], stats["queue_depth"]) == (2, 3, 0)
+
+def test_full_queue_rejects(setup_db):
+    q = IngestQueue(max_size=1, session_factory=SessionLocal)
+    assert q.submit(make_reading(20.0))
+    assert not q.submit(make_reading(21.0))
+    assert q.stats()["rejected"] == 1
+
+def test_failed_commit_is_retried(monkeypatch, setup_db):
+    q = IngestQueue(max_size=10, flush_interval=0.01, session_factory=SessionLocal)
+    q.submit(make_reading(20.0))
+
+    def broken(db, readings):
+        raise RuntimeError("db down")
+    monkeypatch.setattr("app.services.ingest_queue.persist_batch", broken)
+    assert q.flush_once() == 0
+    assert q.depth() == 1
+
+    monkeypatch.undo()
+    assert q.flush_once() == 1
+    assert setup_db.query(SensorReading).count() == 1
+    assert q.stats()["discarded"] == 0
+
+def test_failing_batch_is_discarded_after_max_attempts(monkeypatch, setup_db):
+    q = IngestQueue(max_size=10, flush_interval=0.01, max_attempts=3, session_factory=SessionLocal)
+    q.submit(make_reading(20.0))
+    q.submit(make_reading(21.0, sensor_id=999))  # unknown sensor
+
+    def broken(db, readings):
+        raise RuntimeError("bad row")
+    monkeypatch.setattr("app.services.ingest_queue.persist_batch", broken)
+    delays = []
+    for _ in range(3):
+        delays.append(q.retry_delay())
+        assert q.flush_once() == 0
+    assert delays == [0.01, 0.01, 0.02]
+    stats = q.stats()
+    assert (stats["failures"], stats["discarded"], stats["dropped"], stats["queue_depth"]) == (3, 2, 0, 0)
+
+    # Ingestion continues with the next batch
+    monkeypatch.undo()
+    q.submit(make_reading(22.0))
+    assert q.flush_once() == 1
+    assert setup_db.query(SensorReading).count() == 1
+
+def test_background_flusher_drains_on_stop(setup_db):
+    q = IngestQueue(max_size=100, flush_interval=0.01, session_factory=SessionLocal)
+    q.start()
+    for i in range(50):
+        q.submit(make_reading(20.0))
+    q.stop()
+    assert q.depth() == 0
+    assert setup_db.query(SensorReading).count() == 50
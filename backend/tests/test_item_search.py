@@ -0,0 +1,63 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Item, Location
+from app.services.item_search import item_search_index
+from app.services.item_service import get_items, get_items_page
+
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    item_search_index.reset()
+    db = SessionLocal()
+    db.add(Location(id=1, name="Pharmacy"))
+    db.add_all([
+        Item(id=1, nfc_tag="NFC-0001", name="Insulin glargine", batch="INS-2025", expiry_date=date(2026, 1, 1), location_id=1),
+        Item(id=2, nfc_tag="NFC-0002", name="Saline 0.9%", batch="SAL-7", expiry_date=date(2026, 1, 1), location_id=1),
+        Item(id=3, nfc_tag="INS", name="Heparin", batch="HEP-1", expiry_date=date(2026, 1, 1), location_id=1),
+        Item(id=4, nfc_tag="NFC-0004", name="Rapid insulin", batch="R-1", expiry_date=date(2026, 1, 1), location_id=1),
+    ])
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+    item_search_index.reset()
+
+def test_search_ranks_exact_then_prefix_then_substring(setup_db):
+    db = setup_db
+    # exact tag "INS", then prefix (name/batch "Ins..."), then substring
+    assert item_search_index.search(db, "ins") == [3, 1, 4]
+
+def test_search_short_terms_and_misses(setup_db):
+    db = setup_db
+    assert item_search_index.search(db, "0.") == [2]
+    assert item_search_index.search(db, "morphine") == []
+
+def test_search_follows_item_changes(setup_db):
+    db = setup_db
+    assert item_search_index.search(db, "saline") == [2]
+    item = db.get(Item, 2)
+    item.name = "Glucose 5%"
+    db.add(Item(id=5, nfc_tag="NFC-0005", name="Saline 0.45%", batch="SAL-8", expiry_date=date(2026, 1, 1), location_id=1))
+    db.delete(db.get(Item, 4))
+    db.commit()
+    assert item_search_index.search(db, "saline") == [5]
+    assert item_search_index.search(db, "glucose") == [2]
+    assert item_search_index.search(db, "rapid") == []
+
+def test_get_items_uses_search_index(setup_db):
+    db = setup_db
+    assert [i.id for i in get_items(db, q="INSULIN")] == [1, 4]
+    assert [i.id for i in get_items(db, q="insulin", sort="name", order="desc")] == [4, 1]
+    items, cursor = get_items_page(db, q="ins", sort="relevance", limit=2)
+    assert [i.id for i in items] == [3, 1]
+    assert cursor is None
+    items, _ = get_items_page(db, q="ins", sort="relevance", limit=2, offset=2)
+    assert [i.id for i in items] == [4]
+    with pytest.raises(ValueError):
+        get_items_page(db, q="ins", sort="relevance", cursor="x")
@@ -0,0 +1,83 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Item, Location
+from app.services import keyset
+from app.services.item_service import get_items, get_items_page
+
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    db = SessionLocal()
+    db.add(Location(id=1, name="Pharmacy"))
+    # Few distinct names/dates, so the id tiebreaker matters
+    db.add_all([
+        Item(
+            id=i,
+            nfc_tag=f"TAG{i:03d}",
+            name=["Insulin", "Saline", "Heparin"][i % 3],
+            batch=f"B{i % 4}",
+            expiry_date=date(2026, 1 + i % 2, 1),
+            location_id=1,
+            status="in_stock" if i % 5 else "in_transit",
+        )
+        for i in range(1, 24)
+    ])
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+
+def _walk(db, **kwargs):
+    ids, cursor = [], None
+    while True:
+        items, cursor = get_items_page(db, limit=5, cursor=cursor, **kwargs)
+        ids.extend(item.id for item in items)
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize("sort", ["name", "batch", "expiry_date", "status", "nfc_tag", "id"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_match_full_listing(setup_db, sort, order):
+    db = setup_db
+    expected = [item.id for item in get_items(db, sort=sort, order=order, limit=1000)]
+    assert len(expected) == 23
+    assert _walk(db, sort=sort, order=order) == expected
+
+def test_cursor_with_search(setup_db):
+    db = setup_db
+    expected = [item.id for item in get_items(db, q="sal", limit=1000)]
+    assert _walk(db, q="sal") == expected
+
+def test_cursor_not_affected_by_inserts(setup_db):
+    db = setup_db
+    first, cursor = get_items_page(db, sort="id", limit=5)
+    # A row sorting before the cursor doesn't shift the next page
+    db.add(Item(id=0, nfc_tag="TAG000", name="A", batch="B0", expiry_date=date(2026, 1, 1), location_id=1))
+    db.commit()
+    second, _ = get_items_page(db, sort="id", limit=5, cursor=cursor)
+    assert [item.id for item in second] == [6, 7, 8, 9, 10]
+
+def test_cursor_must_match_sort(setup_db):
+    db = setup_db
+    _, cursor = get_items_page(db, sort="name", limit=5)
+    with pytest.raises(ValueError):
+        get_items_page(db, sort="batch", cursor=cursor)
+    with pytest.raises(ValueError):
+        get_items_page(db, cursor="garbage")
+    # Forged sort value of the wrong type
+    with pytest.raises(ValueError):
+        get_items_page(db, sort="name", cursor=keyset.encode_cursor("name", "asc", ["x"], 1))
+    with pytest.raises(ValueError):
+        get_items_page(db, sort="id", cursor=keyset.encode_cursor("id", "asc", "x", 1))
+
+def test_offset_mode_still_supported(setup_db):
+    db = setup_db
+    items, cursor = get_items_page(db, sort="id", limit=5, offset=20)
+    assert [item.id for item in items] == [21, 22, 23]
+    assert cursor is None
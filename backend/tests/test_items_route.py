@@ -0,0 +1,158 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.models import Base, Event, Item, Location, User
+from app.db_session import get_db
+from app.auth_security import get_current_user
+from app.services.nfc_tag_cache import TagEntry, nfc_tag_cache
+
+# StaticPool: one in-memory DB shared by the threads serving sync endpoints
+ENGINE = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(bind=ENGINE)
+
+def override_get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_app():
+    Base.metadata.create_all(ENGINE)
+    app.dependency_overrides[get_db] = override_get_db
+
+    db = SessionLocal()
+    db.add(Location(id=1, name="Pharmacy"))
+    db.add_all([
+        Item(id=i, nfc_tag=f"TAG{i}", name=f"Item {i % 3}", batch="B1",
+             expiry_date=date(2026, 1, 1), location_id=1)
+        for i in range(1, 8)
+    ])
+    db.commit()
+    db.close()
+
+    yield
+
+    Base.metadata.drop_all(ENGINE)
+
+
+client = TestClient(app)
+
+def test_list_items_cursor_pagination():
+    ids = []
+    params = {"sort": "name", "limit": 3}
+    while True:
+        response = client.get("/items/", params=params)
+        assert response.status_code == 200
+        ids.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    assert ids == [3, 6, 1, 4, 7, 2, 5]
+
+def test_list_items_bad_cursor():
+    assert client.get("/items/", params={"cursor": "nope"}).status_code == 400
+    assert client.get("/items/", params={"cursor": "x", "offset": 3}).status_code == 400
+
+def test_scan_nfc_uses_tag_cache():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="o@example.com", role="operator")
+    nfc_tag_cache.clear()
+    try:
+        response = client.post("/items/scan-nfc/", json={"tag_id": "TAG2", "event_type": "exit"})
+        assert response.status_code == 200
+        assert response.json() == {"message": "Event recorded", "item_id": 2, "item_status": "in_transit"}
+        response = client.post("/items/scan-nfc/", json={"tag_id": "TAG2", "event_type": "entry"})
+        assert response.json()["item_status"] == "in_stock"
+        assert client.post("/items/scan-nfc/", json={"tag_id": "NOPE", "event_type": "entry"}).status_code == 404
+
+        stats = client.get("/items/nfc-cache/stats").json()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        db = SessionLocal()
+        assert db.get(Item, 2).status == "in_stock"
+        assert db.query(Event).filter(Event.item_id == 2).count() == 2
+        db.close()
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_scan_nfc_stale_entry_is_dropped():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="o@example.com", role="operator")
+    try:
+        nfc_tag_cache.put("GONE", TagEntry(999, "in_stock"))
+        response = client.post("/items/scan-nfc/", json={"tag_id": "GONE", "event_type": "exit"})
+        assert response.status_code == 404
+        assert client.post("/items/scan-nfc/", json={"tag_id": "GONE", "event_type": "exit"}).status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_sync_scans_records_in_order():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="o@example.com", role="operator")
+    try:
+        scans = [
+            {"tag_id": "TAG3", "event_type": "exit", "timestamp": "2025-06-01T08:00:00Z"},
+            {"tag_id": "NOPE", "event_type": "exit", "timestamp": "2025-06-01T08:00:05Z"},
+            {"tag_id": "TAG4", "event_type": "exit", "timestamp": "2025-06-01T08:01:00Z"},
+            {"tag_id": "TAG3", "event_type": "entry", "timestamp": "2025-06-01T10:00:00+02:00"},
+            {"tag_id": "TAG4", "event_type": "moved", "timestamp": "2025-06-01T08:02:00Z"},
+        ]
+        response = client.post("/items/scan-nfc/sync/", json={"scans": scans})
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status"] for r in results] == ["recorded", "not_found", "recorded", "recorded", "recorded"]
+        assert [r["item_status"] for r in results] == ["in_transit", None, "in_transit", "in_stock", "in_transit"]
+
+        db = SessionLocal()
+        assert db.get(Item, 3).status == "in_stock"
+        assert db.get(Item, 4).status == "in_transit"
+        events = db.query(Event).filter(Event.item_id == 3).order_by(Event.id).all()
+        assert [e.event_type for e in events] == ["exit", "entry"]
+        assert events[1].timestamp == datetime(2025, 6, 1, 8, 0)  # stored as naive UTC
+        assert nfc_tag_cache.get(db, "TAG4").status == "in_transit"
+        db.close()
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+def test_list_items_includes():
+    db = SessionLocal()
+    db.add_all([
+        Event(item_id=7, event_type=t, timestamp=datetime(2025, 1, 1, h), user_id=1)
+        for h, t in ((1, "entry"), (2, "exit"), (3, "entry"))
+    ])
+    db.commit()
+    db.close()
+
+    statements = []
+
+    def listener(*args):
+        statements.append(args[2])
+
+    event.listen(ENGINE, "before_cursor_execute", listener)
+    try:
+        default = client.get("/items/", params={"sort": "id", "limit": 1000}).json()
+        assert len(statements) == 1  # items joined with their location
+        statements.clear()
+        full = client.get("/items/", params={"sort": "id", "include": "location,events"}).json()
+        assert len(statements) == 2  # + one selectin load of all events
+        statements.clear()
+        latest = client.get("/items/", params={"sort": "id", "include": "events:2"}).json()
+        assert len(statements) == 2  # + one windowed query
+    finally:
+        event.remove(ENGINE, "before_cursor_execute", listener)
+
+    assert "events" not in default[0] and default[0]["location"]["name"] == "Pharmacy"
+    assert len(full[6]["events"]) == 3
+    assert "location" not in latest[6]
+    assert [e["event_type"] for e in latest[6]["events"]] == ["exit", "entry"]
+    assert client.get("/items/", params={"include": "events:0"}).status_code == 400
+    assert client.get("/items/", params={"include": "owner"}).status_code == 400
@@ -0,0 +1,17 @@
+import pytest
+from datetime import datetime
+
+from app.services.keyset import decode_cursor, encode_cursor, from_micros, to_micros
+
+def test_cursor_round_trip():
+    ts = datetime(2025, 6, 30, 14, 30, 0, 123456)
+    cursor = encode_cursor("name", "asc", "Gauze", to_micros(ts), 42)
+    assert "=" not in cursor
+    name_sort, order, value, micros, row_id = decode_cursor(cursor, 5)
+    assert (name_sort, order, value, row_id) == ("name", "asc", "Gauze", 42)
+    assert from_micros(micros) == ts
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1, 2), encode_cursor({"a": 1})])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 3)
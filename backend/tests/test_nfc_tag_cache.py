@@ -0,0 +1,72 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Item, Location
+from app.services.nfc_tag_cache import NfcTagCache, nfc_tag_cache
+
+# Use an in-memory SQLite DB for testing
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+def make_item(id, tag):
+    return Item(id=id, nfc_tag=tag, name=f"Item {id}", batch="B1",
+                expiry_date=date(2026, 1, 1), location_id=1)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    db = SessionLocal()
+    db.add(Location(id=1, name="Pharmacy"))
+    db.add_all([make_item(1, "T1"), make_item(2, "T2"), make_item(3, "T3")])
+    db.commit()
+    nfc_tag_cache.clear()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+    nfc_tag_cache.clear()
+
+def test_hit_and_miss_counters(setup_db):
+    cache = NfcTagCache(ttl=60, max_size=10)
+    assert cache.get(setup_db, "T1") == (1, "in_stock")
+    assert cache.get(setup_db, "T1").item_id == 1
+    assert cache.get(setup_db, "NOPE") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+
+def test_lru_eviction(setup_db):
+    cache = NfcTagCache(ttl=60, max_size=2)
+    cache.get(setup_db, "T1")
+    cache.get(setup_db, "T2")
+    cache.get(setup_db, "T1")  # T2 is now least recently used
+    cache.get(setup_db, "T3")
+    assert cache.stats()["evictions"] == 1
+    cache.get(setup_db, "T1")
+    assert cache.stats()["hits"] == 2
+
+def test_write_through_on_item_writes(setup_db):
+    db = setup_db
+    db.add(make_item(4, "T4"))
+    db.commit()
+    assert nfc_tag_cache.stats()["size"] == 1
+    assert nfc_tag_cache.get(db, "T4") == (4, "in_stock")
+
+    item = db.get(Item, 1)
+    item.status = "in_transit"
+    db.commit()
+    hits = nfc_tag_cache.stats()["hits"]
+    assert nfc_tag_cache.get(db, "T1") == (1, "in_transit")
+    assert nfc_tag_cache.stats()["hits"] == hits + 1
+
+def test_retag_and_delete_drop_entries(setup_db):
+    db = setup_db
+    nfc_tag_cache.get(db, "T2")
+    db.get(Item, 2).nfc_tag = "T2b"
+    db.commit()
+    assert nfc_tag_cache.get(db, "T2") is None
+    assert nfc_tag_cache.get(db, "T2b").item_id == 2
+
+    db.delete(db.get(Item, 2))
+    db.commit()
+    assert nfc_tag_cache.get(db, "T2b") is None
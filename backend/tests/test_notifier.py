@@ -0,0 +1,206 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, NotificationDeadLetter
+from app.services.notifier import NotificationDispatcher, RateLimiter
+
+# StaticPool: the dispatcher's threads record dead letters in the one DB
+ENGINE = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+SessionLocal = sessionmaker(bind=ENGINE)
+
+
+class StubWebhook:
+    """
+    Local webhook receiver: answers `fail_first` requests per message
+    with 500, then 200; every request takes `delay` seconds. Records the
+    most requests it was handling at once in `max_in_flight`.
+    """
+
+    def __init__(self, fail_first=0, delay=0.0):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.received = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight -= 1
+                    n = stub._attempts[body] = stub._attempts.get(body, 0) + 1
+                    ok = n > stub.fail_first
+                    if ok:
+                        stub.received.append(body)
+                self.send_response(200 if ok else 500)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self, message):
+        requests.post(self.url, json={"message": message}, timeout=5).raise_for_status()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    yield
+    Base.metadata.drop_all(ENGINE)
+
+def make_dispatcher(senders, **kwargs):
+    kwargs.setdefault("rate_limits", {})
+    kwargs.setdefault("session_factory", SessionLocal)
+    return NotificationDispatcher(senders=senders, **kwargs)
+
+def dead_letters():
+    db = SessionLocal()
+    try:
+        return [(d.channel, d.attempts, d.error) for d in db.query(NotificationDeadLetter)]
+    finally:
+        db.close()
+
+def test_webhook_throughput():
+    hook = StubWebhook(delay=0.02)
+    dispatcher = make_dispatcher({"webhook": hook.send}, workers=8)
+    try:
+        for i in range(200):
+            assert dispatcher.enqueue("webhook", f"alert {i}")
+        assert dispatcher.join(timeout=30)
+    finally:
+        dispatcher.stop()
+        hook.close()
+    assert len(hook.received) == 200
+    assert dispatcher.stats()["channels"]["webhook"]["sent"] == 200
+    # The workers' requests overlap instead of going out one at a time
+    assert 1 < hook.max_in_flight <= 8
+
+def test_retries_with_backoff_then_dead_letter():
+    flaky = StubWebhook(fail_first=2)
+    dispatcher = make_dispatcher(
+        {"webhook": flaky.send}, max_attempts=3, retry_base_delay=0.05
+    )
+    try:
+        dispatcher.enqueue("webhook", "recovers")
+        assert dispatcher.join(timeout=10)
+    finally:
+        dispatcher.stop()
+        flaky.close()
+    stats = dispatcher.stats()["channels"]["webhook"]
+    assert (stats["sent"], stats["failed_attempts"], stats["retried"]) == (1, 2, 2)
+
+    down = StubWebhook(fail_first=99)
+    dispatcher = make_dispatcher({"webhook": down.send}, max_attempts=3, retry_base_delay=0.05)
+    try:
+        started = time.perf_counter()
+        dispatcher.enqueue("webhook", "never delivered")
+        assert dispatcher.join(timeout=10)
+        # backoff: 0.05 s, then 0.1 s
+        assert time.perf_counter() - started >= 0.15
+    finally:
+        dispatcher.stop()
+        down.close()
+    assert dispatcher.stats()["channels"]["webhook"]["dead_lettered"] == 1
+    [(channel, attempts, error)] = dead_letters()
+    assert (channel, attempts) == ("webhook", 3) and "500" in error
+
+def test_slow_webhook_does_not_stall_other_channels():
+    release = threading.Event()
+    hooks, emails = [], []
+
+    def hanging_webhook(message):
+        release.wait(10)
+        hooks.append(message)
+
+    dispatcher = make_dispatcher({"webhook": hanging_webhook, "email": emails.append}, workers=1)
+    try:
+        for i in range(2):
+            dispatcher.enqueue("webhook", f"hook {i}")
+        for i in range(20):
+            dispatcher.enqueue("email", f"mail {i}")
+        deadline = time.monotonic() + 10
+        while len(emails) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Every email went out while the webhook was still hanging
+        assert len(emails) == 20
+        assert hooks == []
+        release.set()
+        assert dispatcher.join(timeout=10)
+        assert hooks == ["hook 0", "hook 1"]
+    finally:
+        release.set()
+        dispatcher.stop()
+
+def test_full_queue_and_unknown_channel_are_dead_lettered():
+    release = threading.Event()
+    dispatcher = make_dispatcher({"sms": lambda m: release.wait(5)}, workers=1, queue_max_size=1)
+    try:
+        results = [dispatcher.enqueue("sms", f"sms {i}") for i in range(4)]
+        assert dispatcher.enqueue("pager", "nobody listens") is False
+        release.set()
+        assert dispatcher.join(timeout=5)
+    finally:
+        dispatcher.stop()
+    # one in the worker, one queued; the rest are refused without blocking
+    assert results.count(False) >= 2
+    errors = [error for _, _, error in dead_letters()]
+    assert "unknown channel" in errors and "queue full" in errors
+
+def test_dead_letters_are_not_written_on_the_callers_thread():
+    sessions_on = []
+
+    def session_factory():
+        sessions_on.append(threading.current_thread().name)
+        return SessionLocal()
+
+    release = threading.Event()
+    dispatcher = make_dispatcher(
+        {"sms": lambda m: release.wait(5)}, workers=1, queue_max_size=1, session_factory=session_factory
+    )
+    try:
+        for i in range(10):
+            dispatcher.enqueue("sms", f"sms {i}")
+        dispatcher.enqueue("pager", "nobody listens")
+        assert threading.current_thread().name not in sessions_on
+        release.set()
+        assert dispatcher.join(timeout=5)
+    finally:
+        release.set()
+        dispatcher.stop()
+    assert len(dead_letters()) >= 9
+    assert set(sessions_on) == {"notify-dead-letters"}
+
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20, burst=1)
+    stop = threading.Event()
+    started = time.perf_counter()
+    for _ in range(6):
+        assert limiter.acquire(stop)
+    # first token is free, then one every 50 ms
+    assert time.perf_counter() - started >= 0.24
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Sensor, SensorReading
+from app.services.reading_partitions import (
+    apply_retention,
+    create_tables,
+    is_partitioned,
+    partition_name,
+)
+
+def test_partition_name():
+    assert partition_name(date(2025, 6, 1)) == "sensor_readings_p2025_06"
+
+def test_create_tables_adds_composite_index():
+    engine = create_engine("sqlite:///:memory:")
+    create_tables(engine)
+    indexes = {i["name"]: i["column_names"] for i in inspect(engine).get_indexes("sensor_readings")}
+    assert indexes["ix_sensor_readings_sensor_id_timestamp"] == ["sensor_id", "timestamp"]
+    with engine.connect() as conn:
+        assert not is_partitioned(conn)
+    Base.metadata.drop_all(engine)
+
+def test_create_tables_adds_indexes_to_existing_tables():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    # Tables created before the composite indexes were declared
+    with engine.begin() as conn:
+        for name in ("ix_sensor_readings_sensor_id_timestamp", "ix_events_item_id_timestamp", "ix_alerts_timestamp_id"):
+            conn.execute(text(f"DROP INDEX {name}"))
+    create_tables(engine)
+    inspector = inspect(engine)
+    assert "ix_sensor_readings_sensor_id_timestamp" in {i["name"] for i in inspector.get_indexes("sensor_readings")}
+    assert "ix_events_item_id_timestamp" in {i["name"] for i in inspector.get_indexes("events")}
+    assert "ix_alerts_timestamp_id" in {i["name"] for i in inspector.get_indexes("alerts")}
+    # Idempotent
+    create_tables(engine)
+    Base.metadata.drop_all(engine)
+
+def test_retention_deletes_old_rows_on_plain_table():
+    engine = create_engine("sqlite:///:memory:")
+    create_tables(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Sensor(id=1, name="S1", type="temperature", location_id=1))
+    db.add_all([
+        SensorReading(sensor_id=1, timestamp=datetime(2024, 12, 31, 23, 59), value=1.0),
+        SensorReading(sensor_id=1, timestamp=datetime(2025, 1, 1), value=2.0),
+        SensorReading(sensor_id=1, timestamp=datetime(2025, 6, 15), value=3.0),
+    ])
+    db.commit()
+
+    with engine.begin() as conn:
+        assert apply_retention(conn, retention_months=0, today=date(2025, 7, 10)) == 0
+        # keep 6 whole months before July 2025 -> drop everything before 2025-01-01
+        assert apply_retention(conn, retention_months=6, today=date(2025, 7, 10)) == 1
+    assert [r.value for r in db.query(SensorReading).order_by(SensorReading.timestamp)] == [2.0, 3.0]
+    db.close()
+    Base.metadata.drop_all(engine)
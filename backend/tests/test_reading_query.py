@@ -0,0 +1,71 @@
+import pytest
+from array import array
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Sensor, SensorReading
+from app.services import keyset
+from app.services.reading_query import decode_cursor, fetch_page, pack_columns
+
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+T0 = datetime(2025, 6, 30, 14, 30)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    db = SessionLocal()
+    for sensor_id in (1, 2, 3):
+        db.add(Sensor(id=sensor_id, name=f"S{sensor_id}", type="temperature", location_id=1))
+    db.flush()
+    for sensor_id in (1, 2, 3):
+        db.add_all([
+            SensorReading(sensor_id=sensor_id, timestamp=T0 + timedelta(seconds=s), value=float(s))
+            for s in range(5)
+        ])
+    # Same sensor and timestamp twice: the id keeps the order total
+    db.add(SensorReading(sensor_id=2, timestamp=T0 + timedelta(seconds=2), value=-2.0))
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+
+def test_fetch_page_walks_all_rows_with_cursor(setup_db):
+    db = setup_db
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        rows, cursor = fetch_page(db, [3, 1, 2], limit=4, cursor=cursor)
+        seen.extend(rows)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 4
+    assert len(seen) == 16
+    assert len({r[0] for r in seen}) == 16
+    assert [(r[1], r[2]) for r in seen] == sorted((r[1], r[2]) for r in seen)
+
+def test_fetch_page_filters_time_range(setup_db):
+    db = setup_db
+    rows, cursor = fetch_page(db, [1], start=T0 + timedelta(seconds=1), end=T0 + timedelta(seconds=3))
+    assert [r[3] for r in rows] == [1.0, 2.0]
+    assert cursor is None
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    # Forged timestamp out of datetime's range
+    with pytest.raises(ValueError):
+        decode_cursor(keyset.encode_cursor(1, 10 ** 20, 1))
+
+def test_pack_columns(setup_db):
+    rows, _ = fetch_page(setup_db, [1], limit=2)
+    data = pack_columns(rows)
+    assert len(data) == 2 * (4 + 8 + 8)
+    assert list(array("i", data[:8])) == [1, 1]
+    micros = array("q", data[8:24])
+    assert micros[1] - micros[0] == 1_000_000
+    assert list(array("d", data[24:])) == [0.0, 1.0]
@@ -0,0 +1,171 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Sensor, SensorReading, SensorReadingRollup
+from app.schemas import SensorReadingCreate
+from app.services.reading_rollups import (
+    backfill_rollups,
+    bucket_start,
+    get_history,
+    pick_resolution,
+    rebuild_rollups,
+    rollup_buffer,
+)
+from app.services.sensor_service import ingest_and_check, ingest_batch_and_check
+
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+T0 = datetime(2025, 6, 30, 14, 30)
+
+@pytest.fixture(autouse=True)
+def setup_db(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        lambda sensor, reading, alert_type: None
+    )
+    Base.metadata.create_all(ENGINE)
+    rollup_buffer.clear()
+    db = SessionLocal()
+    db.add(Sensor(id=1, name="Fridge", type="temperature", location_id=1))
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+    rollup_buffer.clear()
+
+def _rollup(db, resolution, bucket):
+    return db.get(SensorReadingRollup, (1, resolution, bucket))
+
+def test_bucket_start():
+    ts = datetime(2025, 6, 30, 14, 30, 45, 123)
+    assert bucket_start(ts, "1m") == datetime(2025, 6, 30, 14, 30)
+    assert bucket_start(ts, "1h") == datetime(2025, 6, 30, 14, 0)
+    assert bucket_start(ts, "1d") == datetime(2025, 6, 30)
+
+def test_ingest_merges_into_rollups(setup_db):
+    db = setup_db
+    ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=T0, value=4.0),
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(seconds=10), value=6.0),
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(minutes=1), value=2.0),
+    ])
+    # Buffered until the write-behind flush, which writes each bucket once
+    assert _rollup(db, "1m", T0) is None
+    assert rollup_buffer.flush(db) == 4
+    # A later single reading recomputes the buckets it falls in
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(seconds=20), value=8.0)
+    assert rollup_buffer.flush(db) == 3
+
+    minute = _rollup(db, "1m", T0)
+    assert (minute.min_value, minute.max_value, minute.reading_count) == (4.0, 8.0, 3)
+    assert minute.sum_value == 18.0
+    assert _rollup(db, "1m", T0 + timedelta(minutes=1)).reading_count == 1
+    hour = _rollup(db, "1h", datetime(2025, 6, 30, 14))
+    assert (hour.min_value, hour.max_value, hour.reading_count) == (2.0, 8.0, 4)
+    assert _rollup(db, "1d", datetime(2025, 6, 30)).sum_value == 20.0
+
+def test_offset_timestamps_share_buckets_across_paths(setup_db):
+    db = setup_db
+    # 14:30+02:00 is 12:30 UTC, whichever path it comes through
+    local = datetime.fromisoformat("2025-06-30T14:30:00+02:00")
+    single = ingest_and_check(db, sensor_id=1, timestamp=local, value=4.0)
+    [batched] = ingest_batch_and_check(db, [SensorReadingCreate(sensor_id=1, timestamp=local, value=6.0)])
+    assert single.timestamp == batched.timestamp == datetime(2025, 6, 30, 12, 30)
+
+    rollup_buffer.flush(db)
+    hour = _rollup(db, "1h", datetime(2025, 6, 30, 12))
+    assert (hour.min_value, hour.max_value, hour.reading_count) == (4.0, 6.0, 2)
+    assert _rollup(db, "1h", datetime(2025, 6, 30, 14)) is None
+
+def test_pick_resolution():
+    assert pick_resolution(T0, T0 + timedelta(minutes=30)) == "raw"
+    assert pick_resolution(T0, T0 + timedelta(hours=12)) == "1m"
+    assert pick_resolution(T0, T0 + timedelta(days=30)) == "1h"
+    assert pick_resolution(T0, T0 + timedelta(days=365)) == "1d"
+    assert pick_resolution(T0, T0 + timedelta(days=5000)) == "1d"
+
+def test_flush_is_idempotent(setup_db):
+    db = setup_db
+    ingest_batch_and_check(db, [SensorReadingCreate(sensor_id=1, timestamp=T0, value=4.0)])
+    rollup_buffer.flush(db)
+    # The same buckets marked again (e.g. a retried flush) don't double count
+    rollup_buffer.add([SensorReading(sensor_id=1, timestamp=T0, value=4.0)])
+    rollup_buffer.flush(db)
+    assert _rollup(db, "1m", T0).reading_count == 1
+    assert _rollup(db, "1d", datetime(2025, 6, 30)).reading_count == 1
+
+def test_get_history(setup_db):
+    db = setup_db
+    ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(hours=h), value=float(h))
+        for h in range(48)
+    ])
+    rollup_buffer.flush(db)
+    ingest_batch_and_check(db, [SensorReadingCreate(sensor_id=1, timestamp=T0, value=100.0)])
+    rollup_buffer.flush(db)
+    resolution, points = get_history(db, 1, T0, T0 + timedelta(days=2))
+    assert resolution == "1h"
+    assert len(points) == 48
+    assert (points[0]["count"], points[0]["max"], points[0]["avg"]) == (2, 100.0, 50.0)
+    assert points[1]["count"] == 1
+
+    resolution, points = get_history(db, 1, T0, T0 + timedelta(days=2), resolution="1d")
+    assert resolution == "1d"
+    # Buckets overlapping the range: 2025-06-30 .. 2025-07-02
+    assert [p["count"] for p in points] == [11, 24, 14]
+    assert points[0]["avg"] == (sum(range(10)) + 100) / 11
+
+    resolution, points = get_history(db, 1, T0, T0 + timedelta(minutes=30))
+    assert resolution == "raw"
+    assert sorted(p["max"] for p in points) == [0.0, 100.0]
+
+def test_get_history_caps_explicit_resolutions(setup_db):
+    db = setup_db
+    with pytest.raises(ValueError):
+        get_history(db, 1, T0, T0 + timedelta(hours=2), resolution="raw")
+    with pytest.raises(ValueError):
+        get_history(db, 1, T0, T0 + timedelta(days=1), resolution="1m")
+    assert get_history(db, 1, T0, T0 + timedelta(hours=12), resolution="1m") == ("1m", [])
+    # The coarsest rollup serves any range, as with resolution=auto
+    assert get_history(db, 1, T0, T0 + timedelta(days=5000), resolution="1d") == ("1d", [])
+
+def test_backfill_rollups(setup_db, monkeypatch):
+    db = setup_db
+    # Chunks end mid-bucket; only complete buckets are written
+    monkeypatch.setattr("app.services.reading_rollups.BACKFILL_CHUNK_SIZE", 4)
+    db.add_all([
+        SensorReading(sensor_id=1, timestamp=T0 + timedelta(seconds=s), value=1.0)
+        for s in range(0, 600, 10)
+    ])
+    db.commit()
+    assert backfill_rollups(db) == 60
+    assert _rollup(db, "1h", datetime(2025, 6, 30, 14)).reading_count == 60
+    assert _rollup(db, "1m", T0).reading_count == 6
+    # Already populated: nothing to do
+    assert backfill_rollups(db) == 0
+
+def test_rebuild_rollups_repairs_lost_flushes(setup_db):
+    db = setup_db
+    ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=T0 + timedelta(minutes=m), value=float(m))
+        for m in range(3)
+    ])
+    rollup_buffer.flush(db)
+    # A crash loses the next flush
+    ingest_and_check(db, sensor_id=1, timestamp=T0 + timedelta(minutes=2, seconds=30), value=9.0)
+    rollup_buffer.clear()
+    assert _rollup(db, "1m", T0 + timedelta(minutes=2)).reading_count == 1
+
+    # Rebuilding from mid-bucket still recomputes whole buckets
+    assert rebuild_rollups(db, since=T0 + timedelta(minutes=2, seconds=10)) == 2
+    minute = _rollup(db, "1m", T0 + timedelta(minutes=2))
+    assert (minute.reading_count, minute.max_value) == (2, 9.0)
+    hour = _rollup(db, "1h", datetime(2025, 6, 30, 14))
+    assert (hour.reading_count, hour.sum_value) == (4, 12.0)
+    assert _rollup(db, "1m", T0).reading_count == 1
+    # Rebuilding again changes nothing
+    rebuild_rollups(db)
+    assert _rollup(db, "1d", datetime(2025, 6, 30)).reading_count == 4
@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Sensor
+from app.services.sensor_cache import SensorMetadataCache, sensor_cache
+
+# Use an in-memory SQLite DB for testing
+ENGINE = create_engine("sqlite:///:memory:")
+SessionLocal = sessionmaker(bind=ENGINE)
+
+def make_sensor(id, threshold_max=30.0):
+    return Sensor(
+        id=id,
+        name=f"S{id}",
+        type="temperature",
+        threshold_min=10.0,
+        threshold_max=threshold_max,
+        location_id=1
+    )
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(ENGINE)
+    db = SessionLocal()
+    db.add_all([make_sensor(1), make_sensor(2), make_sensor(3)])
+    db.commit()
+    yield db
+    db.close()
+    Base.metadata.drop_all(ENGINE)
+
+def test_hit_and_miss_counters(setup_db):
+    cache = SensorMetadataCache(ttl=60, max_size=10)
+    assert cache.get(setup_db, 1).threshold_max == 30.0
+    assert cache.get(setup_db, 1).name == "S1"
+    assert cache.get(setup_db, 999) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+
+def test_lru_eviction(setup_db):
+    cache = SensorMetadataCache(ttl=60, max_size=2)
+    cache.get(setup_db, 1)
+    cache.get(setup_db, 2)
+    cache.get(setup_db, 1)  # 2 is now least recently used
+    cache.get(setup_db, 3)
+    assert cache.stats()["evictions"] == 1
+    cache.get(setup_db, 1)
+    assert cache.stats()["hits"] == 2
+
+def test_ttl_expiry(setup_db):
+    cache = SensorMetadataCache(ttl=-1, max_size=10)
+    cache.get(setup_db, 1)
+    cache.get(setup_db, 1)
+    assert cache.stats()["hits"] == 0
+
+def test_get_many_loads_misses(setup_db):
+    cache = SensorMetadataCache(ttl=60, max_size=10)
+    cache.get(setup_db, 1)
+    found = cache.get_many(setup_db, [1, 2, 999])
+    assert set(found) == {1, 2}
+    assert cache.stats()["hits"] == 1
+
+def test_threshold_change_invalidates_shared_cache(setup_db):
+    db = setup_db
+    assert sensor_cache.get(db, 1).threshold_max == 30.0
+    sensor = db.get(Sensor, 1)
+    sensor.threshold_max = 25.0
+    db.commit()
+    assert sensor_cache.get(db, 1).threshold_max == 25.0
+
+def test_last_ping_change_keeps_cached_entry(setup_db):
+    db = setup_db
+    sensor_cache.get(db, 2)
+    hits = sensor_cache.stats()["hits"]
+    db.get(Sensor, 2).last_ping = datetime.utcnow()
+    db.commit()
+    sensor_cache.get(db, 2)
+    assert sensor_cache.stats()["hits"] == hits + 1
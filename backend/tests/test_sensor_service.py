@@ -3,8 +3,16 @@ from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.models import Base, Sensor, SensorReading
-from app.services.sensor_service import ingest_and_check
+from app.models import Base, Sensor, SensorLatest, SensorReading
+from app.schemas import SensorReadingCreate
+from app.services.ping_buffer import ping_buffer
+from app.services.sensor_service import (
+    backfill_sensor_latest,
+    check_batch,
+    ingest_and_check,
+    ingest_batch_and_check,
+    persist_batch,
+)
 
 # Use an in-memory SQLite DB for testing
 ENGINE = create_engine("sqlite:///:memory:")
@@ -78,3 +86,108 @@ def test_ingest_above_threshold_triggers_alert(monkeypatch, setup_db):
     )
     assert called['args'] == (1, 35.0, "above_threshold")
 
+
+def test_ingest_batch_persists_and_checks_each_reading(monkeypatch, setup_db):
+    db = setup_db
+    called = []
+    def fake_alert(sensor, reading, alert_type):
+        called.append((sensor.id, reading.value, alert_type))
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        fake_alert
+    )
+
+    now = datetime.utcnow()
+    readings = ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=5.0),
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=20.0),
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=35.0),
+    ])
+    assert [r.value for r in readings] == [5.0, 20.0, 35.0]
+    assert all(r.id is not None for r in readings)
+    assert db.query(SensorReading).count() == 3
+    assert ping_buffer.last_ping(1, None) is not None
+    assert called == [(1, 5.0, "below_threshold"), (1, 35.0, "above_threshold")]
+
+def test_check_batch_counts_only_dispatched_alerts(monkeypatch, setup_db):
+    db = setup_db
+    sent = iter(["alert", None])  # the second is suppressed as a duplicate
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        lambda sensor, reading, alert_type: next(sent)
+    )
+    now = datetime.utcnow()
+    rows, sensors = persist_batch(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=5.0),
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=20.0),
+        SensorReadingCreate(sensor_id=1, timestamp=now, value=5.0),
+    ])
+    assert check_batch(rows, sensors) == 1
+
+def test_ingest_batch_unknown_sensor_writes_nothing(setup_db):
+    db = setup_db
+    with pytest.raises(ValueError):
+        ingest_batch_and_check(db, [
+            SensorReadingCreate(sensor_id=1, timestamp=datetime.utcnow(), value=20.0),
+            SensorReadingCreate(sensor_id=999, timestamp=datetime.utcnow(), value=20.0),
+        ])
+    assert db.query(SensorReading).count() == 0
+
+def test_ingest_buffers_last_ping_until_flush(setup_db):
+    db = setup_db
+    ping_buffer.clear()
+    ingest_and_check(db, sensor_id=1, timestamp=datetime.utcnow(), value=20.0)
+    ingest_and_check(db, sensor_id=1, timestamp=datetime.utcnow(), value=21.0)
+    # Not written yet, but visible through the buffer
+    assert db.query(Sensor).get(1).last_ping is None
+    buffered = ping_buffer.last_ping(1, None)
+    assert buffered is not None
+
+    assert ping_buffer.flush(db) == 1
+    db.expire_all()
+    assert db.query(Sensor).get(1).last_ping == buffered
+    assert ping_buffer.pending_count() == 0
+
+def test_ping_flush_only_moves_last_ping_forward(setup_db):
+    db = setup_db
+    ping_buffer.clear()
+    newer = datetime(2025, 6, 30, 12, 5)
+    # Another worker already flushed a newer ping
+    db.query(Sensor).get(1).last_ping = newer
+    db.commit()
+    ping_buffer.record(1, datetime(2025, 6, 30, 12, 0))
+    assert ping_buffer.flush(db) == 0
+    db.expire_all()
+    assert db.query(Sensor).get(1).last_ping == newer
+
+    ping_buffer.record(1, datetime(2025, 6, 30, 12, 10))
+    assert ping_buffer.flush(db) == 1
+    db.expire_all()
+    assert db.query(Sensor).get(1).last_ping == datetime(2025, 6, 30, 12, 10)
+
+def test_ingest_maintains_sensor_latest(setup_db):
+    db = setup_db
+    t0 = datetime(2025, 6, 30, 12, 0)
+    ingest_and_check(db, sensor_id=1, timestamp=t0, value=20.0)
+    ingest_batch_and_check(db, [
+        SensorReadingCreate(sensor_id=1, timestamp=t0.replace(minute=2), value=22.0),
+        SensorReadingCreate(sensor_id=1, timestamp=t0.replace(minute=1), value=21.0),
+    ])
+    # Late-arriving older reading doesn't replace the latest value
+    ingest_and_check(db, sensor_id=1, timestamp=t0.replace(minute=1, second=30), value=25.0)
+    latest = db.get(SensorLatest, 1)
+    db.refresh(latest)
+    assert (latest.timestamp, latest.value) == (t0.replace(minute=2), 22.0)
+
+def test_backfill_sensor_latest(setup_db):
+    db = setup_db
+    t0 = datetime(2025, 6, 30, 12, 0)
+    db.add_all([
+        SensorReading(sensor_id=1, timestamp=t0, value=20.0),
+        SensorReading(sensor_id=1, timestamp=t0.replace(minute=5), value=23.0),
+    ])
+    db.commit()
+    assert backfill_sensor_latest(db) == 1
+    assert db.get(SensorLatest, 1).value == 23.0
+    # Only runs on an empty projection
+    assert backfill_sensor_latest(db) == 0
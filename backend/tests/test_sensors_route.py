@@ -1,23 +1,45 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.models import Base, Sensor
-from app.db_session import get_db
+from app.models import Base, Sensor, User
+from app.auth_security import create_access_token
+from app.db_session import get_db, get_async_db
+from app.services import keyset
+from app.services.reading_rollups import rollup_buffer
 
-# Use an in-memory SQLite database for testing
-ENGINE = create_engine("sqlite:///:memory:")
+# Use a temporary SQLite file so the sync and async engines (used by sync
+# and async endpoints respectively) see the same data
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+ENGINE = create_engine(
+    f"sqlite:///{DB_PATH}",
+    connect_args={"check_same_thread": False},
+)
 SessionLocal = sessionmaker(bind=ENGINE)
+# NullPool: TestClient may run each request on a fresh event loop
+ASYNC_ENGINE = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", poolclass=NullPool)
+AsyncSessionLocal = async_sessionmaker(bind=ASYNC_ENGINE, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 @pytest.fixture(scope="module", autouse=True)
 def setup_app():
     # Create all tables in the test DB
     Base.metadata.create_all(ENGINE)
 
-    # Override the get_db dependency to use the test session
+    # Override the DB dependencies to use the test database
     app.dependency_overrides[get_db] = lambda: SessionLocal()
+    app.dependency_overrides[get_async_db] = override_get_async_db
 
     # Seed a sensor record for tests
     db = SessionLocal()
@@ -29,6 +51,9 @@ def setup_app():
         threshold_max=70.0,
         location_id=1
     ))
+    # Seed a gateway user for authenticated endpoints
+    db.add(User(id=1, email="gw@example.com", hashed_password="x", role="operator"))
+    db.add(User(id=2, email="admin@example.com", hashed_password="x", role="admin"))
     db.commit()
     db.close()
 
@@ -63,3 +88,274 @@ def test_reading_missing_sensor():
     assert response.status_code == 404
     assert response.json()["detail"] == "Sensor not found"
 
+
+def test_reading_batch_success():
+    payload = [
+        {"sensor_id": 1, "timestamp": "2025-06-30T14:30:00Z", "value": 40.0},
+        {"sensor_id": 1, "timestamp": "2025-06-30T14:30:10Z", "value": 45.0},
+    ]
+    response = client.post("/sensors/readings/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["value"] for r in data] == [40.0, 45.0]
+    assert all("id" in r for r in data)
+
+def test_reading_batch_missing_sensor():
+    payload = [
+        {"sensor_id": 1, "timestamp": "2025-06-30T14:30:00Z", "value": 40.0},
+        {"sensor_id": 999, "timestamp": "2025-06-30T14:30:00Z", "value": 40.0},
+    ]
+    response = client.post("/sensors/readings/batch", json=payload)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Sensor not found"
+
+def test_reading_alerts_run_off_the_event_loop(monkeypatch):
+    import asyncio
+    on_loop = []
+
+    def record(sensor, reading, alert_type):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+
+    monkeypatch.setattr("app.services.sensor_service.check_and_send_alert", record)
+    client.post("/sensors/readings/", json={"sensor_id": 1, "timestamp": "2025-06-30T14:40:00Z", "value": 90.0})
+    client.post("/sensors/readings/batch", json=[
+        {"sensor_id": 1, "timestamp": "2025-06-30T14:40:10Z", "value": 10.0},
+    ])
+    assert on_loop == [False, False]
+
+def test_in_range_readings_skip_the_threadpool(monkeypatch):
+    async def fail(*args):
+        raise AssertionError("threshold checks hopped to the threadpool")
+
+    monkeypatch.setattr("app.services.sensor_service.run_in_threadpool", fail)
+    response = client.post("/sensors/readings/", json={"sensor_id": 1, "timestamp": "2025-06-30T14:41:00Z", "value": 50.0})
+    assert response.status_code == 200
+    response = client.post("/sensors/readings/batch", json=[
+        {"sensor_id": 1, "timestamp": "2025-06-30T14:41:10Z", "value": 55.0},
+    ])
+    assert response.status_code == 200
+
+def test_reading_queued_mode(monkeypatch):
+    from app.services.ingest_queue import IngestQueue
+    monkeypatch.setattr("app.routes.sensors.INGEST_MODE", "queued")
+    monkeypatch.setattr("app.routes.sensors.ingest_queue", IngestQueue(max_size=1))
+    payload = {
+        "sensor_id": 1,
+        "timestamp": "2025-06-30T14:30:00Z",
+        "value": 50.0
+    }
+    response = client.post("/sensors/readings/", json=payload)
+    assert response.status_code == 202
+    assert response.json() == {"status": "queued", "queue_depth": 1}
+
+    # Queue is full now: backpressure instead of blocking
+    response = client.post("/sensors/readings/", json=payload)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    response = client.post("/sensors/readings/", json={**payload, "sensor_id": 999})
+    assert response.status_code == 404
+
+def test_sensors_status():
+    response = client.get("/sensors/status/")
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["sensor_id"] for s in data] == [1]
+    assert data[0]["value"] is not None
+    assert data[0]["last_ping"] is not None
+
+def test_sensors_status_etag(monkeypatch):
+    from app.services.status_snapshot import status_snapshot
+    monkeypatch.setattr(status_snapshot, "min_interval", 0)
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        lambda sensor, reading, alert_type: None
+    )
+    response = client.get("/sensors/status/")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    # Unchanged: served from the snapshot, 304 without a body
+    rebuilds = status_snapshot.rebuilds
+    response = client.get("/sensors/status/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert status_snapshot.rebuilds == rebuilds
+
+    # Ingest invalidates the snapshot
+    client.post("/sensors/readings/", json={
+        "sensor_id": 1,
+        "timestamp": "2099-01-01T00:00:00Z",
+        "value": 95.0
+    })
+    response = client.get("/sensors/status/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["status"] == "danger"
+
+def test_status_snapshot_expires_when_sensor_goes_offline():
+    from app.services.status_snapshot import StatusSnapshot
+    snapshot = StatusSnapshot(min_interval=60, max_age=60)
+    snapshot.store([], snapshot.version, valid_for=60)
+    assert snapshot.current() is not None
+    # A sensor crosses the offline threshold now
+    snapshot.store([], snapshot.version, valid_for=0)
+    assert snapshot.current() is None
+
+def test_sensor_readings_history():
+    # Rollups are written by the scheduler's flush
+    db = SessionLocal()
+    try:
+        rollup_buffer.flush(db)
+    finally:
+        db.close()
+    params = {"from": "2025-06-30T00:00:00Z", "to": "2025-07-01T00:00:00Z"}
+    response = client.get("/sensors/1/readings", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resolution"] == "1h"
+    assert data["points"] and all(p["count"] >= 1 for p in data["points"])
+
+    response = client.get("/sensors/1/readings", params={**params, "resolution": "1d"})
+    assert response.json()["resolution"] == "1d"
+    # Explicit resolutions are capped like auto
+    response = client.get("/sensors/1/readings", params={**params, "resolution": "1m"})
+    assert response.status_code == 400
+
+    response = client.get("/sensors/999/readings", params=params)
+    assert response.status_code == 404
+    response = client.get("/sensors/1/readings", params={"from": params["to"], "to": params["from"]})
+    assert response.status_code == 400
+
+def test_readings_bulk_formats():
+    response = client.get("/sensors/readings/bulk", params={"sensor_ids": [1], "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert data["sensor_id"] == [1, 1]
+    assert data["next_cursor"]
+
+    response = client.get("/sensors/readings/bulk", params={
+        "sensor_ids": [1], "limit": 2, "cursor": data["next_cursor"], "format": "binary",
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert len(response.content) == int(response.headers["X-Row-Count"]) * 20
+
+    response = client.get("/sensors/readings/bulk", params={"sensor_ids": [1], "cursor": "bogus"})
+    assert response.status_code == 400
+    forged = keyset.encode_cursor(1, 10 ** 20, 1)
+    response = client.get("/sensors/readings/bulk", params={"sensor_ids": [1], "cursor": forged})
+    assert response.status_code == 400
+
+def test_reading_stream_ndjson(monkeypatch):
+    alerts = []
+
+    def record(sensor, reading, alert_type):
+        alerts.append(alert_type)
+        return alert_type
+
+    monkeypatch.setattr("app.services.sensor_service.check_and_send_alert", record)
+    lines = [
+        '{"sensor_id": 1, "timestamp": "2025-06-30T14:30:00Z", "value": 50.0}',
+        '{"sensor_id": 1, "timestamp": "2025-06-30T14:30:10Z", "value": 80.0}',
+        'not json',
+        '{"sensor_id": 999, "timestamp": "2025-06-30T14:30:00Z", "value": 50.0}',
+        '{"sensor_id": 1, "timestamp": "2025-06-30T14:30:20Z"}',
+        '',
+    ]
+
+    def body():
+        # Split mid-line to exercise incremental parsing
+        data = "\n".join(lines).encode()
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    response = client.post(
+        "/sensors/readings/stream",
+        content=body(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["accepted"], data["rejected"], data["alerts"]) == (2, 3, 1)
+    assert data["errors"][0].startswith("line 3:")
+    assert alerts == ["above_threshold"]
+
+def test_reading_stream_deduplicated_alerts_count_zero(monkeypatch):
+    # dispatch_alert returns None when the alert is a duplicate
+    monkeypatch.setattr(
+        "app.services.sensor_service.check_and_send_alert",
+        lambda sensor, reading, alert_type: None
+    )
+    response = client.post(
+        "/sensors/readings/stream",
+        content='{"sensor_id": 1, "timestamp": "2025-06-30T14:30:30Z", "value": 80.0}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert (response.json()["accepted"], response.json()["alerts"]) == (1, 0)
+
+def test_reading_stream_csv():
+    body = (
+        "sensor_id,timestamp,value\n"
+        "1,2025-06-30T15:00:00Z,40.0\n"
+        "1,2025-06-30T15:00:10Z,abc\n"
+        "1,2025-06-30T15:00:20Z,41.5\n"
+    )
+    response = client.post(
+        "/sensors/readings/stream",
+        content=body,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["accepted"], data["rejected"], data["alerts"]) == (2, 1, 0)
+
+def test_reading_websocket_acks_batches(monkeypatch):
+    monkeypatch.setattr("app.services.ws_ingest.WS_ACK_BATCH_SIZE", 3)
+    token = create_access_token({"sub": "1", "role": "operator"})
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': '2', 'role': 'admin'})}"}
+    with client.websocket_connect(f"/sensors/readings/ws?token={token}") as ws:
+        ws.send_json({"sensor_id": 1, "timestamp": "2025-06-30T16:00:00Z", "value": 50.0})
+        ws.send_json([
+            {"sensor_id": 1, "timestamp": "2025-06-30T16:00:10Z", "value": 51.0},
+            {"sensor_id": 999, "timestamp": "2025-06-30T16:00:10Z", "value": 51.0},
+        ])
+        ack = ws.receive_json()
+        assert (ack["received"], ack["accepted"], ack["rejected"]) == (3, 2, 1)
+
+        # Connection stats expose user ids: admins/auditors only
+        assert client.get("/sensors/readings/ws/stats").status_code == 401
+        response = client.get("/sensors/readings/ws/stats", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 403
+        stats = client.get("/sensors/readings/ws/stats", headers=admin).json()
+        assert [(c["user_id"], c["accepted"], c["acks"]) for c in stats] == [(1, 2, 1)]
+
+        # Partial batch is acknowledged after WS_ACK_INTERVAL
+        ws.send_text("not json")
+        ack = ws.receive_json()
+        assert (ack["received"], ack["accepted"], ack["rejected"]) == (4, 0, 1)
+    assert client.get("/sensors/readings/ws/stats", headers=admin).json() == []
+
+def test_reading_websocket_rejects_binary_frames():
+    token = create_access_token({"sub": "1", "role": "operator"})
+    with client.websocket_connect(f"/sensors/readings/ws?token={token}") as ws:
+        ws.send_json({"sensor_id": 1, "timestamp": "2025-06-30T16:30:00Z", "value": 50.0})
+        ws.send_bytes(b"\x00\x01")
+        # What came before the binary frame is still written and acknowledged
+        ack = ws.receive_json()
+        assert (ack["received"], ack["accepted"]) == (1, 1)
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+def test_reading_websocket_requires_token():
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/sensors/readings/ws?token=bad") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
@@ -0,0 +1,95 @@
+# medassistant/scripts/bench_ingest.py
+"""
+Load test for the sensor endpoints.
+
+Runs N concurrent clients against a running backend for a fixed duration
+and prints throughput and latency percentiles. To compare the sync and
+async handlers, run it once against a build before the async engine was
+introduced and once against the current build, with the same database:
+
+    uvicorn app.main:app --workers 1            # in backend/
+    python scripts/seed.py
+    python scripts/bench_ingest.py --clients 500 --duration 30
+    python scripts/bench_ingest.py --clients 500 --endpoint status
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import httpx
+
+
+async def _client(
+    http: httpx.AsyncClient,
+    args: argparse.Namespace,
+    deadline: float,
+    latencies: list,
+    errors: dict,
+):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if args.endpoint == "status":
+                resp = await http.get("/sensors/status/")
+            else:
+                resp = await http.post("/sensors/readings/", json={
+                    "sensor_id": random.choice(args.sensor_ids),
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "value": round(random.uniform(0.0, 10.0), 2),
+                })
+            if resp.status_code >= 400:
+                errors[resp.status_code] = errors.get(resp.status_code, 0) + 1
+                continue
+        except httpx.HTTPError as e:
+            name = type(e).__name__
+            errors[name] = errors.get(name, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[idx]
+
+
+async def run(args: argparse.Namespace):
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    latencies: list = []
+    errors: dict = {}
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as http:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            _client(http, args, deadline, latencies, errors)
+            for _ in range(args.clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"endpoint:    {args.endpoint}")
+    print(f"clients:     {args.clients}")
+    print(f"duration:    {elapsed:.1f}s")
+    print(f"requests:    {len(latencies)} ok, {sum(errors.values())} failed {errors or ''}")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+    for pct in (50, 95, 99):
+        print(f"p{pct}:         {_percentile(latencies, pct) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for sensor endpoints")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["ingest", "status"], default="ingest")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (seconds)")
+    parser.add_argument("--sensor-ids", type=int, nargs="+", default=[1])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# medassistant/scripts/rebuild_rollups.py
+"""
+Rebuild the 1m/1h/1d reading rollups from sensor_readings.
+
+Buckets are recomputed and replaced, so this can run next to a live
+backend. Without --since everything still in sensor_readings is rebuilt;
+rollups older than raw retention are kept as they are.
+
+    python scripts/rebuild_rollups.py
+    python scripts/rebuild_rollups.py --since 2025-06-01T00:00:00
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Adjust Python path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), "../backend"))
+
+from app.db_session import SessionLocal
+from app.services.reading_rollups import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="rebuild buckets from this UTC time on (default: all)",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total = rebuild_rollups(db, args.since)
+    finally:
+        db.close()
+    print(f"Rebuilt reading rollups from {total} readings")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,16 @@ from sqlalchemy.orm import Session
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), "../backend"))
 
-from app.db_session import engine, SessionLocal, Base
+from app.db_session import engine, SessionLocal
 from app.models import Location, Sensor, Item, User
+from app.services.reading_partitions import create_tables
 from passlib.context import CryptContext
 
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def seed():
     # 1. Create tables
-    Base.metadata.create_all(bind=engine)
+    create_tables(engine)
 
     # 2. Open session
     db: Session = SessionLocal()